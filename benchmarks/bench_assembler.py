@@ -0,0 +1,61 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiler import Lexer, Parser, Semantic, CodeGen
+from compiler.MIPSAssembler import MIPSAssembler
+from corpus import scaled_source
+
+def assembly(instructions: int) -> str:
+    """Saida do CodeGen para um programa do corpus com pelo menos tantas instrucoes"""
+    size = 100_000
+    while True:
+        semantic = Semantic(Parser(Lexer(scaled_source(size)).get_tokens()).parse())
+        tree, deps = semantic.validate_all()
+        code = CodeGen(tree, deps, semantic.symbols).generate_code()
+        count = sum(1 for line in code.split("\n") if line.strip() and ":" not in line and not line.strip().startswith("."))
+        if count >= instructions:
+            return code
+        size = size * instructions // count + 1
+
+def legacy(lines: list, path: str) -> int:
+    """Como o main.py fazia: assemble_instruction por linha e um to_bytes por palavra"""
+    assembler = MIPSAssembler()
+    assembler.first_pass(lines)
+    machine_code = []
+    for address, line in assembler.instructions:
+        instruction = assembler.assemble_instruction(line, address)
+        if instruction is not None:
+            machine_code.append(instruction)
+    with open(path, "wb") as f:
+        for code in machine_code:
+            f.write(code.to_bytes(4, byteorder="big"))
+    return len(machine_code)
+
+def batched(lines: list, path: str) -> int:
+    words = MIPSAssembler().assemble_lines(lines)
+    MIPSAssembler.write_binary(words, path)
+    return len(words)
+
+def bench(name: str, func, lines: list, path: str, repeat: int = 3) -> bytes:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func(lines, path)
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:>8}: {count} palavras em {best:.3f}s -> {count / best:,.0f} instrucoes/s")
+    with open(path, "rb") as f:
+        return f.read()
+
+if __name__ == "__main__":
+    target = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    lines = assembly(target).split("\n")
+    print(f"entrada: {len(lines)} linhas de assembly")
+    with tempfile.TemporaryDirectory() as folder:
+        old = bench("antigo", legacy, lines, os.path.join(folder, "legacy.bin"))
+        new = bench("tabela", batched, lines, os.path.join(folder, "batched.bin"))
+    if old != new:
+        raise Exception("Batched encoder output differs from assemble_instruction")
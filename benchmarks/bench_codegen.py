@@ -0,0 +1,49 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiler import Lexer, Parser, Semantic, CodeGen
+from compiler.types import Node
+from corpus import scaled_source
+
+class LegacyCodeGen(CodeGen):
+    """Despacho antigo: hasattr + f-string + getattr + callable a cada node"""
+    def _cgen(self, tree: Node) -> None:
+        if hasattr(self, f"assemble_{tree.label}"):
+            func = getattr(self, f"assemble_{tree.label}")
+            if callable(func):
+                func(tree)
+        else:
+            self.yield_error(f"assemble_{tree.label} function not found", tree)
+
+def count_nodes(root: Node) -> int:
+    total, stack = 0, [root]
+    while stack:
+        node = stack.pop()
+        total += 1
+        stack.extend(child for child in node.children if isinstance(child, Node))
+    return total
+
+def bench(name: str, build, nodes: int, repeat: int = 3) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        codegen = build()
+        start = time.perf_counter()
+        codegen.generate_code()
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:>24}: {best:.3f}s -> {nodes / best:,.0f} nodes/s")
+
+if __name__ == "__main__":
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+    semantic = Semantic(Parser(Lexer(scaled_source(int(megabytes * 1024 * 1024))).get_tokens()).parse())
+    tree, deps = semantic.validate_all()
+    nodes = count_nodes(tree)
+    print(f"entrada: {megabytes} MB, {nodes} nodes")
+
+    with open(os.devnull, "w") as devnull:
+        dump = lambda message: print(message, file=devnull)
+        bench("getattr + print (antigo)", lambda: LegacyCodeGen(tree, deps, semantic.symbols, dump), nodes)
+    bench("getattr", lambda: LegacyCodeGen(tree, deps, semantic.symbols), nodes)
+    bench("tabela", lambda: CodeGen(tree, deps, semantic.symbols), nodes)
@@ -0,0 +1,36 @@
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiler import Lexer, Parser
+from compiler.incremental import IncrementalParser
+from corpus import scaled_source
+
+def full_parse(text: str) -> None:
+    lexer = Lexer(text)
+    lexer.tokenize()
+    Parser(lexer.get_tokens()).parse()
+
+def bench(kilobytes: int, edits: int = 200) -> None:
+    text = scaled_source(kilobytes * 1024)
+    start = time.perf_counter()
+    full_parse(text)
+    full = time.perf_counter() - start
+
+    front = IncrementalParser(text)
+    numbers = [match.start() for match in re.finditer(r'(?<=\+ )\d+', text)]
+    rnd = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(edits):
+        offset = rnd.choice(numbers)
+        front.edit(offset, 1, str(rnd.randrange(10)))
+    incremental = (time.perf_counter() - start) / edits
+    print(f"{kilobytes:>6} KB: parse completo {full * 1000:9.1f} ms | edicao incremental {incremental * 1000:6.3f} ms ({front.last_reparse})")
+
+if __name__ == "__main__":
+    for kilobytes in (64, 256, 1024):
+        bench(kilobytes)
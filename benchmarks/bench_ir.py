@@ -0,0 +1,42 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from compiler import Lexer, Parser, Semantic, CodeGen
+from compiler.ir import to_ssa
+from compiler.lowering import IRBuilder
+from compiler.ir_passes import PassManager
+from compiler.selector import Selector
+from compiler.OtimizadorMIPS import OtimizadorMIPS
+from mips_sim import run
+
+if __name__ == "__main__":
+    files = sys.argv[1:] or sorted(name for name in os.listdir(os.path.join(ROOT, "inputs")) if name.startswith("exemplo"))
+    totals = {}
+    for name in files:
+        path = name if os.path.exists(name) else os.path.join(ROOT, "inputs", name)
+        with open(path) as file:
+            semantic = Semantic(Parser(Lexer(file.read()).get_tokens()).parse())
+        tree, deps = semantic.validate_all()
+
+        program = IRBuilder(tree, semantic.symbols).build()
+        lowered = program.size()
+        for function in program.functions:
+            to_ssa(function)
+        in_ssa = program.size()
+        manager = PassManager()
+        stats = manager.run(program)
+        ir_output, ir = run(Selector(program).select())
+        stack_output, stack = run(OtimizadorMIPS().otimizar(CodeGen(tree, deps, semantic.symbols).generate_code()))
+        if ir_output != stack_output:
+            raise Exception(f"Different outputs for {name}: {ir_output!r} != {stack_output!r}")
+
+        print(f"{name}: IR {lowered} instrucoes, {in_ssa} em SSA, {program.size()} depois dos passes")
+        for pass_name, counters in stats.items():
+            print(f"  {pass_name:>26}: {counters['changes']} mudancas, {-counters['removed']:+} instrucoes em {counters['runs']} execucoes")
+            totals[pass_name] = totals.get(pass_name, 0) + counters["removed"]
+        print(f"  {'executado':>26}: pilha {stack['steps']} passos, {stack['loads']} lw, {stack['stores']} sw"
+              f" -> IR {ir['steps']} passos, {ir['loads']} lw, {ir['stores']} sw")
+    print("total removido por passe:", totals)
@@ -0,0 +1,68 @@
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiler import Lexer
+from compiler.types import Token
+from corpus import scaled_source
+
+LEGACY_SPECS = [
+    ("reserved", r'\b(boolean|class|extends|public|static|void|main|String|return|int|if|else|while|System\.out\.println|length|true|false|this|new|null)\b'),
+    ("identifier", r'[a-zA-Z_][a-zA-Z0-9_]*'),
+    ("number", r'\d+'),
+    ("operator", r'==|!=|<=|>=|<|>|\+|-|\*|&&|!|='),
+    ("punctuation", r'[(){}\[\];.,]'),
+    ("whitespace", r'[ \t\r\f\n]+'),
+    ("comment", r'//.*?$|/\*.*?\*/'),
+    ("mistake", r'.'),
+]
+LEGACY_REGEX = '|'.join(f"(?P<{name}>{pattern})" for name, pattern in LEGACY_SPECS)
+
+def legacy_tokenize(text: str) -> int:
+    """Lexer antigo: finditer com a alternancia de palavras reservadas e um Token por espaco"""
+    tokens = [Token(match.lastgroup, match.group()) for match in re.finditer(LEGACY_REGEX, text, re.DOTALL | re.MULTILINE)]
+    return sum(1 for token in tokens if token.token_type != "whitespace" and token.token_type != "comment")
+
+def streaming_tokenize(text: str) -> int:
+    return sum(1 for _ in Lexer(text)._generate_tokens())
+
+def buffer_tokenize(text: str) -> int:
+    lexer = Lexer(text)
+    lexer.tokenize()
+    return len(lexer.get_tokens())
+
+def token_bytes(text: str) -> None:
+    """Memoria por token: lista de Token (objeto + dict + string) contra o TokenBuffer"""
+    tracemalloc.start()
+    tokens = list(Lexer(text)._generate_tokens())
+    objects = tracemalloc.get_traced_memory()[0]
+    del tokens
+    tracemalloc.reset_peak()
+    start = tracemalloc.get_traced_memory()[0]
+    lexer = Lexer(text)
+    lexer.tokenize()
+    buffer = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    count = len(lexer.get_tokens())
+    print(f"memoria: Token {objects / count:.1f} bytes/token, TokenBuffer {buffer / count:.1f} bytes/token")
+
+def bench(name, func, text: str, repeat: int = 3) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func(text)
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:>10}: {count} tokens em {best:.3f}s -> {count / best:,.0f} tokens/s")
+
+if __name__ == "__main__":
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    text = scaled_source(int(megabytes * 1024 * 1024))
+    print(f"entrada: {len(text) / (1024 * 1024):.1f} MB")
+    bench("legado", legacy_tokenize, text)
+    bench("streaming", streaming_tokenize, text)
+    bench("buffer", buffer_tokenize, text)
+    token_bytes(text)
@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiler import Lexer, Parser, Semantic, CodeGen
+from compiler.OtimizadorMIPS import Instrucao, OtimizadorMIPS
+from corpus import scaled_source
+
+class LegacyOtimizador(OtimizadorMIPS):
+    """Como antes: cada passe analisa de novo o texto inteiro, linha a linha (e repete ate o texto parar de mudar)"""
+    def analisar_linhas(self, codigo: str) -> list:
+        instrucoes = []
+        for linha in codigo.split("\n"):
+            parsed = self.analisar_instrucao(linha)
+            instrucoes.append(parsed if parsed is not None else Instrucao("outro", original=linha))
+        return instrucoes
+
+    def otimizar(self, codigo: str) -> str:
+        self.rotulos.clear()
+        self.funcoes.clear()
+        self.analisar_programa(self.analisar_linhas(codigo))
+        for _ in range(self.max_iteracoes):
+            anterior = codigo
+            for nome in self.passes:
+                codigo = self.gerar_codigo(getattr(self, nome)(self.analisar_linhas(codigo)))
+            if codigo == anterior:
+                break
+        return codigo
+
+def assembly(lines: int) -> str:
+    """Saida do CodeGen para um programa do corpus grande o bastante para ter lines linhas"""
+    size = 100_000
+    while True:
+        semantic = Semantic(Parser(Lexer(scaled_source(size)).get_tokens()).parse())
+        tree, deps = semantic.validate_all()
+        code = CodeGen(tree, deps, semantic.symbols).generate_code()
+        if code.count("\n") >= lines:
+            return code
+        size *= 2
+
+def bench(name: str, build, code: str, lines: int, repeat: int = 3) -> str:
+    best = float("inf")
+    for _ in range(repeat):
+        otimizador = build()
+        start = time.perf_counter()
+        output = otimizador.otimizar(code)
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:>26}: {best:.3f}s -> {lines / best:,.0f} linhas/s")
+    return output
+
+if __name__ == "__main__":
+    target = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    code = assembly(target)
+    lines = code.count("\n") + 1
+    print(f"entrada: {lines} linhas de assembly")
+
+    legacy = bench("analise por passe (antigo)", LegacyOtimizador, code, lines)
+    output = bench("analise unica", OtimizadorMIPS, code, lines)
+    if output != legacy:
+        raise Exception("Optimized code differs from the per-pass parser")
+    otimizador = OtimizadorMIPS()
+    otimizador.otimizar(code)
+    for nome, estatistica in otimizador.estatisticas.items():
+        print(f"  {nome:>34}: {estatistica['execucoes']} execucoes, -{estatistica['removidas']} instrucoes"
+              f" {estatistica['por_execucao']}, {estatistica['reescritas']} reescritas")
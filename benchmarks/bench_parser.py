@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiler import Lexer, Parser
+from compiler.table_parser import TableParser
+from corpus import scaled_source
+
+def bench(name, parser_class, tokens, repeat: int = 3) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser_class(tokens).parse()
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:>10}: {best:.3f}s -> {len(tokens) / best:,.0f} tokens/s")
+
+def nesting_limit(parser_class, depth: int) -> str:
+    text = "class M { public static void main(String[] a) { " + "{" * depth + "x = 1;" + "}" * depth + " } }"
+    try:
+        parser_class(Lexer(text).get_tokens()).parse()
+        return "ok"
+    except RecursionError:
+        return "RecursionError"
+
+def expression(terms: int, shape: str) -> str:
+    if shape == "soma":
+        body = " + ".join(["x"] * terms)
+    elif shape == "misto":
+        body = " && ".join(["x * 2 + y.f(1, z[3]) < 7"] * (terms // 6))
+    else:
+        body = "(" * terms + "1" + ")" * terms
+    return "class M { public static void main(String[] a) { System.out.println(" + body + "); } }"
+
+def bench_expressions() -> None:
+    for shape in ("soma", "misto", "parenteses"):
+        for terms in (10000, 100000):
+            lexer = Lexer(expression(terms, shape))
+            lexer.tokenize()
+            tokens = lexer.get_tokens()
+            start = time.perf_counter()
+            Parser(tokens).parse()
+            elapsed = time.perf_counter() - start
+            print(f"expressao {shape} com {terms} termos: {elapsed:.3f}s ({len(tokens) / elapsed:,.0f} tokens/s)")
+
+if __name__ == "__main__":
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+    lexer = Lexer(scaled_source(int(megabytes * 1024 * 1024)))
+    lexer.tokenize()
+    tokens = lexer.get_tokens()
+    print(f"entrada: {megabytes} MB, {len(tokens)} tokens")
+    bench("recursivo", Parser, tokens)
+    bench("tabela", TableParser, tokens)
+    for depth in (500, 10000):
+        print(f"{depth} blocos aninhados: recursivo {nesting_limit(Parser, depth)}, tabela {nesting_limit(TableParser, depth)}")
+    bench_expressions()
@@ -0,0 +1,38 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from compiler import Lexer, Parser, Semantic, CodeGen
+from compiler.OtimizadorMIPS import OtimizadorMIPS
+from mips_sim import run
+
+MODES = {
+    "pilha": {},
+    "registers": {"registers": True},
+    "allocate": {"allocate": True},
+}
+WITHOUT = [name for name in OtimizadorMIPS.PASSES if name != "reducao_forca"]
+
+def generate(path: str, options: dict) -> str:
+    with open(path) as file:
+        semantic = Semantic(Parser(Lexer(file.read()).get_tokens()).parse())
+    tree, deps = semantic.validate_all()
+    return CodeGen(tree, deps, semantic.symbols, **options).generate_code()
+
+if __name__ == "__main__":
+    files = sys.argv[1:] or ["multiplicacoes.txt", "exemplo_3.txt", "exemplo_4.txt", "exemplo_6.txt"]
+    for name in files:
+        path = name if os.path.exists(name) else os.path.join(ROOT, "inputs", name)
+        print(f"{name}:  {'passos':>14} {'ciclos':>14} {'mul':>8}")
+        for mode, options in MODES.items():
+            code = generate(path, options)
+            before = OtimizadorMIPS(passes=WITHOUT).otimizar(code)
+            after = OtimizadorMIPS().otimizar(code)
+            (output_before, counters_before), (output_after, counters_after) = run(before), run(after)
+            if output_before != output_after:
+                raise Exception(f"Different outputs for {name} in mode {mode}: {output_after!r} != {output_before!r}")
+            muls = [text.count("\tmul ") for text in (before, after)]
+            print(f"  {mode:>10}: {counters_before['steps']:>6} -> {counters_after['steps']:<6}"
+                  f" {counters_before['cycles']:>6} -> {counters_after['cycles']:<6} {muls[0]:>3} -> {muls[1]}")
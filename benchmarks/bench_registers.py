@@ -0,0 +1,36 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from compiler import Lexer, Parser, Semantic, CodeGen
+from compiler.OtimizadorMIPS import OtimizadorMIPS
+from mips_sim import run
+
+MODES = {
+    "pilha": {},
+    "registers": {"registers": True},
+    "allocate": {"allocate": True},
+    "registers+allocate": {"registers": True, "allocate": True},
+}
+
+def compile_file(path: str, options: dict) -> str:
+    with open(path) as file:
+        semantic = Semantic(Parser(Lexer(file.read()).get_tokens()).parse())
+    tree, deps = semantic.validate_all()
+    return OtimizadorMIPS().otimizar(CodeGen(tree, deps, semantic.symbols, **options).generate_code())
+
+if __name__ == "__main__":
+    files = sys.argv[1:] or ["exemplo_1.txt", "exemplo_4.txt", "exemplo_6.txt"]
+    for name in files:
+        path = name if os.path.exists(name) else os.path.join(ROOT, "inputs", name)
+        results = {mode: run(compile_file(path, options)) for mode, options in MODES.items()}
+        expected = results["pilha"][0]
+        for mode, (output, _) in results.items():
+            if output != expected:
+                raise Exception(f"Different outputs for {name} in mode {mode}: {output!r} != {expected!r}")
+        print(f"{name}: saida {expected.split()}")
+        print(f"  {'':>18}  {'loads':>6} {'stores':>6} {'steps':>6}")
+        for mode, (_, counters) in results.items():
+            print(f"  {mode:>18}: {counters['loads']:>6} {counters['stores']:>6} {counters['steps']:>6}")
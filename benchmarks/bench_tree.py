@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compiler import Lexer, Parser
+from compiler.types import Node, NodeArena
+from corpus import scaled_source
+
+class LegacyNode():
+    """Node antigo: __dict__ por instancia e uma string de uuid4 como identidade"""
+    def __init__(self, label, children, type=""):
+        self.value = str(uuid.uuid4())
+        self.label = label
+        self.children = children
+        self.type = type
+
+def flatten(root: Node) -> list:
+    """(label, quantos filhos Node, folhas, tipo) em pos-ordem, para reconstruir sem recursao"""
+    order, stack = [], [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(child for child in node.children if isinstance(child, Node))
+    order.reverse()
+    return [(node.label, sum(isinstance(child, Node) for child in node.children), [child for child in node.children if not isinstance(child, Node)], node.type) for node in order]
+
+def build(shape: list, node_class) -> list:
+    stack = []
+    for label, inner, leaves, type in shape:
+        children = stack[len(stack) - inner:] if inner else []
+        del stack[len(stack) - inner:]
+        stack.append(node_class(label, children + leaves, type))
+    return stack
+
+def bench(name: str, shape: list, node_class) -> None:
+    start = time.perf_counter()
+    build(shape, node_class)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    tree = build(shape, node_class)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+    print(f"{name:>8}: {len(shape) / elapsed:,.0f} nodes/s, {size / len(shape):.1f} bytes/node")
+
+if __name__ == "__main__":
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 1
+    lexer = Lexer(scaled_source(int(megabytes * 1024 * 1024)))
+    lexer.tokenize()
+    tokens = lexer.get_tokens()
+
+    start = time.perf_counter()
+    tree = Parser(tokens).parse()
+    print(f"parse de {megabytes} MB: {time.perf_counter() - start:.3f}s")
+
+    shape = flatten(tree)
+    print(f"{len(shape)} nodes")
+    bench("uuid4", shape, LegacyNode)
+    bench("slots", shape, Node)
+
+    tracemalloc.start()
+    arena = NodeArena.from_tree(tree)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{'arena':>8}: {arena.nbytes() / len(arena):.1f} bytes/node nos arrays, {size / len(arena):.1f} bytes/node contando as folhas")
@@ -0,0 +1,35 @@
+import os
+import re
+
+INPUTS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "inputs")
+CLASS_SOURCES = ["exemplo_1.txt", "exemplo_4.txt", "exemplo_5.txt"]
+
+def read_input(name: str) -> str:
+    with open(os.path.join(INPUTS_FOLDER, name), "r") as file:
+        return file.read()
+
+def split_program(text: str) -> tuple:
+    """Separa a classe main das demais classes de um programa"""
+    second_class = [m.start() for m in re.finditer(r'^class\b', text, re.MULTILINE)][1]
+    return text[:second_class], text[second_class:]
+
+def scaled_source(target_bytes: int) -> str:
+    """Programa MiniJava valido com as classes do corpus replicadas ate target_bytes"""
+    main, _ = split_program(read_input(CLASS_SOURCES[0]))
+    bodies = []
+    for name in CLASS_SOURCES:
+        _, classes = split_program(read_input(name))
+        class_names = re.findall(r'\bclass\s+(\w+)', classes)
+        bodies.append((classes, re.compile(r'\b(' + '|'.join(class_names) + r')\b')))
+
+    parts = [main.replace("Fac()", "Fac_0_0()")]
+    size = len(parts[0])
+    i = 0
+    while size < target_bytes:
+        for k, (classes, names) in enumerate(bodies):
+            # Sufixo com a origem e a copia: exemplo_4 e exemplo_5 declaram a mesma Calculator
+            part = names.sub(lambda m: f"{m.group(1)}_{k}_{i}", classes) + "\n"
+            parts.append(part)
+            size += len(part)
+        i += 1
+    return "".join(parts)
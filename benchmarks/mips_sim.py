@@ -0,0 +1,154 @@
+import re
+import sys
+from typing import Dict, List, Tuple
+
+REGISTERS = ["$zero", "$at", "$v0", "$v1", "$a0", "$a1", "$a2", "$a3", "$t0", "$t1", "$t2", "$t3", "$t4", "$t5", "$t6", "$t7",
+             "$s0", "$s1", "$s2", "$s3", "$s4", "$s5", "$s6", "$s7", "$t8", "$t9", "$k0", "$k1", "$gp", "$sp", "$fp", "$ra"]
+INDEX = {name: i for i, name in enumerate(REGISTERS)}
+INDEX.update({f"${i}": i for i in range(32)})
+STACK_TOP = 0x7fff0000
+# Ciclos por instrucao (as outras custam 1), o mesmo modelo de CUSTOS do OtimizadorMIPS
+CYCLES = {"mul": 4}
+
+ARITHMETIC = {
+    "addiu": lambda a, b: a + b, "addi": lambda a, b: a + b, "addu": lambda a, b: a + b, "add": lambda a, b: a + b,
+    "sub": lambda a, b: a - b, "subu": lambda a, b: a - b, "mul": lambda a, b: a * b,
+    "and": lambda a, b: a & b, "andi": lambda a, b: a & b, "or": lambda a, b: a | b, "ori": lambda a, b: a | b,
+    "xor": lambda a, b: a ^ b, "xori": lambda a, b: a ^ b, "nor": lambda a, b: ~(a | b),
+    "slt": lambda a, b: int(a < b), "slti": lambda a, b: int(a < b),
+    "sltu": lambda a, b: int((a & 0xffffffff) < (b & 0xffffffff)), "sltiu": lambda a, b: int((a & 0xffffffff) < (b & 0xffffffff)),
+    "seq": lambda a, b: int(a == b), "sne": lambda a, b: int(a != b),
+    "sll": lambda a, b: a << b, "sra": lambda a, b: a >> b, "srl": lambda a, b: (a & 0xffffffff) >> b,
+}
+
+def wrap(value: int) -> int:
+    value &= 0xffffffff
+    return value - (1 << 32) if value & 0x80000000 else value
+
+def load(asm: str) -> Tuple[List[List[str]], Dict[str, int], Dict[str, int], Dict[int, int], Dict[int, str]]:
+    """Separa o assembly em instrucoes, labels e a secao .data ja posta na memoria"""
+    program, labels, data, memory, strings = [], {}, {}, {}, {}
+    pointer = 0x10010000
+    section = "text"
+    for line in asm.split("\n"):
+        line = line.split("#")[0].strip()
+        if not line or line.startswith(".globl"):
+            continue
+        if line.startswith(".data") or line.startswith(".text"):
+            section = line[1:5]
+            continue
+        if section == "data":
+            name, kind, value = re.match(r"(\w+):\s*\.(\w+)\s*(.*)", line).groups()
+            data[name] = pointer
+            if kind == "asciiz":
+                text = value.strip()[1:-1].encode().decode("unicode_escape")
+                strings[pointer] = text
+                pointer += len(text) + 1
+            else:
+                memory[pointer] = int(value or 0)
+                pointer += 4
+            pointer = (pointer + 3) & ~3
+            continue
+        while ":" in line:
+            label, line = line.split(":", 1)
+            labels[label.strip()] = len(program)
+            line = line.strip()
+        if line:
+            program.append([part for part in re.split(r"[\s,]+", line) if part])
+    return program, labels, data, memory, strings
+
+def run(asm: str, max_steps: int = 10_000_000) -> Tuple[str, Dict[str, int]]:
+    """Executa o assembly gerado (subconjunto usado pelo CodeGen) e devolve a saida e os contadores.
+
+    Os contadores sao instrucoes executadas (steps), ciclos pelo modelo de CYCLES (cycles),
+    lw (loads), sw (stores) e a maior profundidade da pilha em bytes (stack).
+    """
+    program, labels, data, memory, strings = load(asm)
+    registers = [0] * 32
+    registers[INDEX["$sp"]] = STACK_TOP
+    registers[INDEX["$gp"]] = 0x10008000
+    heap = 0x10040000
+    lowest = STACK_TOP
+    output = []
+    steps = cycles = loads = stores = 0
+    pc = labels["main"]
+
+    def value(operand: str) -> int:
+        if operand in INDEX:
+            return registers[INDEX[operand]]
+        if operand in data:
+            return data[operand]
+        return int(operand, 0)
+
+    def address(operand: str) -> int:
+        match = re.match(r"(-?\w*)\((\$\w+)\)", operand)
+        if match:
+            return registers[INDEX[match.group(2)]] + int(match.group(1) or 0)
+        return data[operand]
+
+    def write(register: str, result: int) -> None:
+        if INDEX[register]:
+            registers[INDEX[register]] = wrap(result)
+
+    while pc < len(program):
+        steps += 1
+        if steps > max_steps:
+            raise Exception(f"Step limit of {max_steps} exceeded")
+        op, *args = program[pc]
+        pc += 1
+        cycles += CYCLES.get(op, 1)
+        if op in ARITHMETIC:
+            write(args[0], ARITHMETIC[op](value(args[1]), value(args[2])))
+        elif op == "li" or op == "la" or op == "move":
+            write(args[0], value(args[1]))
+        elif op == "neg":
+            write(args[0], -value(args[1]))
+        elif op == "not":
+            write(args[0], ~value(args[1]))
+        elif op == "lw":
+            loads += 1
+            write(args[0], memory.get(address(args[1]), 0))
+        elif op == "sw":
+            stores += 1
+            memory[address(args[1])] = value(args[0])
+        elif op == "beqz" or op == "bnez":
+            if (value(args[0]) == 0) == (op == "beqz"):
+                pc = labels[args[1]]
+        elif op == "beq" or op == "bne":
+            if (value(args[0]) == value(args[1])) == (op == "beq"):
+                pc = labels[args[2]]
+        elif op == "b" or op == "j":
+            pc = labels[args[0]]
+        elif op == "jal":
+            registers[INDEX["$ra"]] = pc
+            pc = labels[args[0]]
+        elif op == "jalr":
+            registers[INDEX["$ra"]] = pc
+            pc = value(args[0])
+        elif op == "jr":
+            pc = value(args[0])
+        elif op == "nop":
+            pass
+        elif op == "syscall":
+            code = registers[INDEX["$v0"]]
+            if code == 1:
+                output.append(str(registers[INDEX["$a0"]]))
+            elif code == 4:
+                output.append(strings.get(registers[INDEX["$a0"]], ""))
+            elif code == 9:
+                registers[INDEX["$v0"]] = heap
+                heap += (registers[INDEX["$a0"]] + 3) & ~3
+            elif code == 10:
+                break
+            else:
+                raise Exception(f"Unsupported syscall {code}")
+        else:
+            raise Exception(f"Unsupported instruction {' '.join(program[pc - 1])}")
+        lowest = min(lowest, registers[INDEX["$sp"]])
+    return "".join(output), {"steps": steps, "cycles": cycles, "loads": loads, "stores": stores, "stack": STACK_TOP - lowest}
+
+if __name__ == "__main__":
+    with open(sys.argv[1]) as file:
+        output, counters = run(file.read())
+    print(output, end="")
+    print(counters)
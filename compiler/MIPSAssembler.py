@@ -1,20 +1,34 @@
-import re, os
+import re, os, sys
+from array import array
 
 class MIPSAssembler:
-    def __init__(self):
+    def __init__(self, log=print):
+        # Recebe as mensagens de erro do caminho rapido (None para so guardar em errors)
+        self.log = log
+        self.errors = []
         # R-type
         self.r_type = {
             'add': {'funct': 0x20, 'opcode': 0x0},
+            'addu': {'funct': 0x21, 'opcode': 0x0},
             'sub': {'funct': 0x22, 'opcode': 0x0},
+            'subu': {'funct': 0x23, 'opcode': 0x0},
             'mul': {'funct': 0x18, 'opcode': 0x0},
             'slt': {'funct': 0x2a, 'opcode': 0x0},
-            'jr':  {'funct': 0x08, 'opcode': 0x0}
+            'jr':  {'funct': 0x08, 'opcode': 0x0},
+            'sll': {'funct': 0x00, 'opcode': 0x0},
+            'srl': {'funct': 0x02, 'opcode': 0x0},
+            'sra': {'funct': 0x03, 'opcode': 0x0}
         }
         
         # I-type
         self.i_type = {
             'addi':  0x8,
             'addiu': 0x9,
+            'slti':  0xa,
+            'sltiu': 0xb,
+            'andi':  0xc,
+            'ori':   0xd,
+            'xori':  0xe,
             'beqz':  0x4,
             'beq':   0x4,
             'li':    0x8,
@@ -59,6 +73,7 @@ class MIPSAssembler:
         self.labels = {}
         self.current_address = 0
         self.instructions = []  # Instruções pra segunda passada
+        self.encoders = self.encoder_table()
 
     def parse_register(self, reg):
         if reg in self.registers:
@@ -130,6 +145,12 @@ class MIPSAssembler:
                 if op == 'jr':
                     rs = self.parse_register(parts[1])
                     return (self.r_type[op]['opcode'] << 26) | (rs << 21) | self.r_type[op]['funct']
+                elif op in ['sll', 'srl', 'sra']:
+                    # Deslocamento constante: sll rd, rt, shamt
+                    rd = self.parse_register(parts[1])
+                    rt = self.parse_register(parts[2])
+                    shamt = self.parse_immediate(parts[3])
+                    return (rt << 16) | (rd << 11) | ((shamt & 0x1F) << 6) | self.r_type[op]['funct']
                 else:
                     rd = self.parse_register(parts[1])
                     rs = self.parse_register(parts[2])
@@ -179,6 +200,139 @@ class MIPSAssembler:
             print(f"Erro ao fazer o assemble da instrucao '{line}': {str(e)}")
             return None
 
+    def encoder_table(self):
+        """Tabela op -> funcao(partes, endereco) que monta a palavra direto dos tokens.
+
+        Mesma codificacao do assemble_instruction, com as pseudo-instrucoes ja expandidas
+        nos formatos e os campos fixos (opcode, funct) calculados uma vez por op.
+        """
+        registers = self.registers
+        labels = self.labels
+        # Marca que a ultima palavra usou um deslocamento relativo ao endereco (nao vai para o cache)
+        self.relative = relative = [False]
+
+        def register(name):
+            number = registers.get(name)
+            if number is None:
+                raise ValueError(f"Registrador invalido: {name}")
+            return number
+
+        def immediate(text, address):
+            try:
+                return int(text, 16) if text.startswith('0x') else int(text)
+            except ValueError:
+                if text in labels:
+                    relative[0] = True
+                    return (labels[text] - address - 4) // 4
+                raise ValueError(f"Valor imediato invalido: {text}")
+
+        def r_format(funct):
+            return lambda parts, address: (register(parts[2]) << 21) | ((register(parts[3]) if len(parts) > 3 else 0) << 16) | (register(parts[1]) << 11) | funct
+
+        def shift(funct):
+            return lambda parts, address: (register(parts[2]) << 16) | (register(parts[1]) << 11) | ((immediate(parts[3], address) & 0x1F) << 6) | funct
+
+        def i_format(opcode):
+            opcode <<= 26
+            return lambda parts, address: opcode | (register(parts[2]) << 21) | (register(parts[1]) << 16) | (immediate(parts[3], address) & 0xFFFF)
+
+        def memory(opcode):
+            opcode <<= 26
+            def encode(parts, address):
+                offset_base = parts[2].replace(')', '').split('(')
+                return opcode | (register(offset_base[1]) << 21) | (register(parts[1]) << 16) | (immediate(offset_base[0], address) & 0xFFFF)
+            return encode
+
+        def jump(opcode):
+            opcode <<= 26
+            def encode(parts, address):
+                if parts[1] not in labels:
+                    raise ValueError(f"Label desconhecido: {parts[1]}")
+                return opcode | ((labels[parts[1]] >> 2) & 0x3FFFFFF)
+            return encode
+
+        table = {}
+        for op, fields in self.r_type.items():
+            table[op] = shift(fields['funct']) if op in ('sll', 'srl', 'sra') else r_format(fields['funct'])
+        table['jr'] = lambda parts, address: (register(parts[1]) << 21) | self.r_type['jr']['funct']
+        for op, opcode in self.i_type.items():
+            table[op] = memory(opcode) if op in ('lw', 'sw') else i_format(opcode)
+        beqz, li = self.i_type['beqz'] << 26, self.i_type['li'] << 26
+        table['beqz'] = lambda parts, address: beqz | (register(parts[1]) << 21) | (immediate(parts[2], address) & 0xFFFF)
+        table['li'] = lambda parts, address: li | (register(parts[1]) << 16) | (immediate(parts[2], address) & 0xFFFF)
+        for op, opcode in self.j_type.items():
+            table[op] = jump(opcode)
+        table['syscall'] = lambda parts, address: 0x0000000c
+
+        # Pseudo-instrucoes, como em pseudo_instructions
+        add, beq, addiu = self.r_type['add']['funct'], self.i_type['beq'] << 26, self.i_type['addiu'] << 26
+        table['move'] = lambda parts, address: (register(parts[2]) << 16) | (register(parts[1]) << 11) | add
+        table['b'] = lambda parts, address: beq | (immediate(parts[1], address) & 0xFFFF)
+        table['la'] = lambda parts, address: addiu | (register(parts[1]) << 16) | (immediate(parts[2], address) & 0xFFFF)
+        return table
+
+    def assemble_lines(self, lines):
+        """Caminho rapido: tokeniza cada linha uma vez, monta pela tabela e junta as palavras num array('I').
+
+        Os labels e enderecos seguem a first_pass, e as instrucoes com erro sao puladas como
+        no assemble_file, entao o resultado e o mesmo, palavra por palavra. Linhas repetidas
+        (sw $a0, 0($sp) e companhia) saem de um cache, menos as de desvio relativo a um label.
+        """
+        labels = self.labels
+        pending = []
+        address = 0
+        for line in lines:
+            line = line.strip()
+            if not line or line[0] == '.':
+                continue
+            if ':' in line:
+                labels[line.split(':')[0].strip()] = address
+            else:
+                pending.append((address, line))
+                address += 4
+
+        encoders = self.encoders
+        relative = self.relative
+        cache = {}
+        words = array('I')
+        append = words.append
+        for address, line in pending:
+            word = cache.get(line)
+            if word is not None:
+                append(word)
+                continue
+            parts = line.split('#')[0].replace(',', ' ').split()
+            op = parts[0].lower() if parts else ''
+            encoder = encoders.get(op)
+            try:
+                if encoder is None:
+                    raise ValueError(f"Instrucao desconhecida: {op}")
+                relative[0] = False
+                word = encoder(parts, address)
+            except Exception as e:
+                self.errors.append(f"Erro ao fazer o assemble da instrucao '{line}': {str(e)}")
+                if self.log is not None:
+                    self.log(self.errors[-1])
+                continue
+            if not relative[0]:
+                cache[line] = word
+            append(word)
+        return words
+
+    @staticmethod
+    def binary(words):
+        """Bytes das palavras em big-endian, com um byteswap so"""
+        if sys.byteorder == 'little':
+            words = array('I', words)
+            words.byteswap()
+        return words.tobytes()
+
+    @staticmethod
+    def write_binary(words, filename):
+        """Grava as palavras em big-endian de uma vez"""
+        with open(filename, 'wb') as f:
+            f.write(MIPSAssembler.binary(words))
+
     def assemble_file(self, filename):
         """Arquivo Assembly MIPS para codigo de maquina"""
         with open(os.path.join("./out", filename), 'r') as f:
@@ -206,9 +360,7 @@ def main():
         print(f"0x{code:08x}")
         
     # Salvando para arquivo binario
-    with open(os.path.join("./out", 'output.bin'), 'wb') as f:
-        for code in machine_code:
-            f.write(code.to_bytes(4, byteorder='big'))
+    MIPSAssembler.write_binary(array('I', machine_code), os.path.join("./out", 'output.bin'))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,264 +1,941 @@
 import re
 from collections import defaultdict
 
+SEPARADOR = re.compile(r'[\s,]+')
+REGISTRADOR = re.compile(r'\$\w+')
+
+# Escrevem só no primeiro argumento e não têm outro efeito: somem se o destino estiver morto
+DEFINEM_PRIMEIRO = {
+    'li', 'la', 'lui', 'move', 'lw', 'lb', 'lbu', 'lh', 'lhu',
+    'add', 'addu', 'addi', 'addiu', 'sub', 'subu', 'mul', 'neg', 'negu', 'not', 'abs',
+    'and', 'andi', 'or', 'ori', 'xor', 'xori', 'nor', 'sll', 'srl', 'sra', 'sllv', 'srlv', 'srav',
+    'slt', 'slti', 'sltu', 'sltiu', 'seq', 'sne', 'sge', 'sgt', 'sle', 'mfhi', 'mflo',
+}
+ARMAZENAMENTOS = {'sw', 'sb', 'sh'}
+SALTOS = {'j', 'b'}
+SALTOS_CONDICIONAIS = {'beq', 'bne', 'beqz', 'bnez', 'blt', 'bgt', 'ble', 'bge', 'bltz', 'bgtz', 'blez', 'bgez', 'bltu', 'bgtu', 'bleu', 'bgeu'}
+CHAMADAS = {'jal', 'jalr'}
+# Operações avaliadas pela propagação de constantes, todas com resultado em 32 bits com sinal
+BINARIAS = {
+    'add': lambda a, b: a + b, 'addu': lambda a, b: a + b, 'sub': lambda a, b: a - b, 'subu': lambda a, b: a - b,
+    'mul': lambda a, b: a * b, 'and': lambda a, b: a & b, 'or': lambda a, b: a | b, 'xor': lambda a, b: a ^ b,
+    'nor': lambda a, b: ~(a | b), 'slt': lambda a, b: int(a < b), 'sltu': lambda a, b: int(a % (1 << 32) < b % (1 << 32)),
+    'seq': lambda a, b: int(a == b), 'sne': lambda a, b: int(a != b), 'sge': lambda a, b: int(a >= b),
+    'sgt': lambda a, b: int(a > b), 'sle': lambda a, b: int(a <= b),
+    'sllv': lambda a, b: a << (b & 31), 'srlv': lambda a, b: (a % (1 << 32)) >> (b & 31), 'srav': lambda a, b: a >> (b & 31),
+}
+IMEDIATAS = {'addi': 'add', 'addiu': 'addu', 'andi': 'and', 'ori': 'or', 'xori': 'xor', 'slti': 'slt', 'sltiu': 'sltu',
+             'sll': 'sllv', 'srl': 'srlv', 'sra': 'srav'}
+SEM_SINAL = {'andi', 'ori', 'xori'}
+UNARIAS = {'neg': lambda a: -a, 'negu': lambda a: -a, 'not': lambda a: ~a, 'abs': abs}
+# Forma com imediato de cada operação de três registradores e se ela é comutativa
+FORMAS_IMEDIATAS = {
+    'add': ('addiu', True), 'addu': ('addiu', True), 'sub': ('addiu', False), 'subu': ('addiu', False),
+    'and': ('andi', True), 'or': ('ori', True), 'xor': ('xori', True), 'slt': ('slti', False), 'sltu': ('sltiu', False),
+    'sllv': ('sll', False), 'srlv': ('srl', False), 'srav': ('sra', False),
+}
+DESVIOS = {
+    'beq': lambda a, b: a == b, 'bne': lambda a, b: a != b, 'beqz': lambda a, b: a == b, 'bnez': lambda a, b: a != b,
+    'blt': lambda a, b: a < b, 'bgt': lambda a, b: a > b, 'ble': lambda a, b: a <= b, 'bge': lambda a, b: a >= b,
+    'bltz': lambda a, b: a < b, 'bgtz': lambda a, b: a > b, 'blez': lambda a, b: a <= b, 'bgez': lambda a, b: a >= b,
+    'bltu': lambda a, b: a % (1 << 32) < b % (1 << 32), 'bgtu': lambda a, b: a % (1 << 32) > b % (1 << 32),
+    'bleu': lambda a, b: a % (1 << 32) <= b % (1 << 32), 'bgeu': lambda a, b: a % (1 << 32) >= b % (1 << 32),
+}
+# Marca de instrução apagada nas substituições do dobramento
+REMOVER = object()
+# Modelo de custo da redução de força: ciclos por instrução, 1 para as que não estão aqui
+CUSTOS = {'mul': 4}
+
+NOMES_REGISTRADORES = {f'${i}': nome for i, nome in enumerate([
+    '$zero', '$at', '$v0', '$v1', '$a0', '$a1', '$a2', '$a3',
+    '$t0', '$t1', '$t2', '$t3', '$t4', '$t5', '$t6', '$t7',
+    '$s0', '$s1', '$s2', '$s3', '$s4', '$s5', '$s6', '$s7',
+    '$t8', '$t9', '$k0', '$k1', '$gp', '$sp', '$fp', '$ra'])}
+
+def ajustar(valor):
+    """Valor em 32 bits com sinal, como fica no registrador"""
+    valor &= 0xffffffff
+    return valor - (1 << 32) if valor & 0x80000000 else valor
+
+def cabe_16_bits(valor):
+    return -32768 <= valor <= 32767
+
+def custo(op):
+    return CUSTOS.get(op, 1)
+
+def forma_nao_adjacente(valor):
+    """Dígitos não nulos (posição, +1 ou -1) da forma não adjacente de valor > 0, do mais significativo"""
+    digitos = []
+    posicao = 0
+    while valor:
+        if valor & 1:
+            digito = 2 - (valor & 3)
+            valor -= digito
+            digitos.append((posicao, digito))
+        valor >>= 1
+        posicao += 1
+    return digitos[::-1]
+
+class Instrucao:
+    """Linha de assembly já analisada; o texto só é gerado de novo se a instrução mudar"""
+    __slots__ = ('tipo', 'op', 'args', 'rotulo', 'original')
+
+    def __init__(self, tipo, op=None, args=None, rotulo=None, original=None):
+        self.tipo = tipo
+        self.op = op
+        self.args = args if args is not None else []
+        self.rotulo = rotulo
+        self.original = original
+
+    def texto(self):
+        if self.original is not None:
+            return self.original
+        return f"\t{self.op} {', '.join(self.args)}"
+
+    def __repr__(self):
+        return self.texto().strip()
+
+class BlocoBasico:
+    """Bloco básico: índices dos rótulos e das instruções na lista, arestas e vivacidade em bits"""
+    __slots__ = ('segmento', 'rotulos', 'instrucoes', 'fechado', 'alvo', 'seguinte', 'sucessores', 'predecessores',
+                 'usa', 'define', 'entrada', 'saida')
+
+    def __init__(self, segmento):
+        self.segmento = segmento
+        self.rotulos = []
+        self.instrucoes = []
+        self.fechado = False
+        self.alvo = self.seguinte = None
+        self.sucessores = []
+        self.predecessores = []
+        self.usa = self.define = self.entrada = self.saida = 0
+
+VARIAVEL = re.compile(r'\?(\w+)')
+LITERAL, LIGACAO, COMPOSTO = range(3)
+# Registradores que as regras de janela podem usar como temporários, se o programa não os usar
+REGISTRADORES_LIVRES = ('$t9', '$t8', '$t7', '$t6', '$t5', '$t4', '$t2', '$v1')
+
+class Regra:
+    """Regra de janela (peephole): padrão, condição e substituição, todos em texto.
+
+    Cada elemento do padrão é uma instrução ('sw ?v, 0($sp)', com 'add|addu' para aceitar
+    mais de um opcode), um rótulo ('?l:') ou um trecho '...nome' de instruções quaisquer que
+    passem em aceita_meio. ?x liga o operando (ou parte dele, como em '?o(?b)') na primeira
+    ocorrência e exige o mesmo texto nas outras. A condição recebe as ligações (os trechos
+    ficam como listas em '...nome') e pode acrescentar novas; a substituição usa as mesmas.
+    """
+    def __init__(self, nome, padrao, substituicao, condicao=None, aceita_meio=None, limite_meio=16):
+        self.nome = nome
+        self.padrao = [self.compilar(elemento) for elemento in padrao]
+        self.substituicao = substituicao
+        self.condicao = condicao
+        self.aceita_meio = aceita_meio
+        self.limite_meio = limite_meio
+        self.tamanho = sum(1 for elemento in self.padrao if elemento[0] != 'meio')
+
+    @staticmethod
+    def compilar(texto):
+        if texto.startswith('...'):
+            return ('meio', texto)
+        if texto.endswith(':'):
+            return ('rotulo', texto[:-1])
+        partes = SEPARADOR.split(texto)
+        operandos = []
+        for operando in partes[1:]:
+            if '?' not in operando:
+                operandos.append((LITERAL, operando))
+            elif VARIAVEL.fullmatch(operando):
+                operandos.append((LIGACAO, operando))
+            else:
+                # Operando composto: literal com variáveis dentro, casado por regex
+                regex = ''.join(f'(?P<{parte}>[^()\\s,]+)' if k % 2 else re.escape(parte)
+                                for k, parte in enumerate(VARIAVEL.split(operando)))
+                operandos.append((COMPOSTO, re.compile(regex)))
+        return ('instrucao', set(partes[0].split('|')), operandos)
+
+    @staticmethod
+    def ligar(tipo, modelo, texto, ligacoes):
+        """Casa um operando com o modelo; devolve False se uma variável já ligada diferir"""
+        if tipo == LIGACAO:
+            anterior = ligacoes.get(modelo)
+            if anterior is None:
+                ligacoes[modelo] = texto
+                return True
+            return anterior == texto
+        if tipo == LITERAL:
+            return modelo == texto
+        casamento = modelo.fullmatch(texto)
+        if casamento is None:
+            return False
+        for nome, valor in casamento.groupdict().items():
+            if not Regra.ligar(LIGACAO, '?' + nome, valor, ligacoes):
+                return False
+        return True
+
+    def casar(self, entrada, otimizador, k=0, j=0, ligacoes=None):
+        """Tenta casar o padrão no topo da pilha de entrada; devolve (tamanho, ligações) ou None"""
+        ligacoes = {} if ligacoes is None else dict(ligacoes)
+        padrao = self.padrao
+        while j < len(padrao):
+            elemento = padrao[j]
+            if elemento[0] == 'meio':
+                return self.casar_meio(entrada, otimizador, k, j, ligacoes)
+            if k >= len(entrada):
+                return None
+            instr = entrada[-1 - k]
+            if elemento[0] == 'rotulo':
+                if instr.tipo != 'rotulo' or not self.ligar(LIGACAO, elemento[1], instr.rotulo, ligacoes):
+                    return None
+            elif instr.op not in elemento[1] or instr.tipo != 'instrucao' or len(instr.args) != len(elemento[2]):
+                return None
+            else:
+                for (tipo, modelo), arg in zip(elemento[2], instr.args):
+                    if not self.ligar(tipo, modelo, arg, ligacoes):
+                        return None
+            k += 1
+            j += 1
+        if self.condicao is None or self.condicao(ligacoes, otimizador):
+            return k, ligacoes
+        return None
+
+    def casar_meio(self, entrada, otimizador, k, j, ligacoes):
+        # Trechos do mais curto para o mais longo; só tenta continuar onde o opcode seguinte serve
+        nome = self.padrao[j][1]
+        seguinte = self.padrao[j + 1] if j + 1 < len(self.padrao) else None
+        opcodes = seguinte[1] if seguinte is not None and seguinte[0] == 'instrucao' else None
+        meio = []
+        for tamanho in range(self.limite_meio + 1):
+            if tamanho:
+                if k + tamanho > len(entrada):
+                    return None
+                instr = entrada[-k - tamanho]
+                if instr.tipo != 'instrucao' or not self.aceita_meio(instr, otimizador):
+                    return None
+                meio.append(instr)
+            if opcodes is not None and (k + tamanho >= len(entrada) or entrada[-1 - k - tamanho].op not in opcodes):
+                continue
+            ligacoes[nome] = list(meio)
+            casado = self.casar(entrada, otimizador, k + tamanho, j + 1, ligacoes)
+            if casado is not None:
+                return casado
+        return None
+
+    def substituir(self, ligacoes, otimizador):
+        novas = []
+        for texto in self.substituicao:
+            if texto.startswith('...'):
+                novas.extend(ligacoes[texto])
+                continue
+            texto = VARIAVEL.sub(lambda m: ligacoes[m.group(0)], texto)
+            if texto.endswith(':'):
+                novas.append(Instrucao('rotulo', rotulo=texto[:-1], original=texto))
+            else:
+                partes = SEPARADOR.split(texto)
+                novas.append(otimizador.reescrever(partes[0], *partes[1:]))
+        return novas
+
 class OtimizadorMIPS:
-    def __init__(self):
-        self.valores_registradores = {}
+    """Otimizador de assembly MIPS.
+
+    O código é analisado uma vez só, em uma lista de Instrucao; os passes recebem e devolvem
+    essa lista e rodam até ninguém mudar nada (ou max_iteracoes rodadas). O texto só é
+    montado no fim, e as linhas que nenhum passe tocou saem exatamente como entraram.
+    """
+    PASSES = (
+        'remover_codigo_morto',
+        'dobramento_constantes',
+        'reducao_forca',
+        'remover_operacoes_redundantes',
+        'remover_movimentacoes_redundantes',
+        'remover_instrucoes_nop',
+    )
+
+    def __init__(self, passes=None, max_iteracoes=10):
         self.registradores_usados = set()
         self.rotulos = set()
         self.referencias_rotulos = defaultdict(int)
         self.alvos_salto = set()
-        self.funcoes = set()  
-        
+        self.funcoes = set()
+        self.passes = list(passes) if passes is not None else list(self.PASSES)
+        self.max_iteracoes = max_iteracoes
+        self.estatisticas = {}
+        self.reescritas = 0
+        self.bits = {}
+        self.cache_efeitos = {}
+        self.livres = []
+        self.constantes = None
+        self.disparos = defaultdict(int)
+
     def analisar_instrucao(self, linha):
-        """Analisa uma instrução em seus componentes"""
-        linha = linha.strip()
-        if not linha or linha.startswith('#'):
+        """Analisa uma linha em um Instrucao (None para linha vazia ou comentário)"""
+        texto = linha.strip()
+        if not texto or texto.startswith('#'):
             return None
-            
-        if linha.startswith('.'):
-            return {'tipo': 'diretiva', 'original': linha}
-            
-        if ':' in linha:
-            rotulo = linha.split(':')[0].strip()
+
+        if texto.startswith('.'):
+            return Instrucao('diretiva', original=linha)
+
+        if ':' in texto:
+            rotulo = texto.split(':')[0].strip()
             self.rotulos.add(rotulo)
-            if '.' in rotulo: 
+            if '.' in rotulo:
                 self.funcoes.add(rotulo)
-            return {'tipo': 'rotulo', 'rotulo': rotulo}
-            
-        linha = linha.split('#')[0].strip()
-        if not linha:
-            return None
-            
-        partes = re.split(r'[\s,]+', linha)
-        return {
-            'tipo': 'instrucao',
-            'op': partes[0],
-            'args': partes[1:],
-            'original': linha
-        }
+            return Instrucao('rotulo', rotulo=rotulo, original=linha)
+
+        if '#' in texto:
+            texto = texto.split('#')[0].strip()
+            if not texto:
+                return None
+
+        partes = SEPARADOR.split(texto)
+        return Instrucao('instrucao', partes[0], partes[1:], original=linha)
+
+    def analisar_codigo(self, codigo):
+        """Lista de Instrucao do programa; linhas vazias e comentários ficam como 'outro'"""
+        instrucoes = []
+        # O código gerado repete muito as mesmas linhas: cada linha diferente é dividida uma vez
+        divididas = {}
+        for linha in codigo.split('\n'):
+            dividida = divididas.get(linha)
+            if dividida is not None:
+                instrucoes.append(Instrucao('instrucao', dividida.op, list(dividida.args), original=linha))
+                continue
+            parsed = self.analisar_instrucao(linha)
+            if parsed is None:
+                parsed = Instrucao('outro', original=linha)
+            elif parsed.tipo == 'instrucao':
+                divididas[linha] = parsed
+            instrucoes.append(parsed)
+        return instrucoes
+
+    def reescrever(self, op, *args):
+        """Instrução nova criada por um passe; conta como mudança para o ponto fixo"""
+        self.reescritas += 1
+        return Instrucao('instrucao', op, list(args))
+
+    def gerar_codigo(self, instrucoes):
+        return '\n'.join(filter(None, (instr.texto() for instr in instrucoes)))
 
     def otimizar(self, codigo):
         """Aplica otimizações preservando a semântica do programa"""
-        instrucoes = codigo.split('\n')
-        
+        self.rotulos.clear()
+        self.funcoes.clear()
+        instrucoes = self.analisar_codigo(codigo)
         self.analisar_programa(instrucoes)
-        
-        instrucoes = self.remover_codigo_morto(instrucoes)
-        instrucoes = self.dobramento_constantes(instrucoes)
-        instrucoes = self.reducao_forca(instrucoes)
-        instrucoes = self.remover_operacoes_redundantes(instrucoes)
-        instrucoes = self.remover_movimentacoes_redundantes(instrucoes)
-        instrucoes = self.remover_instrucoes_nop(instrucoes)
-        
-        return '\n'.join(filter(None, instrucoes))
+        instrucoes = self.executar_passes(instrucoes)
+        self.constantes = None
+        return self.gerar_codigo(instrucoes)
+
+    def executar_passes(self, instrucoes):
+        """Roda os passes até um ponto fixo.
+
+        estatisticas guarda, por passe, quantas vezes rodou, quantas instruções removeu (no
+        total e em cada execução) e quantas reescreveu; um passe mudou algo quando remove
+        instruções ou cria alguma com reescrever. Um passe que não mudou nada só roda de novo
+        depois que outro mudar o código.
+        """
+        self.estatisticas = {nome: {'execucoes': 0, 'removidas': 0, 'reescritas': 0, 'por_execucao': []} for nome in self.passes}
+        versao = 0
+        sem_mudanca = {}
+        for _ in range(self.max_iteracoes):
+            mudou = False
+            for nome in self.passes:
+                if sem_mudanca.get(nome) == versao:
+                    continue
+                self.reescritas = 0
+                novas = getattr(self, nome)(instrucoes)
+                estatistica = self.estatisticas[nome]
+                estatistica['execucoes'] += 1
+                estatistica['removidas'] += len(instrucoes) - len(novas)
+                estatistica['reescritas'] += self.reescritas
+                estatistica['por_execucao'].append(len(instrucoes) - len(novas))
+                if self.reescritas > 0 or len(novas) != len(instrucoes):
+                    versao += 1
+                    mudou = True
+                else:
+                    sem_mudanca[nome] = versao
+                instrucoes = novas
+            if not mudou:
+                break
+        return instrucoes
 
     def analisar_programa(self, instrucoes):
         """Analisa estrutura do programa para identificar funções e fluxo de controle"""
-        self.rotulos.clear()
         self.referencias_rotulos.clear()
         self.alvos_salto.clear()
-        self.funcoes.clear()
-        
+
         for instr in instrucoes:
-            parsed = self.analisar_instrucao(instr)
-            if not parsed:
-                continue
-                
-            if parsed['tipo'] == 'rotulo':
-                if '.' in parsed['rotulo']:  
-                    self.funcoes.add(parsed['rotulo'])
-            elif parsed['tipo'] == 'instrucao':
-                op = parsed['op']
-                args = parsed['args']
-                
-                if op in ['j', 'jal', 'beq', 'bne', 'beqz', 'bnez']:
-                    if len(args) > 0:
-                        target = args[-1]
+            if instr.tipo == 'rotulo':
+                if '.' in instr.rotulo:
+                    self.funcoes.add(instr.rotulo)
+            elif instr.tipo == 'instrucao':
+                if instr.op in ['j', 'jal', 'beq', 'bne', 'beqz', 'bnez']:
+                    if len(instr.args) > 0:
+                        target = instr.args[-1]
                         self.referencias_rotulos[target] += 1
                         self.alvos_salto.add(target)
 
-    def remover_codigo_morto(self, instrucoes):
-        """Remove código morto preservando funções e fluxo de controle"""
-        codigo_vivo = []
-        em_funcao = False
-        funcao_atual = None
-        
-        for instr in instrucoes:
-            parsed = self.analisar_instrucao(instr)
-            if not parsed:
-                codigo_vivo.append(instr)
-                continue
-                
-            if parsed['tipo'] == 'diretiva':
-                codigo_vivo.append(instr)
-                continue
-                
-            if parsed['tipo'] == 'rotulo':
-                rotulo = parsed['rotulo']
-                if rotulo in self.funcoes or rotulo == 'main':
-                    em_funcao = True
-                    funcao_atual = rotulo
-                codigo_vivo.append(instr)
+        self.livres = self.registradores_livres(instrucoes)
+
+    def registradores_livres(self, instrucoes):
+        """Registradores de REGISTRADORES_LIVRES que o código não cita em lugar nenhum"""
+        argumentos = {arg for instr in instrucoes if instr.args for arg in instr.args}
+        usados = {NOMES_REGISTRADORES.get(nome, nome) for arg in argumentos for nome in REGISTRADOR.findall(arg)}
+        return [registrador for registrador in REGISTRADORES_LIVRES if registrador not in usados]
+
+    def registradores(self, args):
+        """Máscara de bits dos registradores citados nos argumentos ($zero fica de fora)"""
+        mascara = 0
+        for arg in args:
+            if '$' not in arg:
                 continue
-                
-            if em_funcao or parsed['tipo'] == 'instrucao' and parsed['op'] in ['jal', 'jr', 'syscall']:
-                codigo_vivo.append(instr)
-                if parsed['op'] == 'jr' and parsed['args'][0] == '$ra':
-                    em_funcao = False
-                    funcao_atual = None
-                
-        return codigo_vivo
+            for nome in REGISTRADOR.findall(arg):
+                nome = NOMES_REGISTRADORES.get(nome, nome)
+                if nome == '$zero':
+                    continue
+                bit = self.bits.get(nome)
+                if bit is None:
+                    bit = self.bits[nome] = 1 << len(self.bits)
+                mascara |= bit
+        return mascara
 
-    def remover_operacoes_redundantes(self, instrucoes):
-        """Remove operações redundantes como multiplicação por 1 e adição com 0"""
-        otimizado = []
-        i = 0
-        
-        while i < len(instrucoes):
-            if i + 2 >= len(instrucoes):  # Se não houver instruções suficientes para formar o padrão
-                otimizado.append(instrucoes[i])
-                i += 1
+    def efeitos(self, instr):
+        """(registradores definidos, registradores lidos) de uma instrução; -1 é "todos".
+
+        Chamadas, retornos e instruções desconhecidas leem todos os registradores: quem chama
+        ou quem é chamado pode depender de qualquer um deles.
+        """
+        chave = instr.texto()
+        efeitos = self.cache_efeitos.get(chave)
+        if efeitos is None:
+            efeitos = self.cache_efeitos[chave] = self.calcular_efeitos(instr.op, instr.args)
+        return efeitos
+
+    def calcular_efeitos(self, op, args):
+        if op in DEFINEM_PRIMEIRO:
+            return self.registradores(args[:1]), self.registradores(args[1:])
+        if op in SALTOS_CONDICIONAIS or op in SALTOS or op in ARMAZENAMENTOS:
+            return 0, self.registradores(args)
+        if op == 'syscall':
+            return self.registradores(['$v0']), self.registradores(['$v0', '$a0', '$a1', '$a2', '$a3'])
+        if op in CHAMADAS:
+            return self.registradores(['$ra']), -1
+        return 0, -1
+
+    def construir_blocos(self, instrucoes):
+        """Divide a seção .text em blocos básicos e liga o grafo de fluxo.
+
+        Um bloco começa em um rótulo (rótulos seguidos ficam no mesmo bloco) ou depois de um
+        salto e termina em salto, desvio ou jr; só cai no seguinte dentro do mesmo segmento.
+        """
+        blocos = []
+        por_rotulo = {}
+        atual = None
+        segmento = 0
+        em_texto = not any(instr.tipo == 'diretiva' and instr.texto().split()[0] == '.text' for instr in instrucoes)
+        for i, instr in enumerate(instrucoes):
+            if instr.tipo == 'diretiva':
+                diretiva = instr.texto().split()[0]
+                if diretiva == '.text' or diretiva == '.data':
+                    em_texto = diretiva == '.text'
+                    segmento += 1
+                    atual = None
                 continue
-                
-            instr1 = self.analisar_instrucao(instrucoes[i])
-            instr2 = self.analisar_instrucao(instrucoes[i+1])
-            instr3 = self.analisar_instrucao(instrucoes[i+2])
-            
-            # Se alguma das instruções não for válida, continue normalmente
-            if not instr1 or not instr2 or not instr3:
-                otimizado.append(instrucoes[i])
-                i += 1
+            if not em_texto or (instr.tipo != 'rotulo' and instr.tipo != 'instrucao'):
                 continue
-                
-            # Verifica se é um padrão de multiplicação por 1
-            if (instr1['tipo'] == 'instrucao' and instr1['op'] == 'li' and
-                instr2['tipo'] == 'instrucao' and instr2['op'] == 'lw' and
-                instr3['tipo'] == 'instrucao' and instr3['op'] == 'mul'):
-                
-                # Verifica se está carregando 1 e multiplicando pelo valor carregado
-                if (len(instr1['args']) == 2 and instr1['args'][1] == '1' and
-                    len(instr3['args']) == 3 and
-                    (instr3['args'][2] == instr1['args'][0] or instr3['args'][1] == instr1['args'][0])):
-                    
-                    # Mantém apenas o lw, ajustando o registrador de destino
-                    novo_lw = f"lw {instr3['args'][0]}, {instr2['args'][1]}"
-                    otimizado.append(novo_lw)
-                    i += 3
+            if atual is None or atual.fechado or (instr.tipo == 'rotulo' and atual.instrucoes):
+                atual = BlocoBasico(segmento)
+                blocos.append(atual)
+            if instr.tipo == 'rotulo':
+                atual.rotulos.append(i)
+                por_rotulo[instr.rotulo] = atual
+                # "rotulo: instrucao" na mesma linha conta como instrução desconhecida
+                if instr.texto().split(':', 1)[1].split('#')[0].strip():
+                    atual.instrucoes.append(i)
+                continue
+            atual.instrucoes.append(i)
+            atual.fechado = instr.op in SALTOS or instr.op in SALTOS_CONDICIONAIS or instr.op == 'jr'
+
+        for k, bloco in enumerate(blocos):
+            seguinte = blocos[k + 1] if k + 1 < len(blocos) and blocos[k + 1].segmento == bloco.segmento else None
+            ultima = instrucoes[bloco.instrucoes[-1]] if bloco.instrucoes else None
+            if ultima is not None and (ultima.op in SALTOS or ultima.op in SALTOS_CONDICIONAIS):
+                bloco.alvo = por_rotulo.get(ultima.args[-1]) if ultima.args else None
+                if bloco.alvo is not None:
+                    bloco.sucessores.append(bloco.alvo)
+            if seguinte is not None and (ultima is None or (ultima.op not in SALTOS and ultima.op != 'jr')):
+                bloco.seguinte = seguinte
+                bloco.sucessores.append(seguinte)
+        return blocos, por_rotulo
+
+    def raizes(self, instrucoes, blocos, por_rotulo):
+        """Blocos por onde a execução pode entrar: começo de segmento, main, funções e rótulos citados"""
+        raizes = [bloco for k, bloco in enumerate(blocos) if k == 0 or blocos[k - 1].segmento != bloco.segmento]
+        raizes.extend(por_rotulo[rotulo] for rotulo in self.funcoes | {'main'} if rotulo in por_rotulo)
+        for instr in instrucoes:
+            # O rótulo citado é sempre o último argumento (jal f, la $a0, f, lw $t0, f)
+            if instr.tipo == 'instrucao' and instr.args and instr.args[-1] in por_rotulo and instr.op not in SALTOS and instr.op not in SALTOS_CONDICIONAIS:
+                raizes.append(por_rotulo[instr.args[-1]])
+        return raizes
+
+    def remover_codigo_morto(self, instrucoes):
+        """Remove blocos inalcançáveis e definições de registrador que ninguém lê.
+
+        Os blocos alcançáveis partem do começo de cada segmento .text, de main, dos rótulos
+        de função e de todo rótulo citado fora de um salto (jal, la). A vivacidade é a
+        análise para trás de sempre, com máscaras de bits e worklist sobre o grafo de blocos;
+        $sp e $fp ficam sempre vivos.
+        """
+        blocos, por_rotulo = self.construir_blocos(instrucoes)
+        if not blocos:
+            return instrucoes
+
+        alcancaveis = set()
+        pilha = self.raizes(instrucoes, blocos, por_rotulo)
+        while pilha:
+            bloco = pilha.pop()
+            if id(bloco) not in alcancaveis:
+                alcancaveis.add(id(bloco))
+                pilha.extend(bloco.sucessores)
+        todos = blocos
+        blocos = [bloco for bloco in blocos if id(bloco) in alcancaveis]
+
+        efeitos = {}
+        for bloco in blocos:
+            usa = define = 0
+            for i in bloco.instrucoes:
+                definidos, lidos = efeitos[i] = self.efeitos(instrucoes[i])
+                usa |= lidos & ~define
+                define |= definidos
+            bloco.usa, bloco.define = usa, define
+        for bloco in blocos:
+            for sucessor in bloco.sucessores:
+                sucessor.predecessores.append(bloco)
+
+        pendentes = set(map(id, blocos))
+        trabalho = list(blocos)
+        while trabalho:
+            bloco = trabalho.pop()
+            pendentes.discard(id(bloco))
+            saida = 0
+            for sucessor in bloco.sucessores:
+                saida |= sucessor.entrada
+            # Sem sucessor e sem jr no fim: cai fora do programa, tudo fica vivo
+            if not bloco.sucessores and not (bloco.instrucoes and instrucoes[bloco.instrucoes[-1]].op == 'jr'):
+                saida = -1
+            bloco.saida = saida
+            entrada = bloco.usa | (saida & ~bloco.define)
+            if entrada != bloco.entrada:
+                bloco.entrada = entrada
+                for predecessor in bloco.predecessores:
+                    if id(predecessor) not in pendentes:
+                        pendentes.add(id(predecessor))
+                        trabalho.append(predecessor)
+
+        # $sp e $fp delimitam a pilha (o MIPS não tem zona vermelha): ajustá-los nunca é morto
+        pilha_quadro = self.registradores(['$sp', '$fp'])
+        mortas = set()
+        for bloco in blocos:
+            vivos = bloco.saida
+            for i in reversed(bloco.instrucoes):
+                definidos, lidos = efeitos[i]
+                if definidos and not definidos & (vivos | pilha_quadro) and instrucoes[i].op in DEFINEM_PRIMEIRO:
+                    mortas.add(i)
                     continue
-                    
-            # Verifica se é um padrão de adição com 0
-            if (instr1['tipo'] == 'instrucao' and instr1['op'] == 'li' and
-                instr2['tipo'] == 'instrucao' and instr2['op'] == 'lw' and
-                instr3['tipo'] == 'instrucao' and instr3['op'] == 'add'):
-                
-                # Verifica se está carregando 0 e somando com o valor carregado
-                if (len(instr1['args']) == 2 and instr1['args'][1] == '0' and
-                    len(instr3['args']) == 3 and
-                    (instr3['args'][2] == instr1['args'][0] or instr3['args'][1] == instr1['args'][0])):
-                    
-                    # Mantém apenas o lw, ajustando o registrador de destino
-                    novo_lw = f"lw {instr3['args'][0]}, {instr2['args'][1]}"
-                    otimizado.append(novo_lw)
-                    i += 3
+                vivos = (vivos & ~definidos) | lidos
+
+        # Dados, diretivas e comentários não estão em bloco nenhum e ficam sempre
+        removidas = set(mortas)
+        for bloco in todos:
+            if id(bloco) not in alcancaveis:
+                removidas.update(bloco.rotulos)
+                removidas.update(bloco.instrucoes)
+        if not removidas:
+            return instrucoes
+        return [instr for i, instr in enumerate(instrucoes) if i not in removidas]
+
+    def remover_operacoes_redundantes(self, instrucoes):
+        """Aplica as regras de janela (REGRAS) até nenhuma casar.
+
+        A entrada é uma pilha: quando uma regra casa, a substituição e as últimas instruções
+        já emitidas voltam para a pilha e são examinadas de novo, então uma reescrita pode
+        habilitar outra sem esperar a próxima rodada.
+        """
+        por_opcode = defaultdict(list)
+        for regra in REGRAS:
+            primeiro = regra.padrao[0]
+            for op in (primeiro[1] if primeiro[0] == 'instrucao' else [None]):
+                por_opcode[op].append(regra)
+        recuo = max(regra.tamanho for regra in REGRAS) - 1
+        # Toda regra encurta o código ou o deixa numa forma que ela não casa de novo; o limite é só garantia
+        limite = 4 * len(instrucoes) + 100
+
+        entrada = instrucoes[::-1]
+        saida = []
+        while entrada:
+            instr = entrada[-1]
+            for regra in por_opcode.get(instr.op, ()):
+                casado = regra.casar(entrada, self) if limite > 0 else None
+                if casado is None:
                     continue
-            
-            otimizado.append(instrucoes[i])
-            i += 1
-            
-        return otimizado    
-    
-    def dobramento_constantes(self, instrucoes):
-        """Realiza dobramento de constantes"""
-        otimizado = []
-        self.valores_registradores.clear()
-        
+                tamanho, ligacoes = casado
+                limite -= 1
+                self.disparos[regra.nome] += 1
+                del entrada[len(entrada) - tamanho:]
+                entrada.extend(reversed(regra.substituir(ligacoes, self)))
+                voltam = min(recuo, len(saida))
+                if voltam:
+                    entrada.extend(reversed(saida[-voltam:]))
+                    del saida[-voltam:]
+                break
+            else:
+                saida.append(entrada.pop())
+        return saida
+
+    def menciona(self, instrucoes, *registradores):
+        """Se alguma das instruções lê ou escreve algum dos registradores"""
+        mascara = self.registradores(registradores)
         for instr in instrucoes:
-            parsed = self.analisar_instrucao(instr)
-            if not parsed or parsed['tipo'] != 'instrucao':
-                otimizado.append(instr)
+            definidos, lidos = self.efeitos(instr)
+            if (definidos | lidos) & mascara:
+                return True
+        return False
+
+    def define(self, instrucoes, *registradores):
+        mascara = self.registradores(registradores)
+        return any(self.efeitos(instr)[0] & mascara for instr in instrucoes)
+
+    def valor(self, arg, estado):
+        """Valor conhecido de um operando (registrador ou imediato) antes da instrução, ou None"""
+        if arg.startswith('$'):
+            nome = NOMES_REGISTRADORES.get(arg, arg)
+            return 0 if nome == '$zero' else estado.get(nome)
+        try:
+            return int(arg, 0)
+        except ValueError:
+            return None
+
+    def avaliar(self, op, args, estado):
+        """Resultado constante de uma instrução de DEFINEM_PRIMEIRO, ou None"""
+        if op == 'li' or op == 'move':
+            return self.valor(args[1], estado) if len(args) == 2 else None
+        if op == 'lui':
+            valor = self.valor(args[1], estado) if len(args) == 2 else None
+            return None if valor is None else ajustar(valor << 16)
+        if op in UNARIAS and len(args) == 2:
+            valor = self.valor(args[1], estado)
+            return None if valor is None else ajustar(UNARIAS[op](valor))
+        operacao = BINARIAS.get(IMEDIATAS.get(op, op))
+        if operacao is None or len(args) != 3:
+            return None
+        a, b = self.valor(args[1], estado), self.valor(args[2], estado)
+        if a is None or b is None:
+            return None
+        if op in SEM_SINAL:
+            b &= 0xffff
+        return ajustar(operacao(a, b))
+
+    def transferir(self, instr, estado):
+        """Atualiza os valores conhecidos depois da instrução"""
+        op = instr.op
+        if op in DEFINEM_PRIMEIRO:
+            destino = NOMES_REGISTRADORES.get(instr.args[0], instr.args[0])
+            if destino == '$zero':
+                return
+            valor = self.avaliar(op, instr.args, estado)
+            if valor is None:
+                estado.pop(destino, None)
+            else:
+                estado[destino] = valor
+        elif op == 'syscall':
+            estado.pop('$v0', None)
+        elif op not in ARMAZENAMENTOS and op not in SALTOS and op not in SALTOS_CONDICIONAIS:
+            # Chamada ou instrução desconhecida: qualquer registrador pode ter mudado
+            estado.clear()
+
+    def decidir(self, instr, estado):
+        """True/False se o desvio condicional tem resultado conhecido, senão None"""
+        comparacao = DESVIOS.get(instr.op)
+        if comparacao is None:
+            return None
+        operandos = instr.args[:-1]
+        if len(operandos) == 1:
+            operandos.append('$zero')
+        valores = [self.valor(arg, estado) for arg in operandos]
+        if len(valores) != 2 or None in valores:
+            return None
+        return comparacao(*valores)
+
+    def simplificar(self, instr, estado):
+        """Instrução equivalente mais barata dados os valores conhecidos antes dela, ou None"""
+        op, args = instr.op, instr.args
+        if op in SALTOS_CONDICIONAIS:
+            decisao = self.decidir(instr, estado)
+            if decisao is None:
+                return None
+            return self.reescrever('b', args[-1]) if decisao else REMOVER
+        if op not in DEFINEM_PRIMEIRO or op == 'li' or NOMES_REGISTRADORES.get(args[0], args[0]) == '$zero':
+            return None
+        valor = self.avaliar(op, args, estado)
+        if valor is not None:
+            return self.reescrever('li', args[0], str(valor)) if cabe_16_bits(valor) else None
+        if len(args) != 3 or op not in FORMAS_IMEDIATAS:
+            return None
+
+        # Um operando conhecido vira imediato: add/sub -> addiu (ou move com 0), slt -> slti...
+        esquerda, direita = self.valor(args[1], estado), self.valor(args[2], estado)
+        imediata, comutativa = FORMAS_IMEDIATAS[op]
+        registrador = args[1]
+        if direita is None and comutativa and esquerda is not None:
+            direita, registrador = esquerda, args[2]
+        if direita is None:
+            return None
+        if op in ('sub', 'subu'):
+            direita = -direita
+        if direita == 0 and op in ('add', 'addu', 'sub', 'subu', 'or', 'xor'):
+            return self.reescrever('move', args[0], registrador)
+        if op in ('sllv', 'srlv', 'srav'):
+            direita &= 31
+        elif op in ('and', 'or', 'xor'):
+            if not 0 <= direita <= 0xffff:
+                return None
+        elif not cabe_16_bits(direita):
+            return None
+        return self.reescrever(imediata, args[0], registrador, str(direita))
+
+    def propagar_constantes(self, instrucoes, blocos, por_rotulo):
+        """Valores conhecidos na entrada de cada bloco executável (por id do bloco).
+
+        Cada bloco começa com o encontro (meet) dos valores que chegam pelas arestas já
+        executáveis; um desvio com resultado conhecido só libera a aresta tomada.
+        """
+        entradas = {}
+        trabalho = []
+        for raiz in self.raizes(instrucoes, blocos, por_rotulo):
+            if id(raiz) not in entradas:
+                entradas[id(raiz)] = {}
+                trabalho.append(raiz)
+        pendentes = set(map(id, trabalho))
+
+        while trabalho:
+            bloco = trabalho.pop()
+            pendentes.discard(id(bloco))
+            estado = dict(entradas[id(bloco)])
+            decisao = None
+            for i in bloco.instrucoes:
+                instr = instrucoes[i]
+                if instr.op in SALTOS_CONDICIONAIS:
+                    decisao = self.decidir(instr, estado)
+                self.transferir(instr, estado)
+            if decisao is None:
+                sucessores = bloco.sucessores
+            else:
+                sucessores = [sucessor for sucessor in (bloco.alvo if decisao else bloco.seguinte,) if sucessor is not None]
+            for sucessor in sucessores:
+                anterior = entradas.get(id(sucessor))
+                if anterior is None:
+                    novo = dict(estado)
+                else:
+                    novo = {registrador: valor for registrador, valor in anterior.items() if estado.get(registrador) == valor}
+                if novo != anterior and id(sucessor) not in pendentes:
+                    pendentes.add(id(sucessor))
+                    trabalho.append(sucessor)
+                entradas[id(sucessor)] = novo
+        return entradas
+
+    def dobramento_constantes(self, instrucoes):
+        """Propagação de constantes condicional sobre o grafo de blocos.
+
+        No fim, cada instrução com valor conhecido vira li, um operando conhecido vira imediato
+        e os desvios decididos viram b ou somem (o bloco que ficou sem entrada sai no
+        remover_codigo_morto).
+        """
+        blocos, por_rotulo = self.construir_blocos(instrucoes)
+        if not blocos:
+            return instrucoes
+        entradas = self.propagar_constantes(instrucoes, blocos, por_rotulo)
+
+        novas = {}
+        fatores = {}
+        for bloco in blocos:
+            if id(bloco) not in entradas:
                 continue
-                
-            if parsed['op'] == 'li' and len(parsed['args']) == 2:
-                try:
-                    valor = int(parsed['args'][1])
-                    self.valores_registradores[parsed['args'][0]] = valor
-                except ValueError:
-                    pass
-                    
-            if len(parsed['args']) > 0:
-                self.valores_registradores.pop(parsed['args'][0], None)
-                
-            otimizado.append(instr)
-            
-        return otimizado
+            estado = dict(entradas[id(bloco)])
+            for i in bloco.instrucoes:
+                instr = instrucoes[i]
+                nova = self.simplificar(instr, estado)
+                if nova is not None:
+                    novas[i] = nova
+                elif instr.op == 'mul':
+                    fatores[id(instr)] = dict(estado)
+                self.transferir(instr, estado)
+        saida = instrucoes
+        if novas:
+            saida = [novas.get(i, instr) for i, instr in enumerate(instrucoes) if novas.get(i) is not REMOVER]
+        # A redução de força vem logo depois e reaproveita os valores conhecidos antes de cada mul
+        self.constantes = (saida, fatores)
+        return saida
 
     def reducao_forca(self, instrucoes):
-        """Aplica redução de força em operações aritméticas"""
+        """Troca multiplicações por constante por deslocamentos e somas quando o modelo de custo diz que compensa.
+
+        A constante pode ser o imediato ou um registrador com valor provado pela mesma propagação
+        do dobramento_constantes (o CodeGen sempre carrega a constante com li antes do mul). Também
+        vira sll o add que dobra um registrador, e deslocamentos seguidos do mesmo registrador se
+        juntam: a escala de índice do CodeGen (add $a0, $a0, $a0 duas vezes) fica um sll só.
+        """
+        novas = {}
+        multiplicacoes = [i for i, instr in enumerate(instrucoes) if instr.op == 'mul' and len(instr.args) == 3]
+        if multiplicacoes:
+            if self.constantes is not None and self.constantes[0] is instrucoes:
+                fatores = self.constantes[1]
+            else:
+                fatores = self.valores_antes(instrucoes, {id(instrucoes[i]) for i in multiplicacoes})
+            # Os livres da análise inicial podem já estar em uso por outras reescritas
+            livres = self.registradores_livres(instrucoes)
+            for i in multiplicacoes:
+                estado = fatores.get(id(instrucoes[i]))
+                if estado is None:
+                    continue
+                sequencia = self.multiplicacao(instrucoes[i].args, estado, livres)
+                if sequencia is not None:
+                    novas[i] = sequencia
+
         otimizado = []
-        
-        for instr in instrucoes:
-            parsed = self.analisar_instrucao(instr)
-            if not parsed or parsed['tipo'] != 'instrucao':
-                otimizado.append(instr)
-                continue
-                
-            op = parsed['op']
-            args = parsed['args']
-            
-            if op == 'mul' and len(args) == 3:
-                try:
-                    value = int(args[2])
-                    if value > 0 and (value & (value - 1)) == 0: 
-                        shift = value.bit_length() - 1
-                        otimizado.append(f"sll {args[0]}, {args[1]}, {shift}")
-                        continue
-                except ValueError:
-                    pass
-                    
-            otimizado.append(instr)
-            
+        for i, instr in enumerate(instrucoes):
+            for nova in novas.get(i, (instr,)):
+                if nova.tipo != 'instrucao' or len(nova.args) != 3:
+                    otimizado.append(nova)
+                    continue
+                if nova.op in ('add', 'addu') and nova.args[1] == nova.args[2]:
+                    nova = self.reescrever('sll', nova.args[0], nova.args[1], '1')
+                anterior = otimizado[-1] if otimizado else None
+                if (nova.op == 'sll' and anterior is not None and anterior.tipo == 'instrucao' and anterior.op == 'sll'
+                        and nova.args[0] == nova.args[1] == anterior.args[0]
+                        and nova.args[2].isdigit() and anterior.args[2].isdigit()
+                        and int(nova.args[2]) + int(anterior.args[2]) < 32):
+                    total = int(nova.args[2]) + int(anterior.args[2])
+                    otimizado[-1] = self.reescrever('sll', anterior.args[0], anterior.args[1], str(total))
+                    continue
+                otimizado.append(nova)
         return otimizado
 
+    def valores_antes(self, instrucoes, alvos):
+        """Valores conhecidos antes de cada instrução de alvos (por id) que é executável"""
+        blocos, por_rotulo = self.construir_blocos(instrucoes)
+        if not blocos:
+            return {}
+        entradas = self.propagar_constantes(instrucoes, blocos, por_rotulo)
+        valores = {}
+        for bloco in blocos:
+            if id(bloco) not in entradas:
+                continue
+            estado = dict(entradas[id(bloco)])
+            for i in bloco.instrucoes:
+                if id(instrucoes[i]) in alvos:
+                    valores[id(instrucoes[i])] = dict(estado)
+                self.transferir(instrucoes[i], estado)
+        return valores
+
+    def multiplicacao(self, args, estado, livres):
+        """Sequência de sll/addu/subu para mul com um operando conhecido, se custar menos que o mul"""
+        destino, esquerda, direita = args
+        constante, fonte = self.valor(direita, estado), esquerda
+        if constante is None:
+            constante, fonte = self.valor(esquerda, estado), direita
+        if constante is None or not fonte.startswith('$'):
+            return None
+        constante = ajustar(constante)
+        if constante == 0:
+            return [self.reescrever('li', destino, '0')]
+
+        digitos = forma_nao_adjacente(abs(constante))
+        acumulador = destino
+        if len(digitos) > 1 and NOMES_REGISTRADORES.get(destino, destino) == NOMES_REGISTRADORES.get(fonte, fonte):
+            # Horner lê a fonte depois de escrever o acumulador: precisa de um registrador livre
+            if not livres:
+                return None
+            acumulador = livres[0]
+
+        # Horner a partir do dígito mais significativo: acc = (acc << distância) ± fonte
+        sequencia = []
+        atual, origem = digitos[0][0], fonte
+        for posicao, digito in digitos[1:]:
+            sequencia.append(['sll', acumulador, origem, str(atual - posicao)])
+            sequencia.append(['addu' if digito > 0 else 'subu', acumulador, acumulador, fonte])
+            atual, origem = posicao, acumulador
+        if atual:
+            sequencia.append(['sll', acumulador, origem, str(atual)])
+            origem = acumulador
+        if constante < 0:
+            sequencia.append(['subu', acumulador, '$zero', origem])
+        elif not sequencia:
+            sequencia.append(['move', acumulador, origem])
+        sequencia[-1][1] = destino
+
+        if sum(custo(op) for op, *_ in sequencia) >= custo('mul'):
+            return None
+        return [self.reescrever(*instr) for instr in sequencia]
+
     def remover_movimentacoes_redundantes(self, instrucoes):
         """Remove movimentações redundantes preservando contexto"""
-        otimizado = []
-        
-        for instr in instrucoes:
-            parsed = self.analisar_instrucao(instr)
-            if not parsed or parsed['tipo'] != 'instrucao':
-                otimizado.append(instr)
-                continue
-                
-            if parsed['op'] == 'move' and len(parsed['args']) == 2:
-                if parsed['args'][0] == parsed['args'][1]:
-                    continue
-                    
-            otimizado.append(instr)
-            
-        return otimizado
+        return [instr for instr in instrucoes
+                if not (instr.tipo == 'instrucao' and instr.op == 'move' and len(instr.args) == 2 and instr.args[0] == instr.args[1])]
 
     def remover_instrucoes_nop(self, instrucoes):
         """Remove instruções sem efeito preservando estrutura do programa"""
-        otimizado = []
-        
-        for instr in instrucoes:
-            parsed = self.analisar_instrucao(instr)
-            if not parsed or parsed['tipo'] != 'instrucao':
-                otimizado.append(instr)
-                continue
-                
-            op = parsed['op']
-            args = parsed['args']
-            
-            if op == 'add' and len(args) == 3 and args[2] == '$zero' and args[0] == args[1]:
-                continue
-            if op == 'sub' and len(args) == 3 and args[2] == '$zero' and args[0] == args[1]:
-                continue
-                
-            otimizado.append(instr)
-            
-        return otimizado
+        return [instr for instr in instrucoes
+                if not (instr.tipo == 'instrucao' and instr.op in ('add', 'sub') and len(instr.args) == 3 and
+                        instr.args[2] == '$zero' and instr.args[0] == instr.args[1])]
+
+def sem_pilha(instr, otimizador):
+    """Instrução de trecho que não mexe na pilha nem desvia"""
+    if instr.op not in DEFINEM_PRIMEIRO and instr.op not in ARMAZENAMENTOS:
+        return False
+    definidos, lidos = otimizador.efeitos(instr)
+    return not (definidos | lidos) & otimizador.registradores(['$sp'])
+
+def sem_memoria(instr, otimizador):
+    """Instrução de trecho que só escreve registradores (sem sw, chamada ou desvio)"""
+    return instr.op in DEFINEM_PRIMEIRO
+
+def desempilhar_em_registrador(ligacoes, otimizador):
+    # O valor empilhado vai direto para ?d se o trecho não usa ?d; senão para um registrador livre
+    meio = ligacoes['...meio']
+    if not otimizador.menciona(meio, ligacoes['?d']):
+        ligacoes['?r'] = ligacoes['?d']
+        return True
+    for registrador in otimizador.livres:
+        if registrador != ligacoes['?v'] and not otimizador.menciona(meio, registrador):
+            ligacoes['?r'] = registrador
+            return True
+    return False
+
+def mesmo_endereco(ligacoes, otimizador):
+    # Nada no trecho muda o valor guardado nem a base do endereço
+    return (ligacoes['?x'] != ligacoes['?b'] and
+            not otimizador.define(ligacoes['...meio'], ligacoes['?x'], ligacoes['?b']))
+
+REGRAS = [
+    # O CodeGen empilha o operando da esquerda e desempilha em $t1 depois de calcular o da direita
+    Regra('empilhar_desempilhar',
+          ['sw ?v, 0($sp)', 'addiu $sp, $sp, -4', '...meio', 'lw ?d, 4($sp)', '...uso', 'addiu $sp, $sp, 4'],
+          ['move ?r, ?v', '...meio', 'move ?d, ?r', '...uso'],
+          desempilhar_em_registrador, sem_pilha),
+    Regra('carregar_depois_de_guardar', ['sw ?x, ?o(?b)', '...meio', 'lw ?y, ?o(?b)'],
+          ['sw ?x, ?o(?b)', '...meio', 'move ?y, ?x'], mesmo_endereco, sem_memoria),
+    Regra('carregar_de_novo', ['lw ?x, ?o(?b)', '...meio', 'lw ?y, ?o(?b)'],
+          ['lw ?x, ?o(?b)', '...meio', 'move ?y, ?x'], mesmo_endereco, sem_memoria),
+    Regra('copia_de_copia', ['move ?b, ?a', 'move ?c, ?b'], ['move ?b, ?a', 'move ?c, ?a'],
+          lambda ligacoes, otimizador: ligacoes['?a'] != ligacoes['?b']),
+    Regra('copia_para_si', ['move ?a, ?a'], []),
+    Regra('salto_para_o_seguinte', ['b|j ?l', '?l:'], ['?l:']),
+    # Multiplicação por 1 e soma com 0 de um valor recém-carregado viram cópia
+    Regra('multiplicar_por_um', ['li ?k, 1', 'lw ?d, ?m', 'mul ?r, ?d, ?k'], ['li ?k, 1', 'lw ?d, ?m', 'move ?r, ?d'],
+          lambda ligacoes, otimizador: ligacoes['?k'] != ligacoes['?d']),
+    Regra('somar_zero', ['li ?k, 0', 'lw ?d, ?m', 'add ?r, ?d, ?k'], ['li ?k, 0', 'lw ?d, ?m', 'move ?r, ?d'],
+          lambda ligacoes, otimizador: ligacoes['?k'] != ligacoes['?d']),
+]
 
 def main():
     with open('output_code.txt', 'r') as f:
@@ -266,12 +943,12 @@ def main():
 
     otimizador = OtimizadorMIPS()
     codigo_otimizado = otimizador.otimizar(codigo)
-    
+
     print("Código MIPS Otimizado:")
     print(codigo_otimizado)
-    
+
     with open('codigo_otimizado.txt', 'w') as f:
         f.write(codigo_otimizado)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
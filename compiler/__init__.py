@@ -1,4 +1,9 @@
 from .lexer import *
 from .parser import *
+from .hierarchy import *
+from .symbols import *
+from .typecheck import *
 from .semantic import *
-from .codegen import *
\ No newline at end of file
+from .codegen import *
+from .incremental import *
+from .pipeline import *
\ No newline at end of file
@@ -1,10 +1,41 @@
+from typing import Callable, Dict, Tuple
 from .types import Node
+from .symbols import SymbolTable
+from .regalloc import LinearScan
+from .ir import to_ssa
+from .lowering import IRBuilder
+from .ir_passes import PassManager
+from .selector import Selector
 import re
 
 class CodeGen():
-    def __init__(self, tree: Node, deps: list) -> None:
+    # Tabela label -> assemble_<label>, montada uma vez por classe (subclasses tem a propria)
+    _dispatch_tables: Dict[type, Dict[str, Callable]] = {}
+
+    # Temporarios do modo registers; $t0 e $t1 ja sao usados pelas rotinas de array e de expressao
+    REGISTER_POOL: Tuple[str, ...] = ("$s0", "$s1", "$s2", "$s3", "$s4", "$s5", "$s6", "$s7")
+    # Com allocate e registers juntos, quantos registradores do inicio do pool ficam para as expressoes
+    EXPRESSION_REGISTERS = 3
+    BINARY_INSTRUCTIONS: Dict[str, str] = {"+": "add", "-": "sub", "*": "mul", "<": "slt", "==": "seq", "!=": "sne", "&&": "and"}
+
+    def __init__(self, tree: Node, deps: list, symbols: SymbolTable = None, log: Callable[[str], None] = None, registers: bool = False, allocate: bool = False, ir: bool = False) -> None:
         self.tree = tree
         self.deps = deps
+        self.symbols = symbols if symbols is not None else SymbolTable(tree)
+        self.log = log # recebe mensagens de depuracao, ex.: log=print
+        self.dispatch = self.dispatch_table()
+        # Modo registers: expressoes avaliadas em REGISTER_POOL (Sethi-Ullman) em vez de empilhar cada operando
+        self.registers = registers
+        self.register_depth = 0
+        self.register_labels: Dict[int, Tuple[int, bool]] = {}
+        # Modo allocate: locais e parametros escalares em registradores do pool (linear scan), salvos pelo proprio metodo
+        self.allocate = allocate
+        # Juntos, o pool se divide: temporarios salvos por quem chama, variaveis salvas pelo metodo chamado
+        self.temporaries: Tuple[str, ...] = self.REGISTER_POOL[:self.EXPRESSION_REGISTERS] if registers and allocate else self.REGISTER_POOL
+        # Modo ir: AST -> IR em SSA -> passes -> Selector; registers e allocate nao se aplicam
+        self.ir = ir
+        self.ir_program = None
+        self.ir_stats: Dict[str, Dict[str, int]] = {}
         self.data_section = ['newline: .asciiz "\\n"']
         self.text_section = []
         self.additional_section = []
@@ -14,11 +45,10 @@ class CodeGen():
         self.current_scope_max_offset_params = {}
         self.current_scope_max_offset = {}
         self.global_label_counter = 0
-        self.arrays = {}
-        self.arrays_size = {}
-        self.next_array_register = 3
 
     def generate_code(self) -> str:
+        if self.ir:
+            return self.generate_ir_code()
         self._cgen(self.tree)
         main_index = next((i for i, line in enumerate(self.text_section) if line.strip() == "main:"), None)
         if main_index is not None:
@@ -29,14 +59,28 @@ class CodeGen():
         additional = "\n".join(self.additional_section)
         return f".data\n{data}\n.text\n.globl main\n{text}\n\n{additional}"
 
+    def generate_ir_code(self) -> str:
+        self.ir_program = IRBuilder(self.tree, self.symbols).build()
+        for function in self.ir_program.functions:
+            to_ssa(function)
+        self.ir_stats = PassManager().run(self.ir_program)
+        return Selector(self.ir_program).select()
+
     def yield_error(self, message: str, tree: Node) -> None:
         self.text_section.append(f"# ERROR: {message} @ {tree}")
 
+    @classmethod
+    def dispatch_table(cls) -> Dict[str, Callable]:
+        table = CodeGen._dispatch_tables.get(cls)
+        if table is None:
+            table = {name[len("assemble_"):]: getattr(cls, name) for name in dir(cls) if name.startswith("assemble_") and callable(getattr(cls, name))}
+            CodeGen._dispatch_tables[cls] = table
+        return table
+
     def _cgen(self, tree: Node) -> None:
-        if hasattr(self, f"assemble_{tree.label}"):
-            func = getattr(self, f"assemble_{tree.label}")
-            if callable(func):
-                func(tree)
+        func = self.dispatch.get(tree.label)
+        if func is not None:
+            func(self, tree)
         else:
             self.yield_error(f"assemble_{tree.label} function not found", tree)
 
@@ -76,6 +120,8 @@ class CodeGen():
         for child in tree.children[1::2]:
             name = child.children[0]
             if len(self.current_scope.split('.')) > 1:
+                if isinstance(self.variable_location(name), str):
+                    continue
                 self.current_scope_max_offset[self.current_scope] -= 4
                 offset = self.current_scope_max_offset[self.current_scope]
                 self.variables[self.current_scope.split('.')[0]][self.current_scope.split('.')[1]][name] = offset
@@ -90,8 +136,12 @@ class CodeGen():
         for child in tree.children[1::2]:
             name = child.children[0]
             offset = 4 + (i * 4)
-            self.variables[self.current_scope.split('.')[0]][self.current_scope.split('.')[1]][name] = offset
-            self.text_section.append(f"\tlw $a0, {offset}($fp)")
+            register = self.variable_location(name)
+            if isinstance(register, str):
+                self.text_section.append(f"\tlw {register}, {offset}($fp)")
+            else:
+                self.variables[self.current_scope.split('.')[0]][self.current_scope.split('.')[1]][name] = offset
+                self.text_section.append(f"\tlw $a0, {offset}($fp)")
             i += 1
 
     def assemble_METODO(self, tree: Node) -> None:
@@ -100,23 +150,39 @@ class CodeGen():
         self.current_scope = f"{self.current_scope}.{metodo_name}"
         self.current_scope_max_offset_params[self.current_scope] = 0
         self.current_scope_max_offset[self.current_scope] = -8
+        saved = self.allocate_registers(tree) if self.allocate else []
         
         self.text_section.append(f"{self.current_scope}:")
         self.text_section.append("\tsw $fp, 0($sp)")
         self.text_section.append("\tmove $fp, $sp")
         self.text_section.append("\tsw $ra, -4($sp)")
-        self.text_section.append("\taddiu $sp, $sp, -12")
+        for i, register in enumerate(saved):
+            self.text_section.append(f"\tsw {register}, {-12 - 4 * i}($fp)")
+        self.text_section.append(f"\taddiu $sp, $sp, {-12 - 4 * len(saved)}")
+        self.current_scope_max_offset[self.current_scope] -= 4 * len(saved)
 
         for child in tree.children[2:]:
             self._cgen(child)
 
         self.text_section.append("\tmove $v0, $a0")
+        for i, register in enumerate(saved):
+            self.text_section.append(f"\tlw {register}, {-12 - 4 * i}($fp)")
         self.text_section.append("\tlw $ra, -4($fp)")
         self.text_section.append("\tmove $sp, $fp")
         self.text_section.append("\tlw $fp, 0($fp)")
         self.text_section.append("\tjr $ra")
         self.current_scope = f"{self.current_scope.split('.')[0]}"
 
+    def allocate_registers(self, tree: Node) -> list:
+        """Roda o linear scan do metodo e devolve os registradores que o prologo precisa salvar"""
+        scope = self.current_scope.split('.')
+        candidates = [symbol.name for symbol in self.symbols.scope(scope[0], scope[1]).symbols.values()]
+        pool = self.REGISTER_POOL[self.EXPRESSION_REGISTERS:] if self.registers else self.REGISTER_POOL
+        allocation = LinearScan(tree, candidates, pool[::-1]).run()
+        self.variables[scope[0]][scope[1]].update(allocation)
+        used = set(allocation.values())
+        return [register for register in self.REGISTER_POOL if register in used]
+
     def assemble_CMD(self, tree: Node) -> None:
         if tree.children[0].label == "System.out.println":
             self._cgen(tree.children[0].children[0])
@@ -159,37 +225,27 @@ class CodeGen():
             self._cgen(tree.children[0].children[1])
             self.text_section.append(f"\tb while{cnt1}")
             self.text_section.append(f"end_while{cnt2}:")
-        elif len(tree.children) == 3 and tree.children[2].type == "array_init":
-            self._cgen(tree.children[2].children[2])
-            self.arrays[tree.children[0].children[0]] = self.next_array_register
-            self.next_array_register += 1
-            self.text_section.append(f"\tmove $t0, $a0")
-            self.text_section.append("\tadd $a0, $a0, $a0")
-            self.text_section.append("\tadd $a0, $a0, $a0")
-            self.text_section.append("\tli $v0, 9")
-            self.text_section.append("\tsyscall")
-            self.text_section.append(f"\tmove $t{self.arrays[tree.children[0].children[0]]}, $v0")
-            self.text_section.append("\tsw $t0, 0($v0)")
         elif len(tree.children) == 4 and tree.type == "array_assign":
-            base = self.arrays[tree.children[0].children[0]]
+            # Deslocamento do elemento na pilha enquanto o valor e calculado; a base vem depois
             self._cgen(tree.children[1])
-            self.text_section.append("\tadd $a0, $a0, $a0")
-            self.text_section.append("\tadd $a0, $a0, $a0")
-            self.text_section.append("\taddiu $a0, $a0, 4")
+            self.text_section.append("\tsll $a0, $a0, 2")
             self.text_section.append("\tsw $a0, 0($sp)")
             self.text_section.append("\taddiu $sp, $sp, -4")
             self._cgen(tree.children[3])
             self.text_section.append("\tlw $t0, 4($sp)")
             self.text_section.append("\taddiu $sp, $sp, 4")
-            self.text_section.append(f"\tadd $t1, $t0, $t{base}")
-            self.text_section.append("\tsw $a0, 0($t1)")
+            self.text_section.append(f"\tadd $t0, $t0, {self.array_base(tree.children[0], '$t1')}")
+            self.text_section.append("\tsw $a0, 4($t0)")
         elif tree.children[0].label == "identifier" and len(tree.children) == 3:
             self._cgen(tree.children[2])
             name = tree.children[0].children[0]
             scope = self.current_scope.split('.')
             if len(scope) > 1:
                 offset = self.variables[scope[0]][scope[1]][name]
-                self.text_section.append(f"\tsw $a0, {offset}($fp)")
+                if isinstance(offset, str):
+                    self.text_section.append(f"\tmove {offset}, $a0")
+                else:
+                    self.text_section.append(f"\tsw $a0, {offset}($fp)")
             else:
                 self.text_section.append(f"\tsw $a0, {self.variables[self.current_scope][name]}")
         
@@ -198,7 +254,10 @@ class CodeGen():
         scope_to_use = self.current_scope if self.instancescope == None else self.instancescope
         
         if len(scope_to_use.split('.')) > 1:
-            if name in self.variables[scope_to_use.split('.')[0]][scope_to_use.split('.')[1]]:
+            location = self.variable_location(name)
+            if isinstance(location, str):
+                self.text_section.append(f"\tmove $a0, {location}")
+            elif name in self.variables[scope_to_use.split('.')[0]][scope_to_use.split('.')[1]]:
                 self.text_section.append(f"\tlw $a0, {self.variables[scope_to_use.split('.')[0]][scope_to_use.split('.')[1]][name]}($fp)")
             else:
                 self.yield_error(f"Variable {name} not found in scope {scope_to_use}", tree)
@@ -209,8 +268,17 @@ class CodeGen():
                 self.yield_error(f"Variable {name} not found in scope {scope_to_use}", tree)
 
     def assemble_SEXP(self, tree: Node) -> None:
-        # PRECISA FAZER CASOS ONDE É UM ARRAY, MAIS UM ELIF
-        if tree.children[0].label == "boolean":
+        if tree.type == "array_init":
+            # Tamanho na primeira palavra, elementos a partir de 4(base): n + 1 palavras no heap
+            self._cgen(tree.children[2])
+            self.text_section.append("\tmove $t0, $a0")
+            self.text_section.append("\tsll $a0, $a0, 2")
+            self.text_section.append("\taddiu $a0, $a0, 4")
+            self.text_section.append("\tli $v0, 9")
+            self.text_section.append("\tsyscall")
+            self.text_section.append("\tsw $t0, 0($v0)")
+            self.text_section.append("\tmove $a0, $v0")
+        elif tree.children[0].label == "boolean":
             val = 1 if tree.children[0].children[0].lower() == "true" else 0
             self.text_section.append(f"\tli $a0, {val}")
         elif tree.children[0].label == "number":
@@ -218,10 +286,19 @@ class CodeGen():
             self.text_section.append(f"\tli $a0, {val}")
         elif tree.children[0].children[0] == "null":
             self.text_section.append("\tmove $a0, $zero")
+        elif tree.type == "unary":
+            self._cgen(tree.children[1])
+            if tree.children[0].children[0] == "-":
+                self.text_section.append("\tsub $a0, $zero, $a0")
+            else:
+                self.text_section.append("\tli $t1, 1")
+                self.text_section.append("\tsub $a0, $t1, $a0")
         else:
             self._cgen(tree.children[0])
 
     def assemble_AEXP(self, tree: Node) -> None:
+        if self.registers:
+            return self.assemble_register_expression(tree)
         self._cgen(tree.children[0])
         self.text_section.append("\tsw $a0, 0($sp)")
         self.text_section.append("\taddiu $sp, $sp, -4")
@@ -234,6 +311,8 @@ class CodeGen():
         self.text_section.append("\taddiu $sp, $sp, 4")
 
     def assemble_MEXP(self, tree: Node) -> None:
+        if self.registers:
+            return self.assemble_register_expression(tree)
         self._cgen(tree.children[0])
         self.text_section.append("\tsw $a0, 0($sp)")
         self.text_section.append("\taddiu $sp, $sp, -4")
@@ -249,6 +328,8 @@ class CodeGen():
             self._cgen(child)
 
     def assemble_EXP(self, tree: Node) -> None:
+        if self.registers:
+            return self.assemble_register_expression(tree)
         self._cgen(tree.children[0])
         self.text_section.append("\tsw $a0, 0($sp)")
         self.text_section.append("\taddiu $sp, $sp, -4")
@@ -258,24 +339,21 @@ class CodeGen():
         self.text_section.append("\taddiu $sp, $sp, 4")
 
     def assemble_PEXP(self, tree: Node) -> None:
-        print(f"DEBUG: PEXP node structure: {tree}")
+        if self.log is not None:
+            self.log(f"DEBUG: PEXP node structure: {tree}")
         if tree.type == "array_length":
-            base = self.arrays[tree.children[0].children[0]]
-            self.text_section.append(f"\tlw $a0, 0($t{base})")
+            self.text_section.append(f"\tlw $a0, 0({self.array_base(tree.children[0], '$t0')})")
             return
 
         if tree.type == "method_call":
-            whereweat = None
+            whereweat = tree.children[0].dtype # classe do alvo, calculada pelo TypeChecker
             funcname = tree.children[1].children[0]
-            if len(tree.children[0].children) == 1:  # caso this
+            if whereweat is None and len(tree.children[0].children) == 1:  # caso this
                 whereweat = self.current_scope.split('.')[0]
-                funcname = tree.children[1].children[0]
-            else:  # caso new
+            elif whereweat is None:  # caso new
                 whereweat = tree.children[0].children[1].children[0]
-            path = f"{whereweat}.{funcname}"
-            
-            self.text_section.append("\tsw $a0, 0($sp)")
-            self.text_section.append("\taddiu $sp, $sp, -4")
+            signature = self.symbols.signature(whereweat, funcname)
+            path = signature.label if signature is not None else f"{whereweat}.{funcname}"
             
             for child in tree.children[-1].children[::-1]:
                 self._cgen(child)
@@ -288,21 +366,24 @@ class CodeGen():
                 self.text_section.append(f"\taddiu $sp, $sp, {4 * len(tree.children[-1].children)}")
             
             self.text_section.append("\tmove $a0, $v0")
-            
-            self.text_section.append("\tlw $t1, 4($sp)")
-            self.text_section.append("\taddiu $sp, $sp, 4")
-            self.text_section.append("\tsw $t1, 0($sp)")
-            self.text_section.append("\taddiu $sp, $sp, -4")
             return
 
-        if tree.children[0].label == "identifier" and len(tree.children) == 2:
-            base = self.arrays[tree.children[0].children[0]]
-            self._cgen(tree.children[1])
-            self.text_section.append("\tadd $a0, $a0, $a0")
-            self.text_section.append("\tadd $a0, $a0, $a0")
-            self.text_section.append("\taddiu $a0, $a0, 4")
-            self.text_section.append(f"\tadd $t0, $a0, $t{base}")
-            self.text_section.append("\tlw $a0, 0($t0)")
+        if tree.type == "array_access":
+            if self.array_location(tree.children[0]) is not None:
+                self._cgen(tree.children[1])
+                base = self.array_base(tree.children[0], "$t0")
+            else:
+                # Base calculada por uma expressao: fica na pilha enquanto o indice e calculado
+                self._cgen(tree.children[0])
+                self.text_section.append("\tsw $a0, 0($sp)")
+                self.text_section.append("\taddiu $sp, $sp, -4")
+                self._cgen(tree.children[1])
+                self.text_section.append("\tlw $t0, 4($sp)")
+                self.text_section.append("\taddiu $sp, $sp, 4")
+                base = "$t0"
+            self.text_section.append("\tsll $a0, $a0, 2")
+            self.text_section.append(f"\tadd $t0, $a0, {base}")
+            self.text_section.append("\tlw $a0, 4($t0)")
             return
         
         if len(tree.children) == 1:
@@ -310,6 +391,8 @@ class CodeGen():
             return
 
     def assemble_REXP(self, tree: Node) -> None:
+        if self.registers:
+            return self.assemble_register_expression(tree)
         self._cgen(tree.children[0])
         self.text_section.append("\tsw $a0, 0($sp)")
         self.text_section.append("\taddiu $sp, $sp, -4")
@@ -325,6 +408,135 @@ class CodeGen():
             self.text_section.append("\tsne $a0, $t1, $a0")
         self.text_section.append("\taddiu $sp, $sp, 4")
 
+    def assemble_register_expression(self, tree: Node) -> None:
+        self.text_section.append(f"\tmove $a0, {self.register_gen(tree)}")
+
+    def register_operands(self, node: Node) -> list:
+        """Operandos que o modo registers avalia por conta propria; o resto vira folha via _cgen"""
+        if node.label in ("EXP", "REXP", "AEXP", "MEXP"):
+            return [node.children[0], node.children[2]]
+        if node.label == "SEXP" and node.type == "unary":
+            return [node.children[1]]
+        if node.label == "PEXP" and not node.type and len(node.children) == 1 and node.children[0].label != "reserved":
+            return [node.children[0]]
+        return []
+
+    def label_registers(self, root: Node) -> Tuple[int, bool]:
+        """Rotula (registradores necessarios, contem chamada) em pos-ordem, uma vez por node"""
+        labels = self.register_labels
+        stack = [(root, False)]
+        while stack:
+            node, ready = stack.pop()
+            if node.id in labels:
+                continue
+            if not ready:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children if isinstance(child, Node) and child.id not in labels)
+                continue
+            calls = node.type == "method_call" or any(labels[child.id][1] for child in node.children if isinstance(child, Node))
+            operands = self.register_operands(node)
+            if len(operands) == 2:
+                left, right = labels[operands[0].id][0], labels[operands[1].id][0]
+                need = left + 1 if left == right else max(left, right)
+            elif operands:
+                need = labels[operands[0].id][0]
+            else:
+                need = 1
+            labels[node.id] = (need, calls)
+        return labels[root.id]
+
+    def left_first(self, left: Node, right: Node) -> bool:
+        # Chamadas podem ter efeitos colaterais (e o outro lado pode ler memoria que elas escrevem):
+        # com chamada em qualquer lado fica a ordem do fonte
+        left_need, left_calls = self.label_registers(left)
+        right_need, right_calls = self.label_registers(right)
+        if left_calls or right_calls:
+            return True
+        return left_need >= right_need
+
+    def register_gen(self, node: Node) -> str:
+        depth = self.register_depth
+        target = self.temporaries[depth]
+        operands = self.register_operands(node)
+
+        if len(operands) == 2:
+            left, right = operands
+            first, second = (left, right) if self.left_first(left, right) else (right, left)
+            a = self.register_gen(first)
+            if depth + 1 < len(self.temporaries):
+                self.register_depth += 1
+                b = self.register_gen(second)
+                self.register_depth -= 1
+            else:
+                # Sem registrador livre: o primeiro operando vai para a pilha
+                self.text_section.append(f"\tsw {a}, 0($sp)")
+                self.text_section.append("\taddiu $sp, $sp, -4")
+                b = self.register_gen(second)
+                self.text_section.append("\tlw $t1, 4($sp)")
+                self.text_section.append("\taddiu $sp, $sp, 4")
+                a = "$t1"
+            first_reg, second_reg = (a, b) if first is left else (b, a)
+            self.text_section.append(f"\t{self.BINARY_INSTRUCTIONS[node.children[1].children[0]]} {target}, {first_reg}, {second_reg}")
+        elif node.label == "SEXP" and node.type == "unary":
+            operand = self.register_gen(operands[0])
+            if node.children[0].children[0] == "-":
+                self.text_section.append(f"\tsub {target}, $zero, {operand}")
+            else:
+                self.text_section.append("\tli $t1, 1")
+                self.text_section.append(f"\tsub {target}, $t1, {operand}")
+        elif operands:
+            return self.register_gen(operands[0])
+        elif node.label == "SEXP" and node.children[0].label == "number":
+            self.text_section.append(f"\tli {target}, {node.children[0].children[0]}")
+        elif node.label == "SEXP" and node.children[0].label in ("boolean", "reserved") and node.children[0].children[0].lower() in ("true", "false"):
+            self.text_section.append(f"\tli {target}, {1 if node.children[0].children[0].lower() == 'true' else 0}")
+        elif node.label == "identifier" and isinstance(self.variable_location(node.children[0]), str):
+            return self.variable_location(node.children[0])
+        elif node.label == "identifier" and self.variable_location(node.children[0]) is not None:
+            self.text_section.append(f"\tlw {target}, {self.variable_location(node.children[0])}($fp)")
+        else:
+            self.register_leaf(node, target)
+        return target
+
+    def register_leaf(self, node: Node, target: str) -> None:
+        """Folha avaliada pelo gerador de pilha em $a0; registradores vivos sao salvos se houver chamada"""
+        live = self.temporaries[:self.register_depth] if self.label_registers(node)[1] else ()
+        for i, register in enumerate(live):
+            self.text_section.append(f"\tsw {register}, {-4 * i}($sp)")
+        if live:
+            self.text_section.append(f"\taddiu $sp, $sp, {-4 * len(live)}")
+        self._cgen(node)
+        if live:
+            self.text_section.append(f"\taddiu $sp, $sp, {4 * len(live)}")
+        for i, register in enumerate(live):
+            self.text_section.append(f"\tlw {register}, {-4 * i}($sp)")
+        self.text_section.append(f"\tmove {target}, $a0")
+
+    def array_location(self, node: Node):
+        """Slot ou registrador quando o array e uma variavel do metodo, senao None"""
+        return self.variable_location(node.children[0]) if node.label == "identifier" else None
+
+    def array_base(self, node: Node, scratch: str) -> str:
+        """Registrador com o ponteiro do array: o da variavel alocada, scratch carregado do slot
+        ou $a0 com o valor de outra expressao"""
+        location = self.array_location(node)
+        if isinstance(location, str):
+            return location
+        if location is None:
+            self._cgen(node)
+            return "$a0"
+        self.text_section.append(f"\tlw {scratch}, {location}($fp)")
+        return scratch
+
+    def variable_location(self, name: str):
+        """Offset em $fp (int) ou registrador alocado (str) da variavel no escopo atual"""
+        scope = (self.current_scope if self.instancescope == None else self.instancescope).split('.')
+        variables = self.variables.get(scope[0], {})
+        if len(scope) > 1:
+            variables = variables.get(scope[1], {})
+        location = variables.get(name)
+        return location if isinstance(location, (int, str)) else None
+
     def assemble_RETURN(self, tree: Node) -> None:
         self._cgen(tree.children[0])
         self.text_section.append("\tmove $v0, $a0")
\ No newline at end of file
@@ -0,0 +1,110 @@
+from collections import defaultdict, deque
+from typing import Dict, List, Tuple
+from .types import Node
+
+class ClassLayout():
+    """Layout de uma classe: guarda so os membros proprios e aponta para o layout do pai"""
+    def __init__(self, name: str, node: Node, parent: 'ClassLayout' = None) -> None:
+        self.name = name
+        self.node = node
+        self.parent = parent
+        self.depth: int = parent.depth + 1 if parent is not None else 0
+        # Offsets em bytes dos campos proprios, continuando depois dos campos herdados
+        self.fields: Dict[str, int] = {}
+        self.methods: Dict[str, Node] = {}
+        base = parent.size if parent is not None else 0
+        for member in node.children[2:]:
+            if member.label == "VAR":
+                self.fields[member.children[1].children[0]] = base + 4 * len(self.fields)
+            elif member.label == "METODO":
+                self.methods[member.children[1].children[0]] = member
+        self.size: int = base + 4 * len(self.fields)
+
+    def field_offset(self, name: str) -> int:
+        layout = self
+        while layout is not None:
+            if name in layout.fields:
+                return layout.fields[name]
+            layout = layout.parent
+        return None
+
+    def method_owner(self, name: str) -> 'ClassLayout':
+        layout = self
+        while layout is not None:
+            if name in layout.methods:
+                return layout
+            layout = layout.parent
+        return None
+
+    def __repr__(self) -> str:
+        return f"ClassLayout({self.name}, size={self.size})"
+
+class ClassHierarchy():
+    """Indice da heranca montado uma vez a partir de (classe, pai, node).
+
+    A ordem e a mesma do Semantic.topological_sort (pais antes dos filhos, em largura);
+    is_subclass compara intervalos de entrada/saida de uma DFS e roda em O(1).
+    """
+    def __init__(self, classes: List[Tuple[str, str, Node]]) -> None:
+        self.layouts: Dict[str, ClassLayout] = {}
+        self.parents: Dict[str, str] = {}
+        self.order: List[str] = []
+        self.enter: Dict[str, int] = {}
+        self.exit: Dict[str, int] = {}
+
+        nodes = {}
+        for name, extends, node in classes:
+            if name in nodes:
+                raise Exception(f"Class {name} declared more than once")
+            nodes[name] = node
+            self.parents[name] = extends
+        children = defaultdict(list)
+        for name, extends, _ in classes:
+            if extends is not None and extends not in nodes:
+                raise Exception(f"Class {name} extends undeclared class {extends}")
+            children[extends].append(name)
+
+        queue = deque(children[None])
+        while queue:
+            name = queue.popleft()
+            parent = self.parents[name]
+            self.layouts[name] = ClassLayout(name, nodes[name], self.layouts[parent] if parent is not None else None)
+            self.order.append(name)
+            queue.extend(children[name])
+
+        if len(self.order) != len(nodes):
+            self.raise_cycle(next(name for name in nodes if name not in self.layouts))
+        self.number(children)
+
+    def raise_cycle(self, start: str) -> None:
+        # Toda classe fora da ordem tem pai declarado e nunca chega numa raiz, entao subir pelos pais fecha um ciclo
+        seen = {}
+        path = []
+        name = start
+        while name not in seen:
+            seen[name] = len(path)
+            path.append(name)
+            name = self.parents[name]
+        cycle = path[seen[name]:] + [name]
+        raise Exception(f"Cyclic inheritance: {' -> '.join(cycle)}")
+
+    def number(self, children: Dict[str, List[str]]) -> None:
+        clock = 0
+        stack = [(name, False) for name in reversed(children[None])]
+        while stack:
+            name, done = stack.pop()
+            if done:
+                self.exit[name] = clock
+                continue
+            self.enter[name] = clock
+            clock += 1
+            stack.append((name, True))
+            stack.extend((child, False) for child in reversed(children[name]))
+
+    def is_subclass(self, name: str, ancestor: str) -> bool:
+        if name not in self.enter or ancestor not in self.enter:
+            return name == ancestor
+        return self.enter[ancestor] <= self.enter[name] and self.exit[name] <= self.exit[ancestor]
+
+    def layout(self, name: str) -> ClassLayout:
+        return self.layouts.get(name)
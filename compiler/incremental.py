@@ -0,0 +1,201 @@
+from array import array
+from bisect import bisect_left
+from typing import List, Tuple
+from .types import Node, TokenBuffer
+from .lexer import Lexer
+from .parser import Parser
+
+class SourceUnit():
+    """Trecho do fonte que corresponde a um filho de PROG (MAIN ou CLASSE), com tokens em offsets locais"""
+    def __init__(self, tokens: TokenBuffer, node: Node, spans: dict, first: int = 0) -> None:
+        self.source = tokens.source
+        self.tokens = tokens
+        self.node = node
+        self.children: List[Node] = list(node.children)
+        # [indice do filho, primeiro token, fim] de cada METODO, relativos ao primeiro token da unidade
+        self.methods: List[List[int]] = [[i, spans[child.id][0] - first, spans[child.id][1] - first] for i, child in enumerate(self.children) if isinstance(child, Node) and child.label == "METODO"]
+
+class OffsetTree():
+    """Arvore de Fenwick com o tamanho de cada unidade: acha a unidade de um offset e desloca as seguintes em O(log n)"""
+    def __init__(self, sizes: List[int]) -> None:
+        self.size = len(sizes)
+        self.tree = [0] + list(sizes)
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+
+    def add(self, k: int, delta: int) -> None:
+        i = k + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def find(self, offset: int) -> Tuple[int, int]:
+        """Quantas unidades terminam ate offset e o quanto sobra dele"""
+        position = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            if position + step <= self.size and self.tree[position + step] <= offset:
+                position += step
+                offset -= self.tree[position]
+            step >>= 1
+        return position, offset
+
+class IncrementalParser():
+    """Front end que reaproveita tokens e subarvores entre edicoes do mesmo arquivo.
+
+    Cada edicao re-lexa so a janela danificada e re-parseia o METODO (ou a CLASSE/MAIN)
+    que a contem; se a edicao mudar a estrutura de classes, o arquivo e refeito do zero.
+    Se o novo texto nao compilar, a excecao sobe e o estado anterior e mantido.
+    """
+    def __init__(self, text: str) -> None:
+        self.units: List[SourceUnit] = []
+        self.sizes: OffsetTree = None
+        self.nodes: List[Node] = []
+        self.tree: Node = None
+        self.last_reparse: str = None
+        self.rebuild(text)
+
+    @property
+    def text(self) -> str:
+        return "".join(unit.source for unit in self.units)
+
+    def get_tokens(self) -> TokenBuffer:
+        buffer = TokenBuffer(self.text)
+        offset = 0
+        for unit in self.units:
+            buffer.kinds.extend(unit.tokens.kinds)
+            buffer.starts.extend(start + offset for start in unit.tokens.starts)
+            buffer.ends.extend(end + offset for end in unit.tokens.ends)
+            offset += len(unit.source)
+        return buffer
+
+    def rebuild(self, text: str) -> Node:
+        lexer = Lexer(text)
+        lexer.tokenize()
+        tokens = lexer.get_tokens()
+        parser = Parser(tokens)
+        tree = parser.parse()
+
+        first_tokens = [parser.spans[child.id][0] for child in tree.children] + [len(tokens)]
+        offsets = [0] + [tokens.starts[first] for first in first_tokens[1:-1]]
+        units = []
+        for k, child in enumerate(tree.children):
+            start, end = first_tokens[k], first_tokens[k + 1]
+            base = offsets[k]
+            unit_tokens = TokenBuffer(text[base:offsets[k + 1]] if k + 1 < len(offsets) else text[base:])
+            unit_tokens.kinds = tokens.kinds[start:end]
+            unit_tokens.starts = array('I', (position - base for position in tokens.starts[start:end]))
+            unit_tokens.ends = array('I', (position - base for position in tokens.ends[start:end]))
+            units.append(SourceUnit(unit_tokens, child, parser.spans, start))
+
+        self.units = units
+        self.sizes = OffsetTree([len(unit.source) for unit in units])
+        self.nodes = [unit.node for unit in units]
+        self.tree = Node("PROG", list(self.nodes))
+        self.last_reparse = "PROG"
+        return self.tree
+
+    def edit(self, offset: int, removed: int, inserted: str) -> Node:
+        k, local = self.sizes.find(offset)
+        if k == len(self.units):
+            k -= 1
+            local += len(self.units[k].source)
+        unit = self.units[k]
+        if local + removed > len(unit.source):
+            return self.rebuild(self.text[:offset] + inserted + self.text[offset + removed:])
+
+        source = unit.source[:local] + inserted + unit.source[local + removed:]
+        delta = len(inserted) - removed
+        try:
+            first, window, resume = self.relex(unit.tokens, source, local, removed, len(inserted))
+        except SyntaxError:
+            # Ex.: um /* que so fecha em outra unidade; o texto inteiro ainda pode ser valido
+            return self.rebuild(self.text[:offset] + inserted + self.text[offset + removed:])
+        old = unit.tokens
+        tokens = TokenBuffer(source)
+        tokens.kinds = old.kinds[:first] + array('B', (kind for kind, _, _ in window)) + old.kinds[resume:]
+        tokens.starts = old.starts[:first] + array('I', (start for _, start, _ in window)) + array('I', (start + delta for start in old.starts[resume:]))
+        tokens.ends = old.ends[:first] + array('I', (end for _, _, end in window)) + array('I', (end + delta for end in old.ends[resume:]))
+        growth = len(window) - (resume - first)
+        if first == resume and not window:
+            # So espacos ou comentarios mudaram: a arvore continua valida
+            unit.tokens = tokens
+            self.shift_units(k, delta, source)
+            self.last_reparse = None
+            return self.tree
+
+        node = self.reparse_method(unit, tokens, first, resume, growth)
+        if node is None:
+            node = self.reparse_unit(unit, tokens)
+            if node is None:
+                return self.rebuild(self.text[:offset] + inserted + self.text[offset + removed:])
+
+        unit.tokens = tokens
+        unit.node = node
+        self.shift_units(k, delta, source)
+        self.nodes[k] = node
+        self.tree = Node("PROG", list(self.nodes))
+        return self.tree
+
+    def relex(self, tokens: TokenBuffer, source: str, local: int, removed: int, inserted: int) -> Tuple[int, list, int]:
+        """Re-lexa a partir do fim do ultimo token intacto ate reencontrar um token antigo deslocado"""
+        delta = inserted - removed
+        first = bisect_left(tokens.ends, local)
+        position = tokens.ends[first - 1] if first > 0 else 0
+        resume = first
+        window = []
+        edit_end = local + inserted
+
+        for kind, start, end in Lexer(source)._scan(position):
+            if start >= edit_end:
+                old_start = start - delta
+                while resume < len(tokens) and tokens.starts[resume] < old_start:
+                    resume += 1
+                if (resume < len(tokens) and tokens.starts[resume] == old_start and old_start >= local + removed
+                        and tokens.kinds[resume] == kind and tokens.ends[resume] == end - delta):
+                    return first, window, resume
+            window.append((kind, start, end))
+        return first, window, len(tokens)
+
+    def reparse_method(self, unit: SourceUnit, tokens: TokenBuffer, first: int, resume: int, growth: int) -> Node:
+        for position, (child, start, end) in enumerate(unit.methods):
+            if start <= first and resume <= end:
+                parser = Parser(tokens)
+                parser.index = start
+                try:
+                    metodo = parser.parse_METODO()
+                except Exception:
+                    return None
+                if parser.index != end + growth:
+                    return None
+
+                unit.children[child] = metodo
+                unit.methods[position][2] = end + growth
+                for following in unit.methods[position + 1:]:
+                    following[1] += growth
+                    following[2] += growth
+                self.last_reparse = "METODO"
+                return Node("CLASSE", list(unit.children))
+        return None
+
+    def reparse_unit(self, unit: SourceUnit, tokens: TokenBuffer) -> Node:
+        parser = Parser(tokens)
+        try:
+            node = parser.parse_MAIN() if unit.node.label == "MAIN" else parser.parse_CLASSE()
+        except Exception:
+            return None
+        if parser.index != len(tokens):
+            return None
+
+        replacement = SourceUnit(tokens, node, parser.spans)
+        unit.children = replacement.children
+        unit.methods = replacement.methods
+        self.last_reparse = node.label
+        return node
+
+    def shift_units(self, k: int, delta: int, source: str) -> None:
+        self.units[k].source = source
+        self.units[k].tokens.source = source
+        self.sizes.add(k, delta)
@@ -0,0 +1,306 @@
+from typing import Dict, List, Set, Tuple
+
+# Operacoes sem efeito colateral: podem sumir se o destino nao for usado
+PURE = {"const", "copy", "add", "sub", "mul", "slt", "seq", "sne", "and", "addi", "slti", "param", "load", "length", "loadg", "alloc", "phi",
+        "addr", "loadp"}
+BINARY = {"add", "sub", "mul", "slt", "seq", "sne", "and"}
+TERMINATORS = {"jump", "branch", "ret", "exit", "tailcall"}
+
+class Instr():
+    """Instrucao de tres enderecos: dest = op args.
+
+    args sao sempre registradores virtuais (ints); o que nao e registrador fica em imm:
+    valor do const, indice do param, label do call/tailcall/loadg/storeg, destinos de jump/branch,
+    deslocamento em bytes do loadp/storep e, no phi, os blocos predecessores na mesma ordem
+    dos args. addr da o endereco base + 4 * indice, que loadp/storep acessam sem recalcular.
+    tailcall e um call cujo valor ja e o retorno: termina o bloco, e o metodo chamado
+    devolve direto para quem chamou este.
+    """
+    __slots__ = ("op", "dest", "args", "imm")
+
+    def __init__(self, op: str, dest: int = None, args: List[int] = None, imm=None) -> None:
+        self.op = op
+        self.dest = dest
+        self.args = args if args is not None else []
+        self.imm = imm
+
+    def __repr__(self) -> str:
+        operands = ", ".join(f"t{arg}" for arg in self.args)
+        if self.op == "phi":
+            operands = ", ".join(f"[{label}: t{arg}]" for label, arg in zip(self.imm, self.args))
+        elif self.imm is not None:
+            imm = ", ".join(map(str, self.imm)) if isinstance(self.imm, tuple) else str(self.imm)
+            operands = f"{operands}, {imm}" if operands else imm
+        text = f"{self.op} {operands}".rstrip()
+        return f"t{self.dest} = {text}" if self.dest is not None else text
+
+class Block():
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.instrs: List[Instr] = []
+
+    @property
+    def terminator(self) -> Instr:
+        return self.instrs[-1] if self.instrs and self.instrs[-1].op in TERMINATORS else None
+
+    @property
+    def successors(self) -> List[str]:
+        terminator = self.terminator
+        if terminator is None or terminator.op not in ("jump", "branch"):
+            return []
+        return [terminator.imm] if terminator.op == "jump" else list(terminator.imm)
+
+    def phis(self) -> List[Instr]:
+        return [instr for instr in self.instrs if instr.op == "phi"]
+
+    def __repr__(self) -> str:
+        return "\n".join([f"{self.label}:"] + [f"\t{instr}" for instr in self.instrs])
+
+class Function():
+    """Metodo (ou main) em IR: lista de blocos, o primeiro e a entrada"""
+    def __init__(self, name: str, params: int = 0) -> None:
+        self.name = name
+        self.params = params
+        self.blocks: List[Block] = []
+        self.temps = 0
+        self.ssa = False
+
+    def new_temp(self) -> int:
+        self.temps += 1
+        return self.temps
+
+    def block(self, label: str) -> Block:
+        return next(block for block in self.blocks if block.label == label)
+
+    def size(self) -> int:
+        return sum(len(block.instrs) for block in self.blocks)
+
+    def predecessors(self) -> Dict[str, List[str]]:
+        preds = {block.label: [] for block in self.blocks}
+        for block in self.blocks:
+            for successor in block.successors:
+                preds[successor].append(block.label)
+        return preds
+
+    def reverse_postorder(self) -> List[str]:
+        blocks = {block.label: block for block in self.blocks}
+        order, seen = [], {self.blocks[0].label}
+        stack = [(self.blocks[0].label, iter(self.blocks[0].successors))]
+        while stack:
+            label, successors = stack[-1]
+            successor = next(successors, None)
+            if successor is None:
+                order.append(label)
+                stack.pop()
+            elif successor not in seen:
+                seen.add(successor)
+                stack.append((successor, iter(blocks[successor].successors)))
+        return order[::-1]
+
+    def remove_unreachable(self) -> int:
+        reachable = set(self.reverse_postorder())
+        removed = [block for block in self.blocks if block.label not in reachable]
+        if removed:
+            self.blocks = [block for block in self.blocks if block.label in reachable]
+            for block in self.blocks:
+                for phi in block.phis():
+                    self.drop_phi_edges(phi, lambda label: label not in reachable)
+        return sum(len(block.instrs) for block in removed)
+
+    def drop_phi_edges(self, phi: Instr, dropped) -> None:
+        kept = [(label, arg) for label, arg in zip(phi.imm, phi.args) if not dropped(label)]
+        phi.imm = [label for label, _ in kept]
+        phi.args = [arg for _, arg in kept]
+
+    def dominators(self) -> Dict[str, str]:
+        """Dominador imediato de cada bloco alcancavel (Cooper, Harvey e Kennedy)"""
+        order = self.reverse_postorder()
+        index = {label: i for i, label in enumerate(order)}
+        preds = self.predecessors()
+        idom = {order[0]: order[0]}
+        changed = True
+        while changed:
+            changed = False
+            for label in order[1:]:
+                candidates = [pred for pred in preds[label] if pred in idom]
+                new = candidates[0]
+                for pred in candidates[1:]:
+                    a, b = pred, new
+                    while a != b:
+                        while index[a] > index[b]:
+                            a = idom[a]
+                        while index[b] > index[a]:
+                            b = idom[b]
+                    new = a
+                if idom.get(label) != new:
+                    idom[label] = new
+                    changed = True
+        return idom
+
+    def dominance_frontiers(self, idom: Dict[str, str]) -> Dict[str, Set[str]]:
+        frontiers = {label: set() for label in idom}
+        for label, preds in self.predecessors().items():
+            preds = [pred for pred in preds if pred in idom]
+            if len(preds) < 2:
+                continue
+            for pred in preds:
+                runner = pred
+                while runner != idom[label]:
+                    frontiers[runner].add(label)
+                    runner = idom[runner]
+        return frontiers
+
+    def natural_loops(self, idom: Dict[str, str]) -> List[Tuple[str, Set[str]]]:
+        """Lacos naturais (cabecalho, blocos), um por cabecalho, do mais interno para o mais externo.
+
+        Cada aresta de volta (o destino domina a origem) junta ao laco do destino os blocos que
+        chegam a origem sem passar pelo cabecalho.
+        """
+        preds = self.predecessors()
+        loops: Dict[str, Set[str]] = {}
+        for block in self.blocks:
+            if block.label not in idom:
+                continue
+            for successor in block.successors:
+                if not dominates(idom, successor, block.label):
+                    continue
+                body = loops.setdefault(successor, {successor})
+                work = [block.label]
+                while work:
+                    label = work.pop()
+                    if label not in body:
+                        body.add(label)
+                        work.extend(pred for pred in preds[label] if pred in idom)
+        return sorted(loops.items(), key=lambda loop: len(loop[1]))
+
+    def __repr__(self) -> str:
+        return "\n".join([f"function {self.name}({self.params}):"] + [repr(block) for block in self.blocks])
+
+class Program():
+    def __init__(self) -> None:
+        self.functions: List[Function] = []
+        self.globals: List[str] = []
+
+    def size(self) -> int:
+        return sum(function.size() for function in self.functions)
+
+    def __repr__(self) -> str:
+        return "\n\n".join(repr(function) for function in self.functions)
+
+def dominates(idom: Dict[str, str], a: str, b: str) -> bool:
+    while b != a:
+        if idom[b] == b:
+            return False
+        b = idom[b]
+    return True
+
+def to_ssa(function: Function) -> None:
+    """Coloca phis na fronteira de dominancia iterada de cada registrador definido mais de uma vez e renomeia"""
+    function.remove_unreachable()
+    idom = function.dominators()
+    frontiers = function.dominance_frontiers(idom)
+    preds = function.predecessors()
+    blocks = {block.label: block for block in function.blocks}
+
+    definitions: Dict[int, Set[str]] = {}
+    counts: Dict[int, int] = {}
+    for block in function.blocks:
+        for instr in block.instrs:
+            if instr.dest is not None:
+                definitions.setdefault(instr.dest, set()).add(block.label)
+                counts[instr.dest] = counts.get(instr.dest, 0) + 1
+    variables = {temp for temp, count in counts.items() if count > 1}
+
+    origins: Dict[int, int] = {}
+    for variable in sorted(variables):
+        placed = set()
+        work = list(definitions[variable])
+        while work:
+            label = work.pop()
+            for frontier in frontiers[label]:
+                if frontier not in placed:
+                    placed.add(frontier)
+                    phi = Instr("phi", variable, [variable] * len(preds[frontier]), list(preds[frontier]))
+                    origins[id(phi)] = variable
+                    blocks[frontier].instrs.insert(0, phi)
+                    if frontier not in definitions[variable]:
+                        work.append(frontier)
+
+    children: Dict[str, List[str]] = {label: [] for label in idom}
+    for label, parent in idom.items():
+        if label != parent:
+            children[parent].append(label)
+    stacks: Dict[int, List[int]] = {variable: [] for variable in variables}
+    pushed: Dict[str, List[int]] = {}
+
+    # Renomeacao em pre-ordem da arvore de dominadores, com pilha explicita
+    work = [(function.blocks[0].label, False)]
+    while work:
+        label, leaving = work.pop()
+        if leaving:
+            for variable in pushed.pop(label):
+                stacks[variable].pop()
+            continue
+        block = blocks[label]
+        pushes = []
+        for instr in block.instrs:
+            if instr.op != "phi":
+                instr.args = [stacks[arg][-1] if stacks.get(arg) else arg for arg in instr.args]
+            if instr.dest in stacks:
+                original = instr.dest
+                instr.dest = function.new_temp()
+                stacks[original].append(instr.dest)
+                pushes.append(original)
+        for successor in block.successors:
+            for phi in blocks[successor].phis():
+                variable = origins[id(phi)]
+                value = stacks[variable][-1] if stacks[variable] else variable
+                phi.args = [value if pred == label else arg for pred, arg in zip(phi.imm, phi.args)]
+        pushed[label] = pushes
+        work.append((label, True))
+        work.extend((child, False) for child in reversed(children[label]))
+    function.ssa = True
+
+def from_ssa(function: Function) -> None:
+    """Troca cada phi por copias nos predecessores.
+
+    Se todo predecessor so salta para o bloco e nenhum phi le o destino de outro, a copia vai
+    direto para o destino; quando o valor vem de uma conta no proprio predecessor, usada so
+    pelo phi e depois da qual o destino nao e mais lido, a conta passa a escrever no destino
+    e a copia some (o i = i + 1 do laco). Senao cada phi passa por um registrador novo, o que
+    evita os problemas de copia perdida e de troca (swap) sem dividir arestas criticas.
+    """
+    blocks = {block.label: block for block in function.blocks}
+    uses: Dict[int, int] = {}
+    definitions: Dict[int, Instr] = {}
+    for block in function.blocks:
+        for instr in block.instrs:
+            for arg in instr.args:
+                uses[arg] = uses.get(arg, 0) + 1
+            if instr.dest is not None and instr.op != "phi":
+                definitions[instr.dest] = instr
+    for block in function.blocks:
+        phis = block.phis()
+        if not phis:
+            continue
+        dests = {phi.dest for phi in phis}
+        direct = all(len(blocks[pred].successors) == 1 for phi in phis for pred in phi.imm) and \
+            not any(arg in dests and arg != phi.dest for phi in phis for arg in phi.args)
+        copies = []
+        for phi in phis:
+            temp = phi.dest if direct else function.new_temp()
+            for pred, arg in set(zip(phi.imm, phi.args)):
+                if direct and arg == phi.dest:
+                    continue
+                instrs = blocks[pred].instrs
+                definition = definitions.get(arg)
+                if direct and uses[arg] == 1 and definition is not None and definition in instrs:
+                    after = instrs[instrs.index(definition) + 1:]
+                    if not any(phi.dest in instr.args for instr in after):
+                        definition.dest = phi.dest
+                        continue
+                instrs.insert(len(instrs) - 1, Instr("copy", temp, [arg]))
+            if not direct:
+                copies.append(Instr("copy", phi.dest, [temp]))
+        block.instrs = copies + [instr for instr in block.instrs if instr.op != "phi"]
+    function.ssa = False
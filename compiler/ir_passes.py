@@ -0,0 +1,521 @@
+from typing import Callable, Dict, List, Set, Tuple
+from .ir import BINARY, PURE, Block, Function, Instr, Program, dominates
+
+def wrap(value: int) -> int:
+    value &= 0xffffffff
+    return value - (1 << 32) if value & 0x80000000 else value
+
+FOLD: Dict[str, Callable[[int, int], int]] = {
+    "add": lambda a, b: wrap(a + b),
+    "sub": lambda a, b: wrap(a - b),
+    "mul": lambda a, b: wrap(a * b),
+    "slt": lambda a, b: int(a < b),
+    "seq": lambda a, b: int(a == b),
+    "sne": lambda a, b: int(a != b),
+    "and": lambda a, b: a & b,
+}
+
+# Operacoes que podem sair de um laco quando os operandos nao mudam nele
+HOISTABLE = {"const", "copy", "add", "sub", "mul", "slt", "seq", "sne", "and", "addi", "slti", "addr", "length", "load", "loadp", "loadg"}
+# Associativas e comutativas (tambem modulo 2^32), com o elemento neutro: x op f(...) vira acumulador
+ACCUMULATORS = {"add": 0, "mul": 1}
+# Leituras de memoria e o que, dentro do laco, pode mudar o valor lido
+WRITERS = {"load": {"store", "storep", "call"}, "loadp": {"store", "storep", "call"}, "loadg": {"storeg", "call"}}
+# Falham com um array nulo: so saem se o bloco roda sempre que o laco roda
+UNSAFE = {"length", "load", "loadp"}
+# Acessos que so passam de um array nao nulo
+ACCESSES = {"length", "load", "store"}
+
+def replace_uses(function: Function, replacements: Dict[int, int]) -> None:
+    for block in function.blocks:
+        for instr in block.instrs:
+            if any(arg in replacements for arg in instr.args):
+                instr.args = [replacements.get(arg, arg) for arg in instr.args]
+
+def constant_propagation(function: Function) -> int:
+    """Propaga consts pelo SSA, dobra operacoes e phis constantes e resolve branches com condicao conhecida"""
+    values: Dict[int, int] = {}
+    changed = True
+    while changed:
+        changed = False
+        for block in function.blocks:
+            for instr in block.instrs:
+                if instr.dest is None or instr.dest in values:
+                    continue
+                value = None
+                if instr.op == "const":
+                    value = instr.imm
+                elif instr.op == "copy" and instr.args[0] in values:
+                    value = values[instr.args[0]]
+                elif instr.op in BINARY and instr.args[0] in values and instr.args[1] in values:
+                    value = FOLD[instr.op](values[instr.args[0]], values[instr.args[1]])
+                elif instr.op == "phi":
+                    # O proprio destino (laco que nao muda a variavel) nao conta
+                    incoming = [arg for arg in instr.args if arg != instr.dest]
+                    if incoming and all(arg in values for arg in incoming) and len({values[arg] for arg in incoming}) == 1:
+                        value = values[incoming[0]]
+                if value is not None:
+                    values[instr.dest] = value
+                    changed = True
+
+    changes = 0
+    for block in function.blocks:
+        for i, instr in enumerate(block.instrs):
+            if instr.dest in values and instr.op != "const":
+                block.instrs[i] = Instr("const", instr.dest, [], values[instr.dest])
+                changes += 1
+            elif instr.op == "branch" and instr.args[0] in values:
+                taken, dropped = instr.imm if values[instr.args[0]] else instr.imm[::-1]
+                block.instrs[i] = Instr("jump", None, [], taken)
+                if dropped != taken:
+                    for phi in function.block(dropped).phis():
+                        function.drop_phi_edges(phi, lambda label: label == block.label)
+                changes += 1
+    return changes + function.remove_unreachable()
+
+def copy_propagation(function: Function) -> int:
+    """Usa a origem de cada copy (e de phis com um unico valor) no lugar do destino"""
+    replacements: Dict[int, int] = {}
+    for block in function.blocks:
+        for instr in block.instrs:
+            if instr.op == "copy":
+                replacements[instr.dest] = instr.args[0]
+            elif instr.op == "phi":
+                sources = {arg for arg in instr.args if arg != instr.dest}
+                if len(sources) == 1:
+                    replacements[instr.dest] = sources.pop()
+    if not replacements:
+        return 0
+    for temp in list(replacements):
+        source = replacements[temp]
+        seen = {temp}
+        while source in replacements and source not in seen:
+            seen.add(source)
+            source = replacements[source]
+        replacements[temp] = source
+    replace_uses(function, replacements)
+    removed = 0
+    for block in function.blocks:
+        size = len(block.instrs)
+        block.instrs = [instr for instr in block.instrs if instr.dest not in replacements or replacements[instr.dest] == instr.dest]
+        removed += size - len(block.instrs)
+    return removed
+
+def dead_code_elimination(function: Function) -> int:
+    """Marca a partir das instrucoes com efeito e apaga as operacoes puras que ninguem usa"""
+    definitions: Dict[int, Instr] = {}
+    for block in function.blocks:
+        for instr in block.instrs:
+            if instr.dest is not None:
+                definitions[instr.dest] = instr
+    live = set()
+    work: List[Instr] = [instr for block in function.blocks for instr in block.instrs if instr.op not in PURE]
+    while work:
+        instr = work.pop()
+        for arg in instr.args:
+            if arg not in live:
+                live.add(arg)
+                if arg in definitions:
+                    work.append(definitions[arg])
+    removed = 0
+    for block in function.blocks:
+        size = len(block.instrs)
+        block.instrs = [instr for instr in block.instrs if instr.op not in PURE or instr.dest in live]
+        removed += size - len(block.instrs)
+    return removed
+
+def simplify_cfg(function: Function) -> int:
+    """Junta um bloco ao unico predecessor quando este so salta para ele"""
+    removed = function.remove_unreachable()
+    merged = True
+    while merged:
+        merged = False
+        preds = function.predecessors()
+        for block in function.blocks[1:]:
+            if len(preds[block.label]) != 1 or block.phis():
+                continue
+            pred = function.block(preds[block.label][0])
+            if pred is block or pred.terminator.op != "jump":
+                continue
+            pred.instrs = pred.instrs[:-1] + block.instrs
+            function.blocks.remove(block)
+            for successor in block.successors:
+                for phi in function.block(successor).phis():
+                    phi.imm = [pred.label if label == block.label else label for label in phi.imm]
+            removed += 1
+            merged = True
+            break
+    return removed
+
+def preheader(function: Function, header: str, body: Set[str]) -> Block:
+    """Bloco por onde se entra no laco: o unico predecessor de fora, se ele so salta para o
+    cabecalho, ou um bloco novo no meio das arestas de fora (com phi se vierem varios valores)"""
+    outside = [pred for pred in function.predecessors()[header] if pred not in body]
+    if len(outside) == 1 and function.block(outside[0]).terminator.op == "jump":
+        return function.block(outside[0])
+    block = Block(f"{header}_pre")
+    block.instrs.append(Instr("jump", None, [], header))
+    header_block = function.block(header)
+    function.blocks.insert(function.blocks.index(header_block), block)
+    for label in outside:
+        terminator = function.block(label).terminator
+        if terminator.op == "jump":
+            terminator.imm = block.label
+        else:
+            terminator.imm = tuple(block.label if target == header else target for target in terminator.imm)
+    for phi in header_block.phis():
+        incoming = [(label, arg) for label, arg in zip(phi.imm, phi.args) if label in outside]
+        value = incoming[0][1]
+        if len({arg for _, arg in incoming}) > 1:
+            value = function.new_temp()
+            block.instrs.insert(0, Instr("phi", value, [arg for _, arg in incoming], [label for label, _ in incoming]))
+        function.drop_phi_edges(phi, lambda label: label in outside)
+        phi.imm.append(block.label)
+        phi.args.append(value)
+    return block
+
+def loop_invariant_code_motion(function: Function) -> int:
+    """Leva para o preheader as operacoes de um laco cujos operandos nao mudam nele.
+
+    Os lacos vao do mais interno para o mais externo, entao uma conta pode subir varios niveis.
+    Leituras de memoria so saem se nada no laco escreve nela, e length/load (que falham com
+    array nulo) so se o bloco delas domina todas as saidas, ou seja, roda em toda volta; o
+    length tambem sai se o array veio de um alloc ou ja foi acessado antes do laco.
+    """
+    moved = 0
+    idom = function.dominators()
+    loops = function.natural_loops(idom)
+    allocated = {instr.dest for block in function.blocks for instr in block.instrs if instr.op == "alloc"}
+    for k, (header, body) in enumerate(loops):
+        accessed = {instr.args[0] for block in function.blocks if block.label not in body and block.label in idom and dominates(idom, block.label, header)
+                    for instr in block.instrs if instr.op in ACCESSES}
+        nonnull = allocated | accessed
+        blocks = [block for block in function.blocks if block.label in body]
+        defined = {instr.dest for block in blocks for instr in block.instrs if instr.dest is not None}
+        ops = {instr.op for block in blocks for instr in block.instrs}
+        exits = [block.label for block in blocks if any(successor not in body for successor in block.successors)]
+        invariant: Set[int] = set()
+        hoisted: List[Instr] = []
+        changed = True
+        while changed:
+            changed = False
+            for block in blocks:
+                for instr in block.instrs:
+                    if instr.op not in HOISTABLE or instr.dest in invariant or ops & WRITERS.get(instr.op, set()):
+                        continue
+                    if any(arg in defined and arg not in invariant for arg in instr.args):
+                        continue
+                    if instr.op in UNSAFE and not (instr.op == "length" and instr.args[0] in nonnull) and \
+                            not all(dominates(idom, block.label, exit) for exit in exits):
+                        continue
+                    invariant.add(instr.dest)
+                    hoisted.append(instr)
+                    changed = True
+        if not hoisted:
+            continue
+        for block in blocks:
+            block.instrs = [instr for instr in block.instrs if instr.dest not in invariant]
+        entry = preheader(function, header, body)
+        entry.instrs[-1:-1] = hoisted
+        moved += len(hoisted)
+        for _, outer in loops[k + 1:]:
+            if header in outer:
+                outer.add(entry.label)
+        idom = function.dominators()
+    return moved
+
+def induction_variables(function: Function) -> int:
+    """Reducao de forca das variaveis de inducao usadas como indice de array.
+
+    Uma variavel de inducao basica e um phi no cabecalho com o valor de fora e i + k (k const)
+    vindo de dentro do laco. Cada load/store de um array invariante indexado por i passa a usar
+    um ponteiro p = phi(addr v, i0; p + 4k), que anda logo depois do i + k: o sll e o add do
+    endereco saem de cada acesso e fica um add por volta.
+    """
+    constants = {instr.dest: instr.imm for block in function.blocks for instr in block.instrs if instr.op == "const"}
+    definitions = {instr.dest: (block, instr) for block in function.blocks for instr in block.instrs if instr.dest is not None}
+    changes = 0
+    for header, body in function.natural_loops(function.dominators()):
+        blocks = [block for block in function.blocks if block.label in body]
+        defined = {instr.dest for block in blocks for instr in block.instrs if instr.dest is not None}
+        for phi in function.block(header).phis():
+            inside = [arg for label, arg in zip(phi.imm, phi.args) if label in body]
+            if len(inside) != 1 or len(phi.args) < 2 or inside[0] not in definitions:
+                continue
+            step_block, step = definitions[inside[0]]
+            if step.op != "add" or step_block.label not in body or phi.dest not in step.args:
+                continue
+            increment = step.args[1] if step.args[0] == phi.dest else step.args[0]
+            if increment not in constants:
+                continue
+            accesses: Dict[int, List[Instr]] = {}
+            for block in blocks:
+                for instr in block.instrs:
+                    if (instr.op == "load" or instr.op == "store") and instr.args[1] == phi.dest and instr.args[0] not in defined:
+                        accesses.setdefault(instr.args[0], []).append(instr)
+            if not accesses:
+                continue
+            entry = preheader(function, header, body)
+            start = phi.args[phi.imm.index(entry.label)]
+            stride = function.new_temp()
+            entry.instrs.insert(len(entry.instrs) - 1, Instr("const", stride, [], wrap(4 * constants[increment])))
+            for base, instrs in accesses.items():
+                pointer, initial, advanced = function.new_temp(), function.new_temp(), function.new_temp()
+                entry.instrs.insert(len(entry.instrs) - 1, Instr("addr", initial, [base, start]))
+                step_block.instrs.insert(step_block.instrs.index(step) + 1, Instr("add", advanced, [pointer, stride]))
+                args = [advanced if label in body else initial for label in phi.imm]
+                function.block(header).instrs.insert(0, Instr("phi", pointer, args, list(phi.imm)))
+                for instr in instrs:
+                    instr.args = [pointer] if instr.op == "load" else [pointer, instr.args[2]]
+                    instr.op = "loadp" if instr.op == "load" else "storep"
+                    instr.imm = 4
+                changes += 1
+    return changes
+
+def returned_value(blocks: Dict[str, Block], block: Block) -> int:
+    """Valor que o metodo devolve quando sai por este bloco, ou None se ele nao vai direto ao ret"""
+    terminator = block.terminator
+    if terminator is None:
+        return None
+    if terminator.op == "ret":
+        return terminator.args[0]
+    if terminator.op != "jump" or [instr.op for instr in blocks[terminator.imm].instrs] != ["phi", "ret"]:
+        return None
+    phi, ret = blocks[terminator.imm].instrs
+    return phi.args[phi.imm.index(block.label)] if ret.args[0] == phi.dest else None
+
+def tail_recursion(function: Function) -> int:
+    """Troca a recursao em cauda por um laco que reaproveita o quadro.
+
+    Um call ao proprio metodo cujo valor vai direto para o ret (no bloco ou pelo phi do bloco
+    do ret) vira salto para a entrada, que ganha um phi por param; os params vao para um bloco
+    novo antes dela. Se o valor ainda passa por x + f(...) ou x * f(...), um acumulador recebe
+    acumulador op x antes do salto e todo ret devolve acumulador op valor.
+    """
+    entry = function.blocks[0]
+    if function.name == "main" or function.predecessors()[entry.label]:
+        return 0
+    blocks = {block.label: block for block in function.blocks}
+    uses: Dict[int, int] = {}
+    for block in function.blocks:
+        for instr in block.instrs:
+            for arg in instr.args:
+                uses[arg] = uses.get(arg, 0) + 1
+    sites: List[Tuple[Block, Instr, Instr]] = []
+    accumulator = None
+    for block in function.blocks:
+        value = returned_value(blocks, block)
+        body = block.instrs[:-1]
+        if value is None or not body:
+            continue
+        last = body[-1]
+        if last.op == "call" and last.imm == function.name and last.dest == value:
+            sites.append((block, last, None))
+        elif len(body) > 1 and body[-2].op == "call" and body[-2].imm == function.name and last.dest == value and \
+                last.op in ACCUMULATORS and accumulator in (None, last.op) and body[-2].dest in last.args and \
+                uses[body[-2].dest] == 1 and uses[value] == 1:
+            accumulator = last.op
+            sites.append((block, body[-2], last))
+    if not sites:
+        return 0
+
+    start = Block(f"{entry.label}_start")
+    start.instrs = [instr for instr in entry.instrs if instr.op == "param"]
+    entry.instrs = [instr for instr in entry.instrs if instr.op != "param"]
+    replacements = {param.dest: function.new_temp() for param in start.instrs}
+    replace_uses(function, replacements)
+    labels = [start.label] + [block.label for block, _, _ in sites]
+    phis = [Instr("phi", replacements[param.dest], [param.dest] + [call.args[param.imm] for _, call, _ in sites], labels)
+            for param in start.instrs]
+    if accumulator is not None:
+        initial, current = function.new_temp(), function.new_temp()
+        start.instrs.append(Instr("const", initial, [], ACCUMULATORS[accumulator]))
+        incoming = [initial]
+    start.instrs.append(Instr("jump", None, [], entry.label))
+
+    for block, call, operation in sites:
+        terminator = block.terminator
+        if terminator.op == "jump":
+            for phi in blocks[terminator.imm].phis():
+                function.drop_phi_edges(phi, lambda label: label == block.label)
+        tail = [Instr("jump", None, [], entry.label)]
+        if accumulator is not None:
+            if operation is None:
+                incoming.append(current)
+            else:
+                # O outro operando ja foi calculado antes do call, que sai junto com a operacao
+                other = operation.args[1] if operation.args[0] == call.dest else operation.args[0]
+                incoming.append(function.new_temp())
+                tail.insert(0, Instr(accumulator, incoming[-1], [current, other]))
+        block.instrs = block.instrs[:block.instrs.index(call)] + tail
+    if accumulator is not None:
+        phis.append(Instr("phi", current, incoming, labels))
+        for block in function.blocks:
+            terminator = block.terminator
+            if terminator is not None and terminator.op == "ret":
+                result = function.new_temp()
+                block.instrs.insert(len(block.instrs) - 1, Instr(accumulator, result, [current, terminator.args[0]]))
+                terminator.args = [result]
+    entry.instrs[0:0] = phis
+    function.blocks.insert(0, start)
+    return len(sites) + function.remove_unreachable()
+
+IR_PASSES: Dict[str, Callable[[Function], int]] = {
+    "tail_recursion": tail_recursion,
+    "constant_propagation": constant_propagation,
+    "copy_propagation": copy_propagation,
+    "dead_code_elimination": dead_code_elimination,
+    "simplify_cfg": simplify_cfg,
+    "loop_invariant_code_motion": loop_invariant_code_motion,
+    "induction_variables": induction_variables,
+}
+
+# Inlining: tamanho maximo do metodo chamado (fora e dentro de lacos), peso de cada nivel de
+# laco na frequencia da chamada e crescimento permitido do programa (fracao e minimo absoluto)
+INLINE_SIZE = 12
+INLINE_HOT_SIZE = 40
+LOOP_WEIGHT = 10
+INLINE_GROWTH = 0.5
+INLINE_MIN_GROWTH = 64
+
+class Inliner():
+    """Substitui chamadas a metodos folha pequenos pelo corpo do metodo.
+
+    Uma folha nao chama nada (nem exit), entao nao ha recursao; a cada rodada as folhas vao
+    para quem as chama e os chamadores que viram folhas entram na rodada seguinte. As chamadas
+    vao da mais frequente (LOOP_WEIGHT por nivel de laco) e com menor crescimento primeiro,
+    enquanto couber no orcamento; o crescimento e o corpo menos o que sai (call, params e ret).
+    Como o receptor nao e passado, this.m() e new X().m() sao o mesmo call com o label do metodo.
+    Metodos que deixam de ser chamados saem do programa.
+    """
+    def __init__(self, program: Program, growth: float = INLINE_GROWTH) -> None:
+        self.program = program
+        self.budget = max(INLINE_MIN_GROWTH, int(program.size() * growth))
+        self.inlined = 0
+
+    def leaves(self) -> Dict[str, Function]:
+        return {function.name: function for function in self.program.functions
+                if function.name != "main" and not function.predecessors()[function.blocks[0].label]
+                and not any(instr.op == "call" or instr.op == "exit" for block in function.blocks for instr in block.instrs)}
+
+    def call_sites(self, leaves: Dict[str, Function]) -> List[Tuple[int, int, Function, Block, Instr]]:
+        """(peso, crescimento, chamador, bloco, call) de cada chamada que pode ser substituida"""
+        sites = []
+        for caller in self.program.functions:
+            calls = [(block, instr) for block in caller.blocks for instr in block.instrs if instr.op == "call" and instr.imm in leaves]
+            if not calls:
+                continue
+            depth: Dict[str, int] = {}
+            for _, body in caller.natural_loops(caller.dominators()):
+                for label in body:
+                    depth[label] = depth.get(label, 0) + 1
+            for block, instr in calls:
+                callee = leaves[instr.imm]
+                loops = depth.get(block.label, 0)
+                if callee.size() > (INLINE_HOT_SIZE if loops else INLINE_SIZE):
+                    continue
+                sites.append((LOOP_WEIGHT ** loops, callee.size() - len(instr.args) - 2, caller, block, instr))
+        sites.sort(key=lambda site: (-site[0], site[1]))
+        return sites
+
+    def run(self) -> Set[str]:
+        """Uma rodada; devolve os nomes dos chamadores que mudaram"""
+        changed: Set[str] = set()
+        leaves = self.leaves()
+        for _, growth, caller, block, call in self.call_sites(leaves):
+            if growth > self.budget:
+                continue
+            self.budget -= max(growth, 0)
+            block = next(candidate for candidate in caller.blocks if call in candidate.instrs)
+            self.inline(caller, block, call, leaves[call.imm])
+            changed.add(caller.name)
+        called = {instr.imm for function in self.program.functions for block in function.blocks for instr in block.instrs if instr.op == "call"}
+        self.program.functions = [function for function in self.program.functions if function.name not in leaves or function.name in called]
+        return changed
+
+    def inline(self, caller: Function, block: Block, call: Instr, callee: Function) -> None:
+        """Divide o bloco no call e poe no meio uma copia do metodo com registradores e labels novos"""
+        self.inlined += 1
+        offset = caller.temps
+        caller.temps += callee.temps
+        labels = {original.label: f"{original.label}_in{self.inlined}" for original in callee.blocks}
+        index = block.instrs.index(call)
+        rest = Block(f"{block.label}_ret{self.inlined}")
+        rest.instrs = block.instrs[index + 1:]
+        block.instrs = block.instrs[:index] + [Instr("jump", None, [], labels[callee.blocks[0].label])]
+        for successor in rest.successors:
+            for phi in caller.block(successor).phis():
+                phi.imm = [rest.label if label == block.label else label for label in phi.imm]
+
+        copies, returns = [], []
+        for original in callee.blocks:
+            copy = Block(labels[original.label])
+            for instr in original.instrs:
+                args = [arg + offset for arg in instr.args]
+                dest = instr.dest + offset if instr.dest is not None else None
+                imm = instr.imm
+                if instr.op == "param":
+                    copy.instrs.append(Instr("copy", dest, [call.args[instr.imm]]))
+                    continue
+                if instr.op == "ret":
+                    returns.append((copy.label, args[0]))
+                    copy.instrs.append(Instr("jump", None, [], rest.label))
+                    continue
+                if instr.op == "jump":
+                    imm = labels[imm]
+                elif instr.op == "branch" or instr.op == "phi":
+                    imm = type(imm)(labels[label] for label in imm)
+                copy.instrs.append(Instr(instr.op, dest, args, imm))
+            copies.append(copy)
+        if len(returns) == 1:
+            rest.instrs.insert(0, Instr("copy", call.dest, [returns[0][1]]))
+        else:
+            rest.instrs.insert(0, Instr("phi", call.dest, [value for _, value in returns], [label for label, _ in returns]))
+        position = caller.blocks.index(block) + 1
+        caller.blocks[position:position] = copies + [rest]
+
+class PassManager():
+    """Roda os passes sobre cada funcao em SSA ate nenhum mudar nada.
+
+    Com inline, depois dessa primeira otimizacao o Inliner roda em rodadas (das folhas para
+    cima) e cada chamador que mudou passa pelos passes de novo. stats guarda, por passe,
+    quantas vezes rodou, quantas mudancas relatou (reescritas, branches resolvidos, blocos
+    juntados, chamadas substituidas) e quantas instrucoes removeu no total.
+    """
+    def __init__(self, passes: List[str] = None, max_rounds: int = 10, inline: bool = True) -> None:
+        self.passes = passes if passes is not None else list(IR_PASSES)
+        self.max_rounds = max_rounds
+        self.inline = inline
+        names = self.passes + ["inline"] if inline else self.passes
+        self.stats: Dict[str, Dict[str, int]] = {name: {"runs": 0, "changes": 0, "removed": 0} for name in names}
+
+    def run(self, program: Program) -> Dict[str, Dict[str, int]]:
+        for function in program.functions:
+            self.optimize(function)
+        if self.inline:
+            inliner = Inliner(program)
+            while True:
+                size, inlined = program.size(), inliner.inlined
+                changed = inliner.run()
+                self.stats["inline"]["runs"] += 1
+                self.stats["inline"]["changes"] += inliner.inlined - inlined
+                self.stats["inline"]["removed"] += size - program.size()
+                if not changed:
+                    break
+                for function in program.functions:
+                    if function.name in changed:
+                        self.optimize(function)
+        return self.stats
+
+    def optimize(self, function: Function) -> None:
+        for _ in range(self.max_rounds):
+            changed = False
+            for name in self.passes:
+                size = function.size()
+                changes = IR_PASSES[name](function)
+                self.stats[name]["runs"] += 1
+                self.stats[name]["changes"] += changes
+                self.stats[name]["removed"] += size - function.size()
+                changed = changed or changes > 0
+            if not changed:
+                break
@@ -1,43 +1,82 @@
-from typing import List, Tuple, Iterator
-from .types import Token
+from typing import Dict, FrozenSet, List, Tuple, Iterator
+from .types import Token, TokenBuffer, KINDS, TOKEN_TYPES, IDENTIFIER, NUMBER
 import re
 
 class Lexer():
+    RESERVED: FrozenSet[str] = frozenset({
+        "boolean", "class", "extends", "public", "static", "void", "main", "String", "return", "int",
+        "if", "else", "while", "length", "true", "false", "this", "new", "null",
+    })
+
     TOKEN_SPECS: List[Tuple[str, str]] = [
-        ("reserved", r'\b(boolean|class|extends|public|static|void|main|String|return|int|if|else|while|System\.out\.println|length|true|false|this|new|null)\b'),
+        ("reserved", r'System\.out\.println\b'),
         ("identifier", r'[a-zA-Z_][a-zA-Z0-9_]*'),
         ("number", r'\d+'),
         ("operator", r'==|!=|<=|>=|<|>|\+|-|\*|&&|!|='),
         ("punctuation", r'[(){}\[\];.,]'),
-        ("whitespace", r'[ \t\r\f\n]+'),
-        ("comment", r'//.*?$|/\*.*?\*/'),
         ("mistake", r'.'),
     ]
 
-    FULL_REGEX: str = '|'.join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_SPECS)
+    # Espaços e comentários são consumidos como prefixo de cada token, sem gerar match próprio
+    SKIP: str = r'(?:[ \t\r\f\n]+|//[^\n]*|/\*.*?\*/)*'
+
+    FULL_REGEX: str = SKIP + '(?:' + '|'.join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_SPECS) + ')?'
+
+    REGEX = re.compile(FULL_REGEX, re.DOTALL)
+    RESERVED_KINDS: Dict[str, int] = {word: KINDS[word] for word in RESERVED}
+    IDENTIFIER_GROUP: int = REGEX.groupindex["identifier"]
+    NUMBER_GROUP: int = REGEX.groupindex["number"]
+    MISTAKE_GROUP: int = REGEX.groupindex["mistake"]
 
     def __init__(self, text: str) -> None:
         self.text: str = text
-        self.tokens: List[Token] = []
+        self.tokens: TokenBuffer = None
         self.current_position: int = 0
-        self.regex = re.compile(self.FULL_REGEX)
+        self.regex = self.REGEX
+
+    def _scan(self, position: int = 0) -> Iterator[Tuple[int, int, int]]:
+        text = self.text
+        reserved = self.RESERVED_KINDS
+        identifier_group, number_group, mistake_group = self.IDENTIFIER_GROUP, self.NUMBER_GROUP, self.MISTAKE_GROUP
+        match = None
+
+        for match in self.regex.finditer(text, position):
+            index = match.lastindex
+            if index is None:
+                break
+
+            start = match.start(index)
+            end = match.end()
+            if index == identifier_group:
+                yield reserved.get(text[start:end], IDENTIFIER), start, end
+            elif index == number_group:
+                yield NUMBER, start, end
+            elif index == mistake_group:
+                self.current_position = start
+                raise SyntaxError(f"Token desconhecido: {text[start:end]}")
+            else:
+                yield KINDS[text[start:end]], start, end
+
+        self.current_position = match.end() if match else position
+
+    def _generate_tokens(self) -> Iterator[Token]:
+        text = self.text
+        for kind, start, end in self._scan():
+            yield Token(TOKEN_TYPES[kind], text[start:end])
 
     def tokenize(self) -> None:
-        for match in re.finditer(self.FULL_REGEX, self.text, re.DOTALL | re.MULTILINE):
-            token_type = match.lastgroup
-            token_value = match.group()
-
-            if token_type == "branco" or token_type == "comentario":
-                continue
-            elif token_type == "erro":
-                raise SyntaxError(f"Token desconhecido: {token_value}")
-            
-            self.tokens.append(Token(token_type, token_value))
-
-    def get_tokens(self) -> List[Token]:
-        if not self.tokens:
-            self.tokens = list(self._generate_tokens())
+        buffer = TokenBuffer(self.text)
+        kinds, starts, ends = buffer.kinds.append, buffer.starts.append, buffer.ends.append
+        for kind, start, end in self._scan():
+            kinds(kind)
+            starts(start)
+            ends(end)
+        self.tokens = buffer
+
+    def get_tokens(self) -> TokenBuffer:
+        if self.tokens is None:
+            self.tokenize()
         return self.tokens
-    
+
     def __iter__(self) -> Iterator[Token]:
-        return iter(self.get_tokens())
\ No newline at end of file
+        return iter(self.get_tokens())
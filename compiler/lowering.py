@@ -0,0 +1,207 @@
+from typing import Dict, List
+from .types import Node
+from .symbols import SymbolTable
+from .ir import Block, Function, Instr, Program
+
+class IRBuilder():
+    """Traduz a AST ja validada para o IR de tres enderecos, um Function por metodo.
+
+    Cada variavel local ou parametro vira um registrador virtual que pode ser definido varias
+    vezes (to_ssa renomeia depois); campos viram palavras globais "<Classe>_<campo>", como as
+    variaveis de classe do CodeGen. A ordem de avaliacao e a mesma do CodeGen: operandos da
+    esquerda para a direita, argumentos do ultimo para o primeiro e o alvo da chamada ignorado.
+    """
+    def __init__(self, tree: Node, symbols: SymbolTable = None) -> None:
+        self.tree = tree
+        self.symbols = symbols if symbols is not None else SymbolTable(tree)
+        self.program = Program()
+        self.function: Function = None
+        self.block: Block = None
+        self.current: str = None
+        self.variables: Dict[str, int] = {}
+        self.labels = 0
+
+    def build(self) -> Program:
+        for child in self.tree.children:
+            name = child.children[0].children[0]
+            if child.label == "MAIN":
+                self.lower_main(name, child)
+                continue
+            layout = self.symbols.hierarchy.layout(name)
+            self.program.globals.extend(f"{name}_{field}" for field in layout.fields)
+            for member in child.children[2:]:
+                if member.label == "METODO":
+                    self.lower_method(name, member)
+        return self.program
+
+    def new_block(self) -> Block:
+        self.labels += 1
+        block = Block(f"block{self.labels}")
+        self.function.blocks.append(block)
+        return block
+
+    def emit(self, op: str, args: List[int] = None, imm=None, dest: bool = True) -> int:
+        temp = self.function.new_temp() if dest else None
+        self.block.instrs.append(Instr(op, temp, args, imm))
+        return temp
+
+    def start(self, name: str, params: int, current: str) -> None:
+        self.function = Function(name, params)
+        self.program.functions.append(self.function)
+        self.current = current
+        self.variables = {}
+        self.block = self.new_block()
+
+    def lower_main(self, name: str, node: Node) -> None:
+        self.start("main", 0, name)
+        for command in node.children[2:]:
+            self.lower_command(command)
+        self.emit("exit", dest=False)
+
+    def lower_method(self, class_name: str, node: Node) -> None:
+        signature = self.symbols.signature(class_name, node.children[1].children[0])
+        self.start(signature.label, len(signature.params), class_name)
+        for i, param in enumerate(signature.params):
+            self.variables[param.name] = self.emit("param", imm=i)
+        for child in node.children[3:-1]:
+            if isinstance(child, Node) and child.label == "VAR":
+                # Locais comecam em 0: toda variavel tem definicao na entrada, que domina os usos
+                self.variables[child.children[1].children[0]] = self.emit("const", imm=0)
+        for child in node.children[3:-1]:
+            if isinstance(child, Node) and child.label == "CMD":
+                self.lower_command(child)
+        self.emit("ret", [self.lower_expression(node.children[-1])], dest=False)
+
+    def field(self, name: str, class_name: str) -> str:
+        layout = self.symbols.hierarchy.layout(class_name)
+        while layout is not None and name not in layout.fields:
+            layout = layout.parent
+        if layout is None:
+            raise Exception(f"Undefined field {name} for type {class_name}")
+        return f"{layout.name}_{name}"
+
+    def read(self, name: str) -> int:
+        if name in self.variables:
+            return self.variables[name]
+        return self.emit("loadg", imm=self.field(name, self.current))
+
+    def write(self, name: str, value: int) -> None:
+        if name in self.variables:
+            self.block.instrs.append(Instr("copy", self.variables[name], [value]))
+        else:
+            self.emit("storeg", [value], self.field(name, self.current), dest=False)
+
+    def jump(self, target: Block) -> None:
+        self.emit("jump", imm=target.label, dest=False)
+
+    def lower_command(self, cmd: Node) -> None:
+        if not isinstance(cmd, Node) or not cmd.children:
+            return
+        first = cmd.children[0]
+        if first.label == "System.out.println":
+            self.emit("print", [self.lower_expression(first.children[0])], dest=False)
+        elif first.label == "CMD":
+            for child in cmd.children:
+                self.lower_command(child)
+        elif first.label == "if":
+            condition = self.lower_expression(first.children[0])
+            then_block, join = self.new_block(), self.new_block()
+            else_block = self.new_block() if len(cmd.children) > 1 else join
+            self.emit("branch", [condition], (then_block.label, else_block.label), dest=False)
+            self.block = then_block
+            self.lower_command(first.children[1])
+            self.jump(join)
+            if else_block is not join:
+                self.block = else_block
+                self.lower_command(cmd.children[1].children[0])
+                self.jump(join)
+            # O bloco de saida vai para o fim, depois dos ramos
+            self.function.blocks.remove(join)
+            self.function.blocks.append(join)
+            self.block = join
+        elif first.label == "while":
+            header = self.new_block()
+            self.jump(header)
+            self.block = header
+            condition = self.lower_expression(first.children[0])
+            body, done = self.new_block(), self.new_block()
+            self.emit("branch", [condition], (body.label, done.label), dest=False)
+            self.block = body
+            self.lower_command(first.children[1])
+            self.jump(header)
+            self.function.blocks.remove(done)
+            self.function.blocks.append(done)
+            self.block = done
+        elif cmd.type == "array_assign":
+            base = self.read(first.children[0])
+            index = self.lower_expression(cmd.children[1])
+            value = self.lower_expression(cmd.children[3])
+            self.emit("store", [base, index, value], dest=False)
+        elif len(cmd.children) == 3:
+            self.write(first.children[0], self.lower_expression(cmd.children[2]))
+
+    def operands(self, node: Node) -> List[Node]:
+        label = node.label
+        if label == "EXP" or label == "REXP" or label == "AEXP" or label == "MEXP":
+            return [node.children[0], node.children[2]]
+        elif label == "SEXP":
+            if node.type == "array_init":
+                return [node.children[2]]
+            return [node.children[1]] if node.type == "unary" else []
+        elif label == "PEXP":
+            if node.type == "method_call":
+                return node.children[2].children[::-1]
+            elif node.type == "array_access":
+                return [node.children[0], node.children[1]]
+            elif node.type == "array_length":
+                return [node.children[0]]
+            elif node.children[0].label == "reserved" or len(node.children) == 2:
+                return []
+            return [node.children[0]]
+        return []
+
+    def lower_expression(self, root: Node) -> int:
+        values: Dict[int, int] = {}
+        stack = [(root, False)]
+        while stack:
+            node, ready = stack.pop()
+            if not ready:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(self.operands(node)))
+            else:
+                values[node.id] = self.lower_node(node, [values[child.id] for child in self.operands(node)])
+        return values[root.id]
+
+    def lower_node(self, node: Node, operands: List[int]) -> int:
+        label = node.label
+        children = node.children
+        if label == "EXP" or label == "REXP" or label == "AEXP" or label == "MEXP":
+            op = {"+": "add", "-": "sub", "*": "mul", "<": "slt", "==": "seq", "!=": "sne", "&&": "and"}[children[1].children[0]]
+            return self.emit(op, operands)
+        elif label == "SEXP":
+            if node.type == "array_init":
+                return self.emit("alloc", operands)
+            if node.type == "unary":
+                base = self.emit("const", imm=0 if children[0].children[0] == "-" else 1)
+                return self.emit("sub", [base, operands[0]])
+            literal = children[0]
+            if literal.label == "number":
+                return self.emit("const", imm=int(literal.children[0]))
+            return self.emit("const", imm=1 if literal.children[0].lower() == "true" else 0)
+        elif label == "number":
+            return self.emit("const", imm=int(children[0]))
+        elif label == "identifier":
+            return self.read(children[0])
+        elif node.type == "method_call":
+            signature = self.symbols.signature(children[0].dtype, children[1].children[0])
+            return self.emit("call", operands[::-1], signature.label)
+        elif node.type == "array_access":
+            return self.emit("load", operands)
+        elif node.type == "array_length":
+            return self.emit("length", operands)
+        elif children[0].label == "reserved":
+            # Objetos nao tem representacao no CodeGen: this e new X() valem 0
+            return self.emit("const", imm=0)
+        elif len(children) == 2:
+            return self.emit("loadg", imm=self.field(children[1].children[0], children[0].dtype))
+        return operands[0]
@@ -1,73 +1,95 @@
-from .types import Token, Node
-from typing import List, Dict, Set
+from .types import Token, TokenBuffer, Node, KINDS, TOKEN_TYPES, EOF, IDENTIFIER, NUMBER
+from typing import List, Dict, FrozenSet, Set, Tuple
 
 class Parser():
-    def __init__(self, tokens: List[Token]) -> None:
-        self.tokens = [token for token in tokens if token.token_type != "whitespace" and token.token_type != "comment"]
-        self.index = 0
+    FIRST: Dict[str, Set[str]] = {
+        "PROG": {"class"},
+        "MAIN": {"class"},
+        "CLASSE": {"class"},
+        "VAR": {"int", "boolean", "id"},
+        "METODO": {"public"},
+        "TIPO": {"int", "boolean", "id"},
+        "CMD": {"{", "if", "while", "System.out.println", "id"},
+        "EXP": {"!", "-", "true", "false", "num", "null", "new", "(", "this", "id"},
+        "REXP": {"<", "==", "!="},
+        "AEXP": {"+", "-"},
+        "MEXP": {"*"},
+        "SEXP": {"!", "-", "true", "false", "num", "null", "new", "(", "this", "id"},
+        "PEXP": {"id", "this", "new", "("},
+        "EXPS": {"!", "-", "true", "false", "num", "null", "new", "(", "this", "id"},
+    }
+
+    FOLLOW: Dict[str, Set[str]] = {
+        "PROG": {"$"},
+        "MAIN": {"class", "$"},
+        "CLASSE": {"class", "$"},
+        "VAR": {"public", "}", "$"},
+        "METODO": {"public", "}", "$"},
+        "TIPO": {"id"},
+        "CMD": {"}", "else", "return"},
+        "EXP": {")", ";", "]", "&&"},
+        "REXP": {"&&"},
+        "AEXP": {"&&", "<", "==", "!="},
+        "MEXP": {"+", "-", "&&", "<", "==", "!="},
+        "SEXP": {"*", "+", "-", "&&", "<", "==", "!="},
+        "PEXP": {".", "(", "[", "*", "+", "-", "&&", "<", "==", "!="},
+        "EXPS": {")"},
+    }
+
+    # "id" e "num" nunca casaram com o valor de um token, entao ficam fora dos conjuntos por tipo
+    FIRST_KINDS: Dict[str, FrozenSet[int]] = {name: frozenset(KINDS[t] for t in terminals if t in KINDS) for name, terminals in FIRST.items()}
+    FOLLOW_KINDS: Dict[str, FrozenSet[int]] = {name: frozenset(KINDS[t] for t in terminals if t in KINDS) for name, terminals in FOLLOW.items()}
 
-        self.first: Dict[str, Set[str]] = {
-            "PROG": {"class"},
-            "MAIN": {"class"},
-            "CLASSE": {"class"},
-            "VAR": {"int", "boolean", "id"},
-            "METODO": {"public"},
-            "TIPO": {"int", "boolean", "id"},
-            "CMD": {"{", "if", "while", "System.out.println", "id"},
-            "EXP": {"!", "-", "true", "false", "num", "null", "new", "(", "this", "id"},
-            "REXP": {"<", "==", "!="},
-            "AEXP": {"+", "-"},
-            "MEXP": {"*"},
-            "SEXP": {"!", "-", "true", "false", "num", "null", "new", "(", "this", "id"},
-            "PEXP": {"id", "this", "new", "("},
-            "EXPS": {"!", "-", "true", "false", "num", "null", "new", "(", "this", "id"},
-        }
+    # Niveis de precedencia dos operadores binarios e o label do Node que cada nivel gera
+    LEVELS: Dict[int, str] = {1: "EXP", 2: "REXP", 3: "AEXP", 4: "MEXP"}
+    PRECEDENCE: Dict[int, int] = {KINDS["&&"]: 1, KINDS["<"]: 2, KINDS["=="]: 2, KINDS["!="]: 2, KINDS["+"]: 3, KINDS["-"]: 3, KINDS["*"]: 4}
+
+    def __init__(self, tokens: TokenBuffer | List[Token]) -> None:
+        self.tokens = tokens if isinstance(tokens, TokenBuffer) else TokenBuffer.from_tokens(tokens)
+        self.kinds = self.tokens.kinds
+        self.size = len(self.kinds)
+        self.index = 0
+        self.spans: Dict[int, Tuple[int, int]] = {}
 
-        self.follow: Dict[str, Set[str]] = {
-            "PROG": {"$"},
-            "MAIN": {"class", "$"},
-            "CLASSE": {"class", "$"},
-            "VAR": {"public", "}", "$"},
-            "METODO": {"public", "}", "$"},
-            "TIPO": {"id"},
-            "CMD": {"}", "else", "return"},
-            "EXP": {")", ";", "]", "&&"},
-            "REXP": {"&&"},
-            "AEXP": {"&&", "<", "==", "!="},
-            "MEXP": {"+", "-", "&&", "<", "==", "!="},
-            "SEXP": {"*", "+", "-", "&&", "<", "==", "!="},
-            "PEXP": {".", "(", "[", "*", "+", "-", "&&", "<", "==", "!="},
-            "EXPS": {")"},
-        }
+    def peek(self, offset: int = 0) -> int:
+        index = self.index + offset
+        return self.kinds[index] if index < self.size else EOF
 
     def get_token(self) -> Token:
-        return self.tokens[self.index] if self.index < len(self.tokens) else None
+        return self.tokens[self.index] if self.index < self.size else None
 
-    def consume(self, expected_type: str, expected_value: str = None) -> Token:
-        token = self.get_token()
-        if token and token.token_type == expected_type and (expected_value is None or token.value == expected_value):
+    def consume(self, expected_type: str, expected_value: str = None) -> str:
+        kind = self.kinds[self.index] if self.index < self.size else EOF
+        if expected_value is not None:
+            matched = kind == KINDS[expected_value]
+        elif expected_type == "identifier" or expected_type == "number":
+            matched = kind == KINDS[expected_type]
+        else:
+            matched = TOKEN_TYPES[kind] == expected_type
+        if matched:
             self.index += 1
-            return token
+            return self.tokens.value(self.index - 1)
         else:
             expected_desc = f"{expected_type} ('{expected_value}')" if expected_value else f"{expected_type}"
-            raise Exception(f"Expected {expected_desc}, got {repr(token)} @ {self.index}")
+            raise Exception(f"Expected {expected_desc}, got {repr(self.get_token())} @ {self.index}")
         
     def parse(self):
         return self.parse_PROG()
 
     def parse_PROG(self):
-        if self.get_token() and self.get_token().value in self.first["PROG"]:
+        if self.peek() in self.FIRST_KINDS["PROG"]:
             main = self.parse_MAIN()
             classes = []
-            while self.get_token() and self.get_token().value in self.first["CLASSE"]:
+            while self.peek() in self.FIRST_KINDS["CLASSE"]:
                 classes.append(self.parse_CLASSE())
             return Node("PROG", [main] + classes)
         else:
             raise Exception("Invalid start of program")
 
     def parse_MAIN(self):
+        start = self.index
         self.consume("reserved", "class")
-        class_name = Node("identifier", [self.consume("identifier").value])
+        class_name = Node("identifier", [self.consume("identifier")])
         self.consume("punctuation", "{")
         self.consume("reserved", "public")
         self.consume("reserved", "static")
@@ -77,134 +99,142 @@ class Parser():
         self.consume("reserved", "String")
         self.consume("punctuation", "[")
         self.consume("punctuation", "]")
-        parameter = Node("identifier", [self.consume("identifier").value])
+        parameter = Node("identifier", [self.consume("identifier")])
         self.consume("punctuation", ")")
         self.consume("punctuation", "{")
         commands = []
-        while self.get_token() and self.get_token().value not in self.follow["CMD"]:
+        while self.peek() != EOF and self.peek() not in self.FOLLOW_KINDS["CMD"]:
             commands.append(self.parse_CMD())
         self.consume("punctuation", "}")
         self.consume("punctuation", "}")
-        return Node("MAIN", [class_name, parameter] + commands)
+        main = Node("MAIN", [class_name, parameter] + commands)
+        self.spans[main.id] = (start, self.index)
+        return main
 
     def parse_CLASSE(self):
+        start = self.index
         self.consume("reserved", "class")
-        class_name = Node("identifier", [self.consume("identifier").value])
+        class_name = Node("identifier", [self.consume("identifier")])
         parent = None
-        if self.get_token() and self.get_token().value == "extends":
+        if self.peek() == KINDS["extends"]:
             self.consume("reserved", "extends")
-            parent = Node("identifier", [self.consume("identifier").value])
+            parent = Node("identifier", [self.consume("identifier")])
         self.consume("punctuation", "{")
         variables = []
-        while self.get_token() and self.get_token().value in self.first["VAR"]:
+        while self.peek() in self.FIRST_KINDS["VAR"]:
             variables.append(self.parse_VAR())
         methods = []
-        while self.get_token() and self.get_token().value in self.first["METODO"]:
+        while self.peek() in self.FIRST_KINDS["METODO"]:
             methods.append(self.parse_METODO())
         self.consume("punctuation", "}")
-        return Node("CLASSE", [class_name, parent] + variables + methods)
+        classe = Node("CLASSE", [class_name, parent] + variables + methods)
+        self.spans[classe.id] = (start, self.index)
+        return classe
 
     def parse_METODO(self):
+        start = self.index
         self.consume("reserved", "public")
         tipo = self.parse_TIPO()
-        method_name = Node("identifier", [self.consume("identifier").value])
+        method_name = Node("identifier", [self.consume("identifier")])
         self.consume("punctuation", "(")
-        params = self.parse_PARAMS() if self.get_token().value != ")" else Node("PARAMS", [])
+        params = self.parse_PARAMS() if self.peek() != KINDS[")"] else Node("PARAMS", [])
         self.consume("punctuation", ")")
         self.consume("punctuation", "{")
         variables = []
-        while self.get_token() and self.get_token().value in self.first["VAR"]:
+        while self.peek() in self.FIRST_KINDS["VAR"]:
             variables.append(self.parse_VAR())
         commands = []
-        while self.get_token() and self.get_token().value != "return":
+        while self.peek() != EOF and self.peek() != KINDS["return"]:
             commands.append(self.parse_CMD())
         self.consume("reserved", "return")
         exp = self.parse_EXP()
         self.consume("punctuation", ";")
         self.consume("punctuation", "}")
-        return Node("METODO", [tipo, method_name, params] + variables + commands + [exp])
+        metodo = Node("METODO", [tipo, method_name, params] + variables + commands + [exp])
+        self.spans[metodo.id] = (start, self.index)
+        return metodo
 
     def parse_PARAMS(self):
         params = []
-        if self.get_token() and self.get_token().value in self.first["TIPO"]:
+        if self.peek() in self.FIRST_KINDS["TIPO"]:
             params.append(self.parse_TIPO())
-            params.append(Node("identifier", [self.consume("identifier").value]))
-            while self.get_token() and self.get_token().value == ",":
+            params.append(Node("identifier", [self.consume("identifier")]))
+            while self.peek() == KINDS[","]:
                 self.consume("punctuation", ",")
                 params.append(self.parse_TIPO())
-                params.append(Node("identifier", [self.consume("identifier").value]))
+                params.append(Node("identifier", [self.consume("identifier")]))
         return Node("PARAMS", params)
 
     def parse_VAR(self):
         tipo = self.parse_TIPO()
-        var_name = Node("identifier", [self.consume("identifier").value])
+        var_name = Node("identifier", [self.consume("identifier")])
         self.consume("punctuation", ";")
         return Node("VAR", [tipo, var_name])
 
     def parse_TIPO(self):
-        token = self.get_token()
-        if token.value == "int":
+        kind = self.peek()
+        if kind == KINDS["int"]:
             self.consume("reserved", "int")
-            if self.get_token() and self.get_token().value == "[":
+            if self.peek() == KINDS["["]:
                 self.consume("punctuation", "[")
                 self.consume("punctuation", "]")
                 return Node("TIPO", [Node("reserved", ["int[]"])])
             return Node("TIPO", [Node("reserved", ["int"])])
-        elif token.value == "boolean":
+        elif kind == KINDS["boolean"]:
             self.consume("reserved", "boolean") 
             return Node("TIPO", [Node("reserved", ["boolean"])])
-        elif token.token_type == "identifier":
-            identifier = Node("identifier", [self.consume("identifier").value])
+        elif kind == IDENTIFIER:
+            identifier = Node("identifier", [self.consume("identifier")])
             return Node("TIPO", [identifier])
         else:
-            raise Exception(f"Expected type, got {repr(token)} @ {self.index}")
+            raise Exception(f"Expected type, got {repr(self.get_token())} @ {self.index}")
         
 
     def parse_CMD(self):
-        token = self.get_token()
-        if not token:
+        kind = self.peek()
+        if kind == EOF:
             return None
 
-        if token.value == "{" and token.token_type == "punctuation":
+        if kind == KINDS["{"]:
             self.consume("punctuation", "{")
             commands = []
-            while self.get_token() and self.get_token().value not in self.follow["CMD"]:
+            while self.peek() != EOF and self.peek() not in self.FOLLOW_KINDS["CMD"]:
                 commands.append(self.parse_CMD())
             self.consume("punctuation", "}")
             return Node("CMD", commands)
-        elif token.value == "if":
+        elif kind == KINDS["if"]:
             self.consume("reserved", "if")
             self.consume("punctuation", "(")
             exp = self.parse_EXP()
             self.consume("punctuation", ")")
             cmd = self.parse_CMD()
-            if self.get_token() and self.get_token().value == "else":
+            if self.peek() == KINDS["else"]:
                 self.consume("reserved", "else")
                 else_cmd = self.parse_CMD()
                 return Node("CMD", [Node("if", [exp, cmd]), Node("else", [else_cmd])])
             return Node("CMD", [Node("if", [exp, cmd])])
-        elif token.value == "while":
+        elif kind == KINDS["while"]:
             self.consume("reserved", "while")
             self.consume("punctuation", "(")
             exp = self.parse_EXP()
             self.consume("punctuation", ")")
             cmd = self.parse_CMD()
             return Node("CMD", [Node("while", [exp, cmd])])
-        elif token.value == "System.out.println":
+        elif kind == KINDS["System.out.println"]:
             self.consume("reserved", "System.out.println")
             self.consume("punctuation", "(")
             exp = self.parse_EXP()
             self.consume("punctuation", ")")
             self.consume("punctuation", ";")
             return Node("CMD", [Node("System.out.println", [exp])])
-        elif token.token_type == "identifier":
-            identifier = Node("identifier", [self.consume("identifier").value])
-            if self.get_token() and self.get_token().value == "=":
+        elif kind == IDENTIFIER:
+            identifier = Node("identifier", [self.consume("identifier")])
+            if self.peek() == KINDS["="]:
                 self.consume("operator", "=")
                 exp = self.parse_EXP()
                 self.consume("punctuation", ";")
                 return Node("CMD", [identifier, Node("operator", ["="]), exp])
-            elif self.get_token() and self.get_token().value == "[":
+            elif self.peek() == KINDS["["]:
                 self.consume("punctuation", "[")
                 index_exp = self.parse_EXP()
                 self.consume("punctuation", "]")
@@ -215,131 +245,140 @@ class Parser():
             else:
                 raise Exception("Invalid CMD structure")
         else:
-            raise Exception(f"Unexpected token {repr(token)}")
+            raise Exception(f"Unexpected token {repr(self.get_token())}")
         
     def parse_EXP(self):
-        left = self.parse_REXP()
-        while self.get_token() and self.get_token().value == "&&":
-            and_op = self.consume("operator", "&&")
-            right = self.parse_REXP()
-            left = Node("EXP", [left, Node("operator", [and_op.value]), right])
-        return left
-
-    def parse_REXP(self):
-        left = self.parse_AEXP()
-        while self.get_token() and self.get_token().value in ["<", "==", "!="]:
-            operator = Node("operator", [self.consume("operator").value])
-            right = self.parse_AEXP()
-            left = Node("REXP", [left, operator, right])
-        return left
+        # Precedence climbing iterativo: EXP/REXP/AEXP/MEXP saem da pilha de operadores e os parenteses,
+        # indices e argumentos viram quadros numa pilha explicita, entao a profundidade Python e constante
+        suspended = []
+        operands, operators, prefixes = [], [], []
+        pexp = None
+        operand = None
 
-    def parse_AEXP(self):
-        left = self.parse_MEXP()
-        while self.get_token() and self.get_token().value in ["+", "-"]:
-            operator = Node("operator", [self.consume("operator").value])
-            right = self.parse_MEXP()
-            left = Node("AEXP", [left, operator, right])
-        return left
-
-    def parse_MEXP(self):
-        left = self.parse_SEXP()
-        while self.get_token() and self.get_token().value == "*":
-            operator = Node("operator", [self.consume("operator").value])
-            right = self.parse_SEXP()
-            left = Node("MEXP", [left, operator, right])
-        return left
+        while True:
+            if operand is None and pexp is None:
+                kind = self.peek()
+                if kind == KINDS["!"] or kind == KINDS["-"]:
+                    prefixes.append(self.consume("operator"))
+                    continue
+                elif kind == KINDS["true"] or kind == KINDS["false"]:
+                    operand = Node("SEXP", [Node("reserved", [self.consume("reserved")])])
+                elif kind == NUMBER:
+                    operand = Node("SEXP", [Node("number", [self.consume("number")])])
+                elif kind == KINDS["null"]:
+                    self.consume("reserved", "null")
+                    operand = Node("SEXP", [Node("reserved", ["null"])])
+                elif kind == KINDS["new"] and self.peek(1) == KINDS["int"]:
+                    self.consume("reserved", "new")
+                    self.consume("reserved", "int")
+                    self.consume("punctuation", "[")
+                    suspended.append((operands, operators, prefixes, "array_init", None))
+                    operands, operators, prefixes = [], [], []
+                    continue
+                elif kind == IDENTIFIER:
+                    identifier = Node("identifier", [self.consume("identifier")])
+                    if self.peek() == KINDS["("]:
+                        self.consume("punctuation", "(")
+                        this = Node("PEXP", [Node("reserved", ["this"])])
+                        if self.peek() == KINDS[")"]:
+                            self.consume("punctuation", ")")
+                            # Adicionar Node "this" implícito para chamadas de método simples
+                            pexp = Node("PEXP", [this, identifier, Node("EXPS", [])], "method_call")
+                        else:
+                            suspended.append((operands, operators, prefixes, "call", (this, identifier, [])))
+                            operands, operators, prefixes = [], [], []
+                            continue
+                    else:
+                        pexp = identifier
+                elif kind == KINDS["new"]:
+                    self.consume("reserved", "new")
+                    class_name = Node("identifier", [self.consume("identifier")])
+                    self.consume("punctuation", "(")
+                    self.consume("punctuation", ")")
+                    pexp = Node("PEXP", [Node("reserved", ["new"]), class_name])
+                elif kind == KINDS["this"]:
+                    self.consume("reserved", "this")
+                    pexp = Node("PEXP", [Node("reserved", ["this"])])
+                elif kind == KINDS["("]:
+                    self.consume("punctuation", "(")
+                    suspended.append((operands, operators, prefixes, "paren", None))
+                    operands, operators, prefixes = [], [], []
+                    continue
+                else:
+                    raise Exception(f"Expected PEXP, got {repr(self.get_token())} @ {self.index}")
 
-    def parse_SEXP(self):
-        token = self.get_token()
-        if token.value == "!":
-            not_op = self.consume("operator", "!") # making our life easier
-            sexp = self.parse_SEXP()
-            op = sexp.children[0].children[0]
-            op = "false" if op == "true" else "true"
-            return Node("SEXP", [Node("boolean", [op])])
-        elif token.value == "-":
-            min_op = self.consume("operator", "-") # making our life easier
-            sexp = self.parse_SEXP()
-            num = sexp.children[0].children[0]
-            num = int(num) * -1
-            return Node("SEXP", [Node("number", [str(num)])])
-        elif token.value == "true":
-            return Node("SEXP", [Node("reserved", [self.consume("reserved", "true").value])])
-        elif token.value == "false":
-            return Node("SEXP", [Node("reserved", [self.consume("reserved", "false").value])])
-        elif token.token_type == "number":
-            num = Node("number", [self.consume("number").value])
-            return Node("SEXP", [num])
-        elif token.value == "null":
-            self.consume("reserved", "null")
-            return Node("SEXP", [Node("reserved", ["null"])])
-        elif token.value == "new" and self.tokens[self.index + 1].value == "int":
-            self.consume("reserved", "new")
-            self.consume("reserved", "int")
-            self.consume("punctuation", "[")
-            exp = self.parse_EXP()
-            self.consume("punctuation", "]")
-            return Node("SEXP", [Node("reserved", ["new"]), Node("reserved", ["int"]), exp], "array_init")
-        else:
-            pexp = self.parse_PEXP()
-            while self.get_token():
-                if self.get_token().value == ".":
+            if operand is None:
+                kind = self.peek()
+                if kind == KINDS["."]:
                     self.consume("punctuation", ".")
-                    if self.get_token().value == "length":
+                    if self.peek() == KINDS["length"]:
                         self.consume("reserved", "length")
                         pexp = Node("PEXP", [pexp], "array_length")
                     else:
-                        identifier = Node("identifier", [self.consume("identifier").value])
-                        if self.get_token().value == "(":
+                        identifier = Node("identifier", [self.consume("identifier")])
+                        if self.peek() == KINDS["("]:
                             self.consume("punctuation", "(")
-                            exps = self.parse_EXPS() if self.get_token().value != ")" else Node("EXPS", [])
-                            self.consume("punctuation", ")")
-                            pexp = Node("PEXP", [pexp, identifier, exps], "method_call")
+                            if self.peek() == KINDS[")"]:
+                                self.consume("punctuation", ")")
+                                pexp = Node("PEXP", [pexp, identifier, Node("EXPS", [])], "method_call")
+                            else:
+                                suspended.append((operands, operators, prefixes, "call", (pexp, identifier, [])))
+                                operands, operators, prefixes, pexp = [], [], [], None
                         else:
                             pexp = Node("PEXP", [pexp, identifier])
-                elif self.get_token().value == "[":
+                    continue
+                elif kind == KINDS["["]:
                     self.consume("punctuation", "[")
-                    exp = self.parse_EXP()
-                    self.consume("punctuation", "]")
-                    pexp = Node("PEXP", [pexp, exp], "array_access")
-                else:
-                    break
-            return pexp
+                    suspended.append((operands, operators, prefixes, "index", pexp))
+                    operands, operators, prefixes, pexp = [], [], [], None
+                    continue
+                operand, pexp = pexp, None
+
+            for prefix in reversed(prefixes):
+                operand = self.apply_prefix(prefix, operand)
+            prefixes = []
+            operands.append(operand)
+            operand = None
+
+            precedence = self.PRECEDENCE.get(self.peek())
+            if precedence is not None:
+                while operators and operators[-1][1] >= precedence:
+                    self.reduce_binary(operands, operators)
+                operators.append((self.consume("operator"), precedence))
+                continue
+
+            while operators:
+                self.reduce_binary(operands, operators)
+            result = operands[0]
+            if not suspended:
+                return result
 
-    def parse_PEXP(self):
-        token = self.get_token()
-        if token.token_type == "identifier":
-            identifier = Node("identifier", [self.consume("identifier").value])
-            if self.get_token() and self.get_token().value == "(":
-                self.consume("punctuation", "(")
-                exps = self.parse_EXPS() if self.get_token().value != ")" else Node("EXPS", [])
+            operands, operators, prefixes, continuation, context = suspended.pop()
+            if continuation == "paren":
                 self.consume("punctuation", ")")
-                # Adicionar Node "this" implícito para chamadas de método simples
-                return Node("PEXP", [Node("PEXP", [Node("reserved", ["this"])]), identifier, exps], "method_call")
-            return identifier
-        elif token.token_type == "number":
-            self.index += 1
-            return Node("number", [token.value])
-        elif token.token_type == "reserved" and token.value == "new":
-            self.consume("reserved", "new")
-            class_name = Node("identifier", [self.consume("identifier").value])
-            self.consume("punctuation", "(")
-            self.consume("punctuation", ")")
-            return Node("PEXP", [Node("reserved", ["new"]), class_name])
-        elif token.token_type == "reserved" and token.value == "this":
-            self.consume("reserved", "this")
-            return Node("PEXP", [Node("reserved", ["this"])])
-        elif token.token_type == "punctuation" and token.value == "(":
-            self.consume("punctuation", "(")
-            exp = self.parse_EXP()
-            self.consume("punctuation", ")")
-            return Node("PEXP", [exp])
-        else:
-            raise Exception(f"Expected PEXP, got {repr(token)} @ {self.index}")
+                pexp = Node("PEXP", [result])
+            elif continuation == "index":
+                self.consume("punctuation", "]")
+                pexp = Node("PEXP", [context, result], "array_access")
+            elif continuation == "array_init":
+                self.consume("punctuation", "]")
+                operand = Node("SEXP", [Node("reserved", ["new"]), Node("reserved", ["int"]), result], "array_init")
+            else:
+                target, identifier, exps = context
+                exps.append(result)
+                if self.peek() == KINDS[","]:
+                    self.consume("punctuation", ",")
+                    suspended.append((operands, operators, prefixes, continuation, context))
+                    operands, operators, prefixes = [], [], []
+                else:
+                    self.consume("punctuation", ")")
+                    pexp = Node("PEXP", [target, identifier, Node("EXPS", exps)], "method_call")
+
+    def reduce_binary(self, operands: List[Node], operators: List[Tuple[str, int]]) -> None:
+        right = operands.pop()
+        operator, precedence = operators.pop()
+        operands[-1] = Node(self.LEVELS[precedence], [operands[-1], Node("operator", [operator]), right])
 
-    def parse_EXPS(self):
-        exps = [self.parse_EXP()]
-        while self.get_token() and self.get_token().value == ",":
-            self.consume("punctuation", ",")
-            exps.append(self.parse_EXP())
-        return Node("EXPS", exps)
+    def apply_prefix(self, prefix: str, sexp: Node) -> Node:
+        # "!" e "-" viram um SEXP unario; literais sao dobrados depois pelo Semantic
+        return Node("SEXP", [Node("operator", [prefix]), sexp], "unary")
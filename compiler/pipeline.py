@@ -0,0 +1,96 @@
+import os
+from array import array
+from typing import Callable, Dict, List
+from .types import Node, TokenBuffer
+from .lexer import Lexer
+from .parser import Parser
+from .symbols import SymbolTable
+from .semantic import Semantic
+from .codegen import CodeGen
+from .OtimizadorMIPS import OtimizadorMIPS
+from .MIPSAssembler import MIPSAssembler
+
+class CompileOptions():
+    """Opcoes do compile_source.
+
+    registers, allocate e ir vao para o CodeGen; optimize passa o assembly pelo OtimizadorMIPS
+    e assemble gera as palavras. Com out_folder, os artefatos sao gravados la no fim (com os
+    nomes que o main.py sempre usou); sem ele, nada toca o disco.
+    """
+    def __init__(self, registers: bool = False, allocate: bool = False, ir: bool = False, optimize: bool = True,
+                 assemble: bool = True, out_folder: str = None, log: Callable[[str], None] = None) -> None:
+        self.registers = registers
+        self.allocate = allocate
+        self.ir = ir
+        self.optimize = optimize
+        self.assemble = assemble
+        self.out_folder = out_folder
+        self.log = log # mensagens de depuracao do CodeGen e erros do montador
+
+class CompileResult():
+    """O que cada etapa produziu, em memoria: tokens, AST, assembly, assembly otimizado e palavras"""
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.tokens: TokenBuffer = None
+        self.tree: Node = None
+        self.deps: list = []
+        self.symbols: SymbolTable = None
+        self.assembly: str = None
+        self.optimized: str = None
+        self.words: array = array('I')
+        self.errors: List[str] = []
+        self.stats: Dict[str, Dict] = {}
+
+    @property
+    def final_assembly(self) -> str:
+        return self.optimized if self.optimized is not None else self.assembly
+
+    def binary(self) -> bytes:
+        return MIPSAssembler.binary(self.words)
+
+    def write(self, folder: str) -> Dict[str, str]:
+        """Grava os artefatos em folder e devolve nome -> caminho"""
+        os.makedirs(folder, exist_ok=True)
+        contents = {"tokenized.txt": "".join(f"{token}\n" for token in self.tokens), "output_code.txt": self.assembly}
+        if self.optimized is not None:
+            contents["optimized_code.txt"] = self.optimized
+        paths = {}
+        for name, text in contents.items():
+            paths[name] = os.path.join(folder, name)
+            with open(paths[name], "w") as file:
+                file.write(text)
+        if self.words:
+            paths["output.bin"] = os.path.join(folder, "output.bin")
+            MIPSAssembler.write_binary(self.words, paths["output.bin"])
+        return paths
+
+def compile_source(text: str, options: CompileOptions = None) -> CompileResult:
+    """Fonte MiniJava -> palavras de maquina sem passar pelo disco.
+
+    Cada chamada tem o proprio CodeGen, otimizador e montador, entao compilacoes em paralelo
+    nao dividem estado nem arquivos. Erros de lexico, sintaxe e semantica sobem como excecao;
+    instrucoes que o montador nao conhece ficam em errors.
+    """
+    options = options if options is not None else CompileOptions()
+    result = CompileResult(text)
+    result.tokens = Lexer(text).get_tokens()
+    semantic = Semantic(Parser(result.tokens).parse())
+    result.tree, result.deps = semantic.validate_all()
+    result.symbols = semantic.symbols
+
+    codegen = CodeGen(result.tree, result.deps, result.symbols, log=options.log,
+                      registers=options.registers, allocate=options.allocate, ir=options.ir)
+    result.assembly = codegen.generate_code()
+    if options.ir:
+        result.stats["ir"] = codegen.ir_stats
+    if options.optimize:
+        otimizador = OtimizadorMIPS()
+        result.optimized = otimizador.otimizar(result.assembly)
+        result.stats["otimizador"] = otimizador.estatisticas
+    if options.assemble:
+        assembler = MIPSAssembler(log=options.log)
+        result.words = assembler.assemble_lines(result.final_assembly.split("\n"))
+        result.errors = assembler.errors
+    if options.out_folder is not None:
+        result.write(options.out_folder)
+    return result
@@ -0,0 +1,113 @@
+from typing import Dict, Iterable, List, Sequence
+from .types import Node
+
+# Peso de um uso por nivel de laco e custo de dar um $s a uma variavel. O sw no prologo e o lw
+# no epilogo rodam a cada chamada, e fora de registers cada uso ainda custa um move no lugar do
+# lw; um uso dentro de um laco ja paga o registrador, fora dele so muitos usos pagam
+LOOP_WEIGHT = 10
+SAVE_COST = LOOP_WEIGHT / 2
+
+class Interval():
+    def __init__(self, name: str, start: int) -> None:
+        self.name = name
+        self.start = start
+        self.end = start
+        self.weight = 0
+        self.register: str = None
+
+    def __repr__(self) -> str:
+        return f"Interval({self.name}, {self.start}-{self.end}, {self.register})"
+
+def linear_scan(intervals: List[Interval], registers: Sequence[str], hints: Dict = None) -> Dict:
+    """Percorre os intervalos por inicio; sem registrador livre, fica na memoria o que termina mais tarde.
+
+    hints sugere, para um intervalo, outro cujo registrador deve ser reaproveitado se estiver
+    livre no inicio dele (copias entre os dois viram move de um registrador para ele mesmo).
+    """
+    hints = hints if hints is not None else {}
+    by_name = {interval.name: interval for interval in intervals}
+    active: List[Interval] = []
+    free = list(reversed(registers))
+    for interval in sorted(intervals, key=lambda interval: interval.start):
+        for ended in [other for other in active if other.end < interval.start]:
+            active.remove(ended)
+            free.append(ended.register)
+        if free:
+            hint = by_name.get(hints.get(interval.name))
+            preferred = hint.register if hint is not None and hint.register in free else free[-1]
+            free.remove(preferred)
+            interval.register = preferred
+            active.append(interval)
+            continue
+        furthest = max(active, key=lambda other: other.end) if active else None
+        if furthest is not None and furthest.end > interval.end:
+            interval.register, furthest.register = furthest.register, None
+            active.remove(furthest)
+            active.append(interval)
+    return {interval.name: interval.register for interval in intervals if interval.register is not None}
+
+class LinearScan():
+    """Alocacao linear scan das variaveis escalares de um METODO.
+
+    Cada ocorrencia de variavel recebe uma posicao na ordem do codigo; o intervalo vai da
+    primeira a ultima ocorrencia (parametros comecam em 0) e, se cruzar um while, passa a
+    cobrir o laco inteiro. Cada uso pesa LOOP_WEIGHT por nivel de while e metade por braco de
+    if; variaveis cujo peso nao passa de SAVE_COST ficam no slot do $fp, sem registrador a
+    salvar e restaurar.
+    """
+    def __init__(self, method: Node, candidates: Iterable[str], registers: Sequence[str]) -> None:
+        self.method = method
+        self.candidates = set(candidates)
+        self.registers = list(registers)
+        self.intervals: Dict[str, Interval] = {}
+        self.loops: List[List[int]] = []
+
+    def run(self) -> Dict[str, str]:
+        self.build_intervals()
+        worth = [interval for interval in self.intervals.values() if interval.weight > SAVE_COST]
+        return linear_scan(worth, self.registers)
+
+    def build_intervals(self) -> None:
+        for param in self.method.children[2].children[1::2]:
+            self.occurs(param.children[0], 0, 0)
+        position = 1
+        # Cada entrada leva a frequencia estimada do node: LOOP_WEIGHT a mais dentro de um while,
+        # metade em cada braco de um if
+        stack = [(child, 1, False) for child in reversed(self.method.children[3:]) if isinstance(child, Node) and child.label != "VAR"]
+        while stack:
+            node, weight, done = stack.pop()
+            if done:
+                # Marcador empilhado antes dos filhos do while: fecha o laco de indice node
+                self.loops[node][1] = position
+                continue
+            position += 1
+            if node.label == "identifier":
+                self.occurs(node.children[0], position, weight)
+            elif node.label == "while":
+                self.loops.append([position, position])
+                stack.append((len(self.loops) - 1, weight, True))
+                weight *= LOOP_WEIGHT
+            branch = node.label in ("if", "else")
+            stack.extend((child, weight / 2 if branch and child.label == "CMD" else weight, False)
+                         for child in reversed(node.children) if isinstance(child, Node))
+        self.extend_over_loops()
+
+    def occurs(self, name: str, position: int, weight: float) -> None:
+        if name not in self.candidates:
+            return
+        interval = self.intervals.get(name)
+        if interval is None:
+            interval = self.intervals[name] = Interval(name, position)
+        else:
+            interval.end = position
+        interval.weight += weight
+
+    def extend_over_loops(self) -> None:
+        changed = True
+        while changed:
+            changed = False
+            for start, end in self.loops:
+                for interval in self.intervals.values():
+                    if interval.start <= end and start <= interval.end and (interval.start > start or interval.end < end):
+                        interval.start, interval.end = min(interval.start, start), max(interval.end, end)
+                        changed = True
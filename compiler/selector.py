@@ -0,0 +1,290 @@
+from typing import Dict, List, Set, Tuple
+from .ir import BINARY, Function, Instr, Program, from_ssa
+from .ir_passes import dead_code_elimination, returned_value
+from .regalloc import Interval, linear_scan
+
+class Selector():
+    """Gera MIPS a partir do IR: sai do SSA, aloca os registradores virtuais e escolhe as instrucoes.
+
+    Os registradores virtuais vao para $s0-$s7 por linear scan sobre a ordem final dos blocos
+    (usos em posicoes pares, definicoes em impares, para uma copia poder reaproveitar o
+    registrador da origem); o que sobra fica em slots de $fp e passa por $t0/$t1. Cada metodo
+    salva os $s que usa, entao nada precisa ser salvo em volta das chamadas. A convencao de
+    chamada e a do CodeGen: argumentos empilhados do ultimo para o primeiro, retorno em $v0.
+    Um call cujo valor e o proprio retorno, para um metodo com ate tantos parametros quanto
+    este, vira tailcall: os argumentos sobrescrevem os deste, o quadro e desfeito e o j faz o
+    metodo chamado voltar direto para quem chamou este, sem a pilha crescer.
+    """
+    REGISTERS = ("$s0", "$s1", "$s2", "$s3", "$s4", "$s5", "$s6", "$s7")
+
+    def __init__(self, program: Program) -> None:
+        self.program = program
+        self.text_section: List[str] = []
+        self.locations: Dict[int, str] = {}
+        self.slots: Dict[int, int] = {}
+        self.saved: List[str] = []
+        self.params: Dict[str, int] = {function.name: function.params for function in program.functions}
+
+    def select(self) -> str:
+        for function in self.program.functions:
+            if function.ssa:
+                self.fold_immediates(function)
+                dead_code_elimination(function)
+                self.tail_calls(function)
+                from_ssa(function)
+            self.select_function(function)
+        main_index = next((i for i, line in enumerate(self.text_section) if line == "main:"), 0)
+        self.text_section = self.text_section[main_index:] + self.text_section[:main_index]
+        data = "\n".join(['newline: .asciiz "\\n"'] + [f"{name}: .word 0" for name in self.program.globals])
+        text = "\n".join(self.text_section)
+        return f".data\n{data}\n.text\n.globl main\n{text}\n"
+
+    def fold_immediates(self, function: Function) -> None:
+        """Ainda em SSA: add/sub/slt com um const de 16 bits viram addi/slti; o const morto sai no DCE"""
+        constants = {instr.dest: instr.imm for block in function.blocks for instr in block.instrs
+                     if instr.op == "const" and -32768 <= instr.imm <= 32767}
+        for block in function.blocks:
+            for i, instr in enumerate(block.instrs):
+                if instr.op not in ("add", "sub", "slt"):
+                    continue
+                left, right = instr.args
+                if right in constants and (instr.op != "sub" or constants[right] != -32768):
+                    value = -constants[right] if instr.op == "sub" else constants[right]
+                    block.instrs[i] = Instr("slti" if instr.op == "slt" else "addi", instr.dest, [left], value)
+                elif left in constants and instr.op == "add":
+                    block.instrs[i] = Instr("addi", instr.dest, [right], constants[left])
+
+    def tail_calls(self, function: Function) -> None:
+        """Ainda em SSA: call seguido do ret do seu valor (direto ou pelo phi do bloco do ret) vira tailcall"""
+        if function.name == "main":
+            return
+        blocks = {block.label: block for block in function.blocks}
+        for block in function.blocks:
+            call = block.instrs[-2] if len(block.instrs) > 1 else None
+            if call is None or call.op != "call" or call.dest != returned_value(blocks, block) or self.params[call.imm] > function.params:
+                continue
+            terminator = block.terminator
+            if terminator.op == "jump":
+                for phi in blocks[terminator.imm].phis():
+                    function.drop_phi_edges(phi, lambda label: label == block.label)
+            block.instrs[-2:] = [Instr("tailcall", None, call.args, call.imm)]
+        function.remove_unreachable()
+
+    def layout(self, function: Function) -> list:
+        # O bloco do ret fica por ultimo: o epilogo fecha o metodo, como no CodeGen
+        blocks = [block for block in function.blocks if block.terminator is None or block.terminator.op != "ret"]
+        return blocks + [block for block in function.blocks if block.terminator is not None and block.terminator.op == "ret"]
+
+    def liveness(self, blocks: list) -> Tuple[Dict[str, Set[int]], Dict[str, Set[int]]]:
+        """live_out e live_in de cada bloco, por fluxo de dados para tras com worklist"""
+        uses, defs = {}, {}
+        for block in blocks:
+            used, defined = set(), set()
+            for instr in block.instrs:
+                used.update(arg for arg in instr.args if arg not in defined)
+                if instr.dest is not None:
+                    defined.add(instr.dest)
+            uses[block.label], defs[block.label] = used, defined
+        preds = {block.label: [] for block in blocks}
+        successors = {block.label: block.successors for block in blocks}
+        for block in blocks:
+            for successor in successors[block.label]:
+                preds[successor].append(block.label)
+        live_in = {block.label: set() for block in blocks}
+        live_out = {block.label: set() for block in blocks}
+        work = [block.label for block in blocks]
+        pending = set(work)
+        while work:
+            label = work.pop()
+            pending.discard(label)
+            live_out[label] = set().union(*(live_in[successor] for successor in successors[label]))
+            new = uses[label] | (live_out[label] - defs[label])
+            if new != live_in[label]:
+                live_in[label] = new
+                for pred in preds[label]:
+                    if pred not in pending:
+                        pending.add(pred)
+                        work.append(pred)
+        return live_out, live_in
+
+    def allocate(self, blocks: list) -> List[int]:
+        """Preenche locations e devolve os registradores virtuais que ficaram sem registrador"""
+        live_out, live_in = self.liveness(blocks)
+        intervals: Dict[int, Interval] = {}
+        hints: Dict[int, int] = {}
+
+        def touch(temp: int, position: int) -> None:
+            interval = intervals.get(temp)
+            if interval is None:
+                intervals[temp] = Interval(temp, position)
+            else:
+                interval.start = min(interval.start, position)
+                interval.end = max(interval.end, position)
+
+        position = 0
+        for block in blocks:
+            start = position
+            for temp in live_in[block.label]:
+                touch(temp, start)
+            for instr in block.instrs:
+                position += 2
+                for arg in instr.args:
+                    touch(arg, position)
+                if instr.dest is not None:
+                    touch(instr.dest, position + 1)
+                    if instr.op == "copy":
+                        hints[instr.dest] = instr.args[0]
+            position += 2
+            for temp in live_out[block.label]:
+                touch(temp, position)
+
+        self.locations = linear_scan(list(intervals.values()), self.REGISTERS, hints)
+        return [temp for temp in intervals if temp not in self.locations]
+
+    def select_function(self, function: Function) -> None:
+        blocks = self.layout(function)
+        spilled = self.allocate(blocks)
+        used = set(self.locations.values())
+        self.saved = [register for register in self.REGISTERS if register in used] if function.name != "main" else []
+        # Depois de $fp e $ra vem os $s salvos e depois os spills
+        self.slots = {temp: -8 - 4 * (len(self.saved) + i) for i, temp in enumerate(spilled)}
+        frame = 8 + 4 * (len(self.saved) + len(self.slots))
+
+        self.text_section.append(f"{function.name}:")
+        self.text_section.append("\tsw $fp, 0($sp)")
+        self.text_section.append("\tmove $fp, $sp")
+        self.text_section.append("\tsw $ra, -4($sp)")
+        for i, register in enumerate(self.saved):
+            self.text_section.append(f"\tsw {register}, {-8 - 4 * i}($fp)")
+        self.text_section.append(f"\taddiu $sp, $sp, {-frame}")
+
+        for i, block in enumerate(blocks):
+            following = blocks[i + 1].label if i + 1 < len(blocks) else None
+            self.text_section.append(f"{block.label}:")
+            for instr in block.instrs:
+                self.select_instr(instr, following)
+
+    def use(self, temp: int, scratch: str) -> str:
+        if temp in self.locations:
+            return self.locations[temp]
+        self.text_section.append(f"\tlw {scratch}, {self.slots[temp]}($fp)")
+        return scratch
+
+    def define(self, temp: int) -> str:
+        return self.locations.get(temp, "$t0")
+
+    def store(self, temp: int) -> None:
+        if temp in self.slots:
+            self.text_section.append(f"\tsw $t0, {self.slots[temp]}($fp)")
+
+    def select_instr(self, instr: Instr, following: str) -> None:
+        op = instr.op
+        emit = self.text_section.append
+        if op == "jump":
+            if instr.imm != following:
+                emit(f"\tb {instr.imm}")
+            return
+        if op == "branch":
+            condition = self.use(instr.args[0], "$t0")
+            taken, other = instr.imm
+            emit(f"\tbeqz {condition}, {other}")
+            if taken != following:
+                emit(f"\tb {taken}")
+            return
+        if op == "ret":
+            emit(f"\tmove $v0, {self.use(instr.args[0], '$t0')}")
+            for i, register in enumerate(self.saved):
+                emit(f"\tlw {register}, {-8 - 4 * i}($fp)")
+            emit("\tlw $ra, -4($fp)")
+            emit("\tmove $sp, $fp")
+            emit("\tlw $fp, 0($fp)")
+            emit("\tjr $ra")
+            return
+        if op == "tailcall":
+            # Os params deste metodo ja foram lidos na entrada: os argumentos vao para os slots deles
+            for i, arg in enumerate(instr.args):
+                emit(f"\tsw {self.use(arg, '$t0')}, {4 + 4 * i}($fp)")
+            for i, register in enumerate(self.saved):
+                emit(f"\tlw {register}, {-8 - 4 * i}($fp)")
+            emit("\tlw $ra, -4($fp)")
+            emit("\tmove $sp, $fp")
+            emit("\tlw $fp, 0($fp)")
+            emit(f"\tj {instr.imm}")
+            return
+        if op == "exit":
+            emit("\tli $v0, 10")
+            emit("\tsyscall")
+            return
+        if op == "print":
+            emit(f"\tmove $a0, {self.use(instr.args[0], '$t0')}")
+            emit("\tli $v0, 1")
+            emit("\tsyscall")
+            emit("\tli $v0, 4")
+            emit("\tla $a0, newline")
+            emit("\tsyscall")
+            return
+        if op == "store":
+            base, index, value = self.use(instr.args[0], "$t0"), self.use(instr.args[1], "$t1"), self.use(instr.args[2], "$a0")
+            emit(f"\tsll $t1, {index}, 2")
+            emit(f"\tadd $t1, $t1, {base}")
+            emit(f"\tsw {value}, 4($t1)")
+            return
+        if op == "storep":
+            emit(f"\tsw {self.use(instr.args[1], '$a0')}, {instr.imm}({self.use(instr.args[0], '$t0')})")
+            return
+        if op == "storeg":
+            emit(f"\tsw {self.use(instr.args[0], '$t0')}, {instr.imm}")
+            return
+        if op == "call":
+            count = len(instr.args)
+            if count:
+                emit(f"\taddiu $sp, $sp, {-4 * count}")
+                for i, arg in enumerate(instr.args):
+                    emit(f"\tsw {self.use(arg, '$t0')}, {4 + 4 * i}($sp)")
+            emit(f"\tjal {instr.imm}")
+            if count:
+                emit(f"\taddiu $sp, $sp, {4 * count}")
+            if instr.dest in self.locations or instr.dest in self.slots:
+                emit(f"\tmove {self.define(instr.dest)}, $v0")
+                self.store(instr.dest)
+            return
+
+        dest = self.define(instr.dest)
+        if op == "const":
+            emit(f"\tli {dest}, {instr.imm}")
+        elif op == "copy":
+            source = self.use(instr.args[0], "$t1")
+            if source != dest:
+                emit(f"\tmove {dest}, {source}")
+        elif op == "addi":
+            emit(f"\taddiu {dest}, {self.use(instr.args[0], '$t0')}, {instr.imm}")
+        elif op == "slti":
+            emit(f"\tslti {dest}, {self.use(instr.args[0], '$t0')}, {instr.imm}")
+        elif op in BINARY:
+            emit(f"\t{op} {dest}, {self.use(instr.args[0], '$t0')}, {self.use(instr.args[1], '$t1')}")
+        elif op == "param":
+            emit(f"\tlw {dest}, {4 + 4 * instr.imm}($fp)")
+        elif op == "loadg":
+            emit(f"\tlw {dest}, {instr.imm}")
+        elif op == "length":
+            emit(f"\tlw {dest}, 0({self.use(instr.args[0], '$t0')})")
+        elif op == "load":
+            base, index = self.use(instr.args[0], "$t0"), self.use(instr.args[1], "$t1")
+            emit(f"\tsll $t1, {index}, 2")
+            emit(f"\tadd $t1, $t1, {base}")
+            emit(f"\tlw {dest}, 4($t1)")
+        elif op == "addr":
+            base, index = self.use(instr.args[0], "$t0"), self.use(instr.args[1], "$t1")
+            emit(f"\tsll $t1, {index}, 2")
+            emit(f"\tadd {dest}, $t1, {base}")
+        elif op == "loadp":
+            emit(f"\tlw {dest}, {instr.imm}({self.use(instr.args[0], '$t0')})")
+        elif op == "alloc":
+            size = self.use(instr.args[0], "$t1")
+            emit(f"\tsll $a0, {size}, 2")
+            emit("\taddiu $a0, $a0, 4")
+            emit("\tli $v0, 9")
+            emit("\tsyscall")
+            emit(f"\tsw {size}, 0($v0)")
+            emit(f"\tmove {dest}, $v0")
+        self.store(instr.dest)
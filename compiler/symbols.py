@@ -0,0 +1,128 @@
+from typing import Dict, List, Tuple
+from .types import Node
+from .hierarchy import ClassHierarchy
+
+class Symbol():
+    def __init__(self, name: str, dtype: str, kind: str, position: int = 0) -> None:
+        self.name = name
+        self.dtype = dtype
+        self.kind = kind # "class", "field", "param" ou "local"
+        self.position = position
+
+    def __repr__(self) -> str:
+        return f"<{self.kind} {self.dtype} {self.name}>"
+
+class Scope():
+    """Um nivel da tabela (program, class ou method); a busca sobe pelos pais"""
+    def __init__(self, name: str, kind: str, parent: 'Scope' = None) -> None:
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.symbols: Dict[str, Symbol] = {}
+
+    def declare(self, symbol: Symbol) -> Symbol:
+        if symbol.name in self.symbols:
+            raise Exception(f"{symbol.name} already declared in {self.kind} {self.name}")
+        self.symbols[symbol.name] = symbol
+        return symbol
+
+    def lookup(self, name: str) -> Symbol:
+        scope = self
+        while scope is not None:
+            symbol = scope.symbols.get(name)
+            if symbol is not None:
+                return symbol
+            scope = scope.parent
+        return None
+
+class Signature():
+    def __init__(self, owner: str, name: str, params: List[Symbol], returns: str, node: Node) -> None:
+        self.owner = owner # classe que declara o metodo
+        self.name = name
+        self.params = params
+        self.returns = returns
+        self.node = node
+
+    @property
+    def label(self) -> str:
+        return f"{self.owner}.{self.name}"
+
+    def __repr__(self) -> str:
+        return f"{self.returns} {self.label}({', '.join(f'{param.dtype} {param.name}' for param in self.params)})"
+
+class SymbolTable():
+    """Tabela hierarquica program -> class -> method, com um indice (classe, metodo) -> assinatura.
+
+    O escopo de uma classe tem como pai o escopo da superclasse, entao campos herdados saem da
+    mesma busca; metodos herdados entram no indice na primeira consulta. Espera as classes em
+    ordem topologica (pais antes dos filhos), como o Semantic.sort_ast deixa a arvore.
+    """
+    def __init__(self, tree: Node, hierarchy: ClassHierarchy = None) -> None:
+        self.hierarchy = hierarchy if hierarchy is not None else ClassHierarchy([(child.children[0].children[0], child.children[1].children[0] if child.children[1] is not None else None, child) for child in tree.children if child.label == "CLASSE"])
+        self.program = Scope("program", "program")
+        self.classes: Dict[str, Scope] = {}
+        self.methods: Dict[Tuple[str, str], Scope] = {}
+        self.signatures: Dict[Tuple[str, str], Signature] = {}
+        self.main: str = None
+        for child in tree.children:
+            if child.label == "MAIN":
+                self.declare_main(child)
+            else:
+                self.declare_class(child)
+
+    def declare_class_scope(self, name: str, parent: str) -> Scope:
+        self.program.declare(Symbol(name, name, "class"))
+        if parent is not None and parent not in self.classes:
+            raise Exception(f"Class {name} extends undeclared class {parent}")
+        scope = self.classes[name] = Scope(name, "class", self.classes[parent] if parent is not None else self.program)
+        return scope
+
+    def declare_main(self, node: Node) -> None:
+        self.main = node.children[0].children[0]
+        scope = self.declare_class_scope(self.main, None)
+        method = self.methods[(self.main, "main")] = Scope("main", "method", scope)
+        method.declare(Symbol(node.children[1].children[0], "String[]", "param"))
+
+    def declare_class(self, node: Node) -> None:
+        name = node.children[0].children[0]
+        scope = self.declare_class_scope(name, node.children[1].children[0] if node.children[1] is not None else None)
+        layout = self.hierarchy.layout(name)
+        for member in node.children[2:]:
+            if member.label == "VAR":
+                field = member.children[1].children[0]
+                scope.declare(Symbol(field, self.type_name(member.children[0]), "field", layout.fields.get(field, 0)))
+            elif member.label == "METODO":
+                signature = self.declare_method(name, scope, member)
+                if (name, signature.name) in self.signatures:
+                    raise Exception(f"Method {signature.name} already declared in class {name}")
+                self.signatures[(name, signature.name)] = signature
+
+    def declare_method(self, class_name: str, class_scope: Scope, node: Node) -> Signature:
+        name = node.children[1].children[0]
+        scope = self.methods[(class_name, name)] = Scope(name, "method", class_scope)
+        params = node.children[2].children
+        symbols = [scope.declare(Symbol(params[i + 1].children[0], self.type_name(params[i]), "param", i // 2)) for i in range(0, len(params), 2)]
+        position = 0
+        for local in node.children[3:-1]:
+            if isinstance(local, Node) and local.label == "VAR":
+                scope.declare(Symbol(local.children[1].children[0], self.type_name(local.children[0]), "local", position))
+                position += 1
+        return Signature(class_name, name, symbols, self.type_name(node.children[0]), node)
+
+    def type_name(self, tipo: Node) -> str:
+        return tipo.children[0].children[0]
+
+    def signature(self, class_name: str, method: str) -> Signature:
+        signature = self.signatures.get((class_name, method))
+        if signature is None and class_name in self.hierarchy.layouts:
+            # Metodo herdado: sobe pelos layouts uma vez e guarda no indice
+            owner = self.hierarchy.layouts[class_name].method_owner(method)
+            if owner is not None:
+                signature = self.signatures[(class_name, method)] = self.signatures[(owner.name, method)]
+        return signature
+
+    def scope(self, class_name: str, method: str = None) -> Scope:
+        return self.classes[class_name] if method is None else self.methods[(class_name, method)]
+
+    def is_subclass(self, name: str, ancestor: str) -> bool:
+        return self.hierarchy.is_subclass(name, ancestor)
@@ -0,0 +1,378 @@
+from typing import Callable, Dict, List, Set, Tuple
+from .types import Node, KINDS, TERMINALS, TOKEN_TYPES, EOF
+from .parser import Parser
+
+# Gramatica LL(1) da MiniJava com acoes semanticas ("@acao") que montam os mesmos Nodes do Parser recursivo.
+# Terminais sao os nomes de compiler.types.TERMINALS; as chaves do dicionario sao os nao-terminais.
+GRAMMAR: Dict[str, List[List[str]]] = {
+    "PROG": [["MAIN", "@list", "CLASSES", "@prog"]],
+    "CLASSES": [["CLASSE", "@append", "CLASSES"], []],
+    "MAIN": [["class", "identifier", "{", "public", "static", "void", "main", "(", "String", "[", "]", "identifier", ")", "{", "@list", "CMDS", "}", "}", "@main"]],
+    "CLASSE": [["class", "identifier", "EXTENDS", "{", "@list", "VARS", "@list", "METODOS", "}", "@classe"]],
+    "EXTENDS": [["extends", "identifier", "@identifier"], ["@none"]],
+    "VARS": [["VAR", "@append", "VARS"], []],
+    "VAR": [["VAR_TIPO", "identifier", ";", "@var"]],
+    "VAR_TIPO": [["int", "INT_TIPO"], ["boolean", "@boolean"]],
+    "TIPO": [["int", "INT_TIPO"], ["boolean", "@boolean"], ["identifier", "@class_tipo"]],
+    "INT_TIPO": [["[", "]", "@int_array"], ["@int"]],
+    "METODOS": [["METODO", "@append", "METODOS"], []],
+    "METODO": [["public", "TIPO", "identifier", "(", "PARAMS", ")", "{", "@list", "VARS", "@list", "CMDS", "return", "EXP", ";", "}", "@metodo"]],
+    "PARAMS": [["VAR_TIPO", "identifier", "@params", "PARAMS_TAIL"], ["@empty_params"]],
+    "PARAMS_TAIL": [[",", "TIPO", "identifier", "@param", "PARAMS_TAIL"], []],
+    "CMDS": [["CMD", "@append", "CMDS"], []],
+    "CMD": [
+        ["{", "@list", "CMDS", "}", "@block"],
+        ["if", "(", "EXP", ")", "CMD", "ELSE"],
+        ["while", "(", "EXP", ")", "CMD", "@while"],
+        ["System.out.println", "(", "EXP", ")", ";", "@print"],
+        ["identifier", "ASSIGN"],
+    ],
+    "ELSE": [["else", "CMD", "@if_else"], ["@if"]],
+    "ASSIGN": [["=", "EXP", ";", "@assign"], ["[", "EXP", "]", "=", "EXP", ";", "@array_assign"]],
+    "EXP": [["REXP", "EXP_TAIL"]],
+    "EXP_TAIL": [["&&", "REXP", "@exp", "EXP_TAIL"], []],
+    "REXP": [["AEXP", "REXP_TAIL"]],
+    "REXP_TAIL": [["<", "AEXP", "@rexp", "REXP_TAIL"], ["==", "AEXP", "@rexp", "REXP_TAIL"], ["!=", "AEXP", "@rexp", "REXP_TAIL"], []],
+    "AEXP": [["MEXP", "AEXP_TAIL"]],
+    "AEXP_TAIL": [["+", "MEXP", "@aexp", "AEXP_TAIL"], ["-", "MEXP", "@aexp", "AEXP_TAIL"], []],
+    "MEXP": [["SEXP", "MEXP_TAIL"]],
+    "MEXP_TAIL": [["*", "SEXP", "@mexp", "MEXP_TAIL"], []],
+    "SEXP": [
+        ["!", "SEXP", "@unary"],
+        ["-", "SEXP", "@unary"],
+        ["true", "@true"],
+        ["false", "@false"],
+        ["number", "@number"],
+        ["null", "@null"],
+        ["new", "NEW"],
+        ["PEXP", "POSTFIX"],
+    ],
+    "NEW": [["int", "[", "EXP", "]", "@array_init"], ["identifier", "(", ")", "@new_object", "POSTFIX"]],
+    "PEXP": [["identifier", "CALL_THIS"], ["this", "@this"], ["(", "EXP", ")", "@paren"]],
+    "CALL_THIS": [["(", "EXPS", ")", "@this_call"], ["@identifier"]],
+    "POSTFIX": [[".", "MEMBER", "POSTFIX"], ["[", "EXP", "]", "@array_access", "POSTFIX"], []],
+    "MEMBER": [["length", "@length"], ["identifier", "CALL"]],
+    "CALL": [["(", "EXPS", ")", "@method_call"], ["@field"]],
+    "EXPS": [["EXP", "@exps", "EXPS_TAIL"], ["@empty_exps"]],
+    "EXPS_TAIL": [[",", "EXP", "@exps_append", "EXPS_TAIL"], []],
+}
+
+def identifier(name: str) -> Node:
+    return Node("identifier", [name])
+
+def binary(label: str) -> Callable[[list], None]:
+    def action(values: list) -> None:
+        right = values.pop()
+        operator = values.pop()
+        values[-1] = Node(label, [values[-1], Node("operator", [operator]), right])
+    return action
+
+def unary(values: list) -> None:
+    sexp = values.pop()
+    values[-1] = Node("SEXP", [Node("operator", [values[-1]]), sexp], "unary")
+
+def append(values: list) -> None:
+    item = values.pop()
+    values[-1].append(item)
+
+def prog(values: list) -> None:
+    classes = values.pop()
+    values[-1] = Node("PROG", [values[-1]] + classes)
+
+def main(values: list) -> None:
+    commands = values.pop()
+    parameter = values.pop()
+    values[-1] = Node("MAIN", [identifier(values[-1]), identifier(parameter)] + commands)
+
+def classe(values: list) -> None:
+    methods = values.pop()
+    variables = values.pop()
+    parent = values.pop()
+    values[-1] = Node("CLASSE", [identifier(values[-1]), parent] + variables + methods)
+
+def var(values: list) -> None:
+    name = values.pop()
+    values[-1] = Node("VAR", [values[-1], identifier(name)])
+
+def metodo(values: list) -> None:
+    exp = values.pop()
+    commands = values.pop()
+    variables = values.pop()
+    params = values.pop()
+    name = values.pop()
+    values[-1] = Node("METODO", [values[-1], identifier(name), params] + variables + commands + [exp])
+
+def params(values: list) -> None:
+    name = values.pop()
+    values[-1] = Node("PARAMS", [values[-1], identifier(name)])
+
+def param(values: list) -> None:
+    name = values.pop()
+    tipo = values.pop()
+    values[-1].children += [tipo, identifier(name)]
+
+def if_else(values: list) -> None:
+    else_cmd = values.pop()
+    cmd = values.pop()
+    values[-1] = Node("CMD", [Node("if", [values[-1], cmd]), Node("else", [else_cmd])])
+
+def if_(values: list) -> None:
+    cmd = values.pop()
+    values[-1] = Node("CMD", [Node("if", [values[-1], cmd])])
+
+def while_(values: list) -> None:
+    cmd = values.pop()
+    values[-1] = Node("CMD", [Node("while", [values[-1], cmd])])
+
+def assign(values: list) -> None:
+    exp = values.pop()
+    values.pop()
+    values[-1] = Node("CMD", [identifier(values[-1]), Node("operator", ["="]), exp])
+
+def array_assign(values: list) -> None:
+    value_exp = values.pop()
+    values.pop()
+    index_exp = values.pop()
+    values[-1] = Node("CMD", [identifier(values[-1]), index_exp, Node("operator", ["="]), value_exp], "array_assign")
+
+def this_call(values: list) -> None:
+    exps = values.pop()
+    values[-1] = Node("PEXP", [Node("PEXP", [Node("reserved", ["this"])]), identifier(values[-1]), exps], "method_call")
+
+def method_call(values: list) -> None:
+    exps = values.pop()
+    name = values.pop()
+    values[-1] = Node("PEXP", [values[-1], identifier(name), exps], "method_call")
+
+def field(values: list) -> None:
+    name = values.pop()
+    values[-1] = Node("PEXP", [values[-1], identifier(name)])
+
+def array_access(values: list) -> None:
+    exp = values.pop()
+    values[-1] = Node("PEXP", [values[-1], exp], "array_access")
+
+def exps_append(values: list) -> None:
+    exp = values.pop()
+    values[-1].children.append(exp)
+
+def wrap(build: Callable[[object], Node]) -> Callable[[list], None]:
+    def action(values: list) -> None:
+        values[-1] = build(values[-1])
+    return action
+
+def push(build: Callable[[], object]) -> Callable[[list], None]:
+    def action(values: list) -> None:
+        values.append(build())
+    return action
+
+ACTIONS: Dict[str, Callable[[list], None]] = {
+    "@list": push(list),
+    "@none": push(lambda: None),
+    "@append": append,
+    "@prog": prog,
+    "@main": main,
+    "@classe": classe,
+    "@identifier": wrap(identifier),
+    "@var": var,
+    "@int": push(lambda: Node("TIPO", [Node("reserved", ["int"])])),
+    "@int_array": push(lambda: Node("TIPO", [Node("reserved", ["int[]"])])),
+    "@boolean": push(lambda: Node("TIPO", [Node("reserved", ["boolean"])])),
+    "@class_tipo": wrap(lambda name: Node("TIPO", [identifier(name)])),
+    "@metodo": metodo,
+    "@params": params,
+    "@param": param,
+    "@empty_params": push(lambda: Node("PARAMS", [])),
+    "@block": wrap(lambda commands: Node("CMD", commands)),
+    "@if": if_,
+    "@if_else": if_else,
+    "@while": while_,
+    "@print": wrap(lambda exp: Node("CMD", [Node("System.out.println", [exp])])),
+    "@assign": assign,
+    "@array_assign": array_assign,
+    "@exp": binary("EXP"),
+    "@rexp": binary("REXP"),
+    "@aexp": binary("AEXP"),
+    "@mexp": binary("MEXP"),
+    "@unary": unary,
+    "@true": push(lambda: Node("SEXP", [Node("reserved", ["true"])])),
+    "@false": push(lambda: Node("SEXP", [Node("reserved", ["false"])])),
+    "@number": wrap(lambda num: Node("SEXP", [Node("number", [num])])),
+    "@null": push(lambda: Node("SEXP", [Node("reserved", ["null"])])),
+    "@array_init": wrap(lambda exp: Node("SEXP", [Node("reserved", ["new"]), Node("reserved", ["int"]), exp], "array_init")),
+    "@new_object": wrap(lambda name: Node("PEXP", [Node("reserved", ["new"]), identifier(name)])),
+    "@this": push(lambda: Node("PEXP", [Node("reserved", ["this"])])),
+    "@paren": wrap(lambda exp: Node("PEXP", [exp])),
+    "@this_call": this_call,
+    "@length": wrap(lambda pexp: Node("PEXP", [pexp], "array_length")),
+    "@method_call": method_call,
+    "@field": field,
+    "@array_access": array_access,
+    "@exps": wrap(lambda exp: Node("EXPS", [exp])),
+    "@exps_append": exps_append,
+    "@empty_exps": push(lambda: Node("EXPS", [])),
+}
+
+class ParseTable():
+    """Tabela preditiva LL(1) calculada a partir de FIRST/FOLLOW da gramatica, indexada pelo codigo do token"""
+    def __init__(self, grammar: Dict[str, List[List[str]]], actions: Dict[str, Callable[[list], None]], start: str) -> None:
+        self.grammar = grammar
+        self.nonterminals: List[str] = list(grammar)
+        self.first: Dict[str, Set[str]] = {name: set() for name in grammar}
+        self.nullable: Set[str] = set()
+        self.follow: Dict[str, Set[str]] = {name: set() for name in grammar}
+        self.follow[start].add("$")
+        self.compute_first()
+        self.compute_follow()
+
+        # Simbolos viram inteiros: terminais sao os codigos de KINDS, nao-terminais vem depois e acoes depois deles
+        base = len(TERMINALS)
+        self.symbols: Dict[str, int] = dict(KINDS)
+        self.symbols.update({name: base + i for i, name in enumerate(self.nonterminals)})
+        self.action_base = base + len(self.nonterminals)
+        self.actions: List[Callable[[list], None]] = list(actions.values())
+        self.symbols.update({name: self.action_base + i for i, name in enumerate(actions)})
+        self.start = self.symbols[start]
+
+        self.predict: Dict[Tuple[str, str], List[str]] = {}
+        for name in self.nonterminals:
+            epsilon = None
+            for production in grammar[name]:
+                first, nullable = self.first_of(production)
+                for terminal in first:
+                    if (name, terminal) in self.predict:
+                        raise Exception(f"Grammar is not LL(1): conflict in {name} on '{terminal}'")
+                    self.predict[name, terminal] = production
+                if nullable:
+                    epsilon = production
+            if epsilon is not None:
+                # Producoes vazias so ocupam as entradas livres do FOLLOW: o "else" fica com o if mais proximo
+                for terminal in self.follow[name]:
+                    self.predict.setdefault((name, terminal), epsilon)
+
+        # Cada entrada guarda (consome o lookahead?, resto da expansao invertido para a pilha)
+        self.rows: List[List[Tuple[bool, Tuple[int, ...]]]] = [[None] * len(TERMINALS) for _ in self.nonterminals]
+        for (name, terminal), production in self.predict.items():
+            expansion = self.expand(production, terminal)
+            # Sem acao antes dele, o terminal que escolheu a producao ja e consumido na predicao
+            consumes = bool(expansion) and expansion[0] == terminal
+            if consumes:
+                expansion = expansion[1:]
+            self.rows[self.symbols[name] - base][KINDS[terminal]] = (consumes, tuple(self.symbols[symbol] for symbol in reversed(expansion)))
+
+    def expand(self, production: List[str], terminal: str) -> List[str]:
+        """Expande os nao-terminais do inicio da producao com o mesmo lookahead, ate o terminal que ele casa.
+
+        Como a escolha so depende do lookahead, a cadeia EXP -> REXP -> ... -> PEXP vira uma unica entrada.
+        """
+        expansion = []
+        for i, symbol in enumerate(production):
+            if self.is_action(symbol):
+                expansion.append(symbol)
+            elif symbol in self.grammar:
+                inner = self.expand(self.predict[symbol, terminal], terminal)
+                expansion += inner
+                if any(done in KINDS for done in inner):
+                    return expansion + production[i + 1:]
+            else:
+                return expansion + production[i:]
+        return expansion
+
+    def expected(self, nonterminal: int) -> List[str]:
+        return [TERMINALS[kind] for kind, production in enumerate(self.rows[nonterminal]) if production is not None]
+
+    def is_action(self, symbol: str) -> bool:
+        return symbol.startswith("@")
+
+    def first_of(self, production: List[str]) -> Tuple[Set[str], bool]:
+        first = set()
+        for symbol in production:
+            if self.is_action(symbol):
+                continue
+            if symbol not in self.grammar:
+                first.add(symbol)
+                return first, False
+            first |= self.first[symbol]
+            if symbol not in self.nullable:
+                return first, False
+        return first, True
+
+    def compute_first(self) -> None:
+        changed = True
+        while changed:
+            changed = False
+            for name, productions in self.grammar.items():
+                for production in productions:
+                    first, nullable = self.first_of(production)
+                    if not first <= self.first[name]:
+                        self.first[name] |= first
+                        changed = True
+                    if nullable and name not in self.nullable:
+                        self.nullable.add(name)
+                        changed = True
+
+    def compute_follow(self) -> None:
+        changed = True
+        while changed:
+            changed = False
+            for name, productions in self.grammar.items():
+                for production in productions:
+                    symbols = [symbol for symbol in production if not self.is_action(symbol)]
+                    for i, symbol in enumerate(symbols):
+                        if symbol not in self.grammar:
+                            continue
+                        first, nullable = self.first_of(symbols[i + 1:])
+                        follow = first | self.follow[name] if nullable else first
+                        if not follow <= self.follow[symbol]:
+                            self.follow[symbol] |= follow
+                            changed = True
+
+TABLE = ParseTable(GRAMMAR, ACTIONS, "PROG")
+
+class TableParser(Parser):
+    """Parser preditivo com pilha explicita: sem recursao, o aninhamento de CMDs e EXPs nao tem limite"""
+    def parse(self):
+        return self.parse_table(TABLE.start)
+
+    def parse_table(self, start: int) -> Node:
+        kinds = self.kinds
+        tokens = self.tokens
+        rows = TABLE.rows
+        actions = TABLE.actions
+        base = len(TERMINALS)
+        action_base = TABLE.action_base
+        # identificadores, numeros e operadores empilham o texto do token para as acoes
+        carries_value = [token_type in ("identifier", "number", "operator") for token_type in TOKEN_TYPES]
+
+        source = tokens.source
+        starts, ends = tokens.starts, tokens.ends
+        lookahead = kinds.tolist() + [EOF]
+        stack = [start]
+        values = []
+        index = self.index
+        while stack:
+            symbol = stack.pop()
+            if symbol < base:
+                if lookahead[index] != symbol:
+                    self.index = index
+                    raise Exception(f"Expected {TERMINALS[symbol]}, got {repr(self.get_token())} @ {index}")
+                if carries_value[symbol]:
+                    values.append(source[starts[index]:ends[index]])
+                index += 1
+            elif symbol < action_base:
+                kind = lookahead[index]
+                entry = rows[symbol - base][kind]
+                if entry is None:
+                    self.index = index
+                    raise Exception(f"Expected one of {TABLE.expected(symbol - base)}, got {repr(self.get_token())} @ {index}")
+                consumes, production = entry
+                if consumes:
+                    if carries_value[kind]:
+                        values.append(source[starts[index]:ends[index]])
+                    index += 1
+                stack.extend(production)
+            else:
+                actions[symbol - action_base](values)
+
+        self.index = index
+        return values[-1]
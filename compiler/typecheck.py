@@ -0,0 +1,185 @@
+from typing import List, Tuple
+from .types import Node
+from .symbols import Scope, Signature, SymbolTable
+
+class TypeChecker():
+    """Calcula uma vez, de baixo para cima, o tipo, a constancia e o uso de variaveis de cada expressao.
+
+    Os resultados ficam em dtype/constant/uses_variables do proprio Node; tipos sao "int", "boolean",
+    "int[]", "null" ou o nome de uma classe. Expressoes e comandos sao percorridos com pilha explicita.
+    Cada chamada de metodo fica em calls com a assinatura resolvida, para a validacao dos argumentos.
+    """
+    def __init__(self, tree: Node, symbols: SymbolTable = None) -> None:
+        self.tree = tree
+        self.symbols = symbols if symbols is not None else SymbolTable(tree)
+        self.calls: List[Tuple[Node, Signature]] = []
+
+    def check(self) -> Node:
+        for child in self.tree.children:
+            name = child.children[0].children[0]
+            if child.label == "MAIN":
+                self.check_commands(child.children[2:], self.symbols.scope(name, "main"), name)
+                continue
+            for member in child.children[2:]:
+                if member.label == "METODO":
+                    self.check_method(self.symbols.signature(name, member.children[1].children[0]), name)
+        return self.tree
+
+    def assignable(self, source: str, target: str) -> bool:
+        if source == target:
+            return True
+        if source == "null":
+            return target not in ("int", "boolean")
+        return self.symbols.is_subclass(source, target)
+
+    def check_method(self, signature: Signature, current: str) -> None:
+        scope = self.symbols.scope(current, signature.name)
+        body = signature.node.children
+        self.check_commands([child for child in body[3:-1] if isinstance(child, Node) and child.label == "CMD"], scope, current)
+        returned = self.check_expression(body[-1], scope, current)
+        if not self.assignable(returned, signature.returns):
+            raise Exception(f"Invalid return type {returned} for method {signature.name}, expected {signature.returns}")
+
+    def check_commands(self, commands: List[Node], scope: Scope, current: str) -> None:
+        stack = list(reversed(commands))
+        while stack:
+            cmd = stack.pop()
+            if not isinstance(cmd, Node):
+                continue
+            first = cmd.children[0] if cmd.children else None
+            if cmd.type == "array_assign":
+                self.expect(self.lookup_variable(first, scope, current), "int[]", cmd)
+                self.expect(self.check_expression(cmd.children[1], scope, current), "int", cmd)
+                self.expect(self.check_expression(cmd.children[3], scope, current), "int", cmd)
+            elif isinstance(first, Node) and (first.label == "if" or first.label == "while"):
+                self.expect(self.check_expression(first.children[0], scope, current), "boolean", cmd)
+                if len(cmd.children) > 1:
+                    stack.append(cmd.children[1].children[0])
+                stack.append(first.children[1])
+            elif isinstance(first, Node) and first.label == "System.out.println":
+                printed = self.check_expression(first.children[0], scope, current)
+                if printed != "int" and printed != "boolean":
+                    raise Exception(f"Invalid type {printed} for System.out.println @ {cmd}")
+            elif len(cmd.children) == 3 and isinstance(cmd.children[1], Node) and cmd.children[1].label == "operator":
+                target = self.lookup_variable(first, scope, current)
+                value = self.check_expression(cmd.children[2], scope, current)
+                if not self.assignable(value, target):
+                    raise Exception(f"Invalid type {value} assigned to {first.children[0]} of type {target}")
+            else:
+                stack.extend(reversed(cmd.children))
+
+    def expect(self, dtype: str, expected: str, node: Node) -> None:
+        if dtype != expected:
+            raise Exception(f"Expected {expected}, got {dtype} @ {node}")
+
+    def lookup_variable(self, identifier: Node, scope: Scope, current: str) -> str:
+        name = identifier.children[0]
+        symbol = scope.lookup(name)
+        if symbol is None or symbol.kind == "class":
+            raise Exception(f"Tried using variable {name} before declaration")
+        identifier.dtype = symbol.dtype
+        identifier.uses_variables = True
+        return symbol.dtype
+
+    def operands(self, node: Node) -> List[Node]:
+        label = node.label
+        if label == "EXP" or label == "REXP" or label == "AEXP" or label == "MEXP":
+            return [node.children[0], node.children[2]]
+        elif label == "SEXP":
+            if node.type == "array_init":
+                return [node.children[2]]
+            return [node.children[1]] if node.type == "unary" else []
+        elif label == "PEXP":
+            if node.type == "method_call":
+                return [node.children[0]] + node.children[2].children
+            elif node.type == "array_access":
+                return [node.children[0], node.children[1]]
+            elif node.children[0].label == "reserved":
+                return []
+            return [node.children[0]]
+        return []
+
+    def check_expression(self, root: Node, scope: Scope, current: str) -> str:
+        stack = [(root, False)]
+        while stack:
+            node, ready = stack.pop()
+            if not ready:
+                stack.append((node, True))
+                stack.extend((child, False) for child in self.operands(node))
+            else:
+                self.synthesize(node, scope, current)
+        return root.dtype
+
+    def synthesize(self, node: Node, scope: Scope, current: str) -> None:
+        label = node.label
+        children = node.children
+        if label == "EXP" or label == "REXP" or label == "AEXP" or label == "MEXP":
+            left, right = children[0], children[2]
+            op = children[1].children[0]
+            if op == "&&":
+                valid, dtype = left.dtype == right.dtype == "boolean", "boolean"
+            elif op == "<":
+                valid, dtype = left.dtype == right.dtype == "int", "boolean"
+            elif op == "==" or op == "!=":
+                valid, dtype = self.assignable(left.dtype, right.dtype) or self.assignable(right.dtype, left.dtype), "boolean"
+            else:
+                valid, dtype = left.dtype == right.dtype == "int", "int"
+            if not valid:
+                raise Exception(f"Invalid operand types {left.dtype} {op} {right.dtype} @ {node}")
+            node.dtype = dtype
+            node.constant = left.constant and right.constant
+            node.uses_variables = left.uses_variables or right.uses_variables
+        elif label == "SEXP":
+            if node.type == "array_init":
+                self.expect(children[2].dtype, "int", node)
+                node.dtype, node.uses_variables = "int[]", children[2].uses_variables
+                return
+            if node.type == "unary":
+                operand = children[1]
+                node.dtype = "boolean" if children[0].children[0] == "!" else "int"
+                self.expect(operand.dtype, node.dtype, node)
+                node.constant, node.uses_variables = operand.constant, operand.uses_variables
+                return
+            literal = children[0]
+            if literal.label == "number":
+                node.dtype = "int"
+            elif literal.children[0] == "null":
+                node.dtype = "null"
+            else:
+                node.dtype = "boolean"
+            node.constant = True
+        elif label == "number":
+            node.dtype, node.constant = "int", True
+        elif label == "identifier":
+            self.lookup_variable(node, scope, current)
+        elif node.type == "method_call":
+            target, name = children[0], children[1].children[0]
+            signature = self.symbols.signature(target.dtype, name)
+            if signature is None:
+                raise Exception(f"Undefined method {name} for type {target.dtype} @ {node}")
+            self.calls.append((node, signature))
+            node.dtype = signature.returns
+            node.uses_variables = target.uses_variables or any(arg.uses_variables for arg in children[2].children)
+        elif node.type == "array_access":
+            self.expect(children[0].dtype, "int[]", node)
+            self.expect(children[1].dtype, "int", node)
+            node.dtype, node.uses_variables = "int", children[0].uses_variables or children[1].uses_variables
+        elif node.type == "array_length":
+            self.expect(children[0].dtype, "int[]", node)
+            node.dtype, node.uses_variables = "int", children[0].uses_variables
+        elif children[0].label == "reserved":
+            if children[0].children[0] == "this":
+                node.dtype = current
+            else:
+                name = children[1].children[0]
+                if name not in self.symbols.classes:
+                    raise Exception(f"Undefined class {name} @ {node}")
+                node.dtype = name
+        elif len(children) == 2:
+            field = self.symbols.classes[children[0].dtype].lookup(children[1].children[0]) if children[0].dtype in self.symbols.classes else None
+            if field is None or field.kind != "field":
+                raise Exception(f"Undefined field {children[1].children[0]} for type {children[0].dtype} @ {node}")
+            node.dtype, node.uses_variables = field.dtype, True
+        else:
+            inner = children[0]
+            node.dtype, node.constant, node.uses_variables = inner.dtype, inner.constant, inner.uses_variables
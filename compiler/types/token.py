@@ -1,7 +1,83 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List
+
 class Token():
     def __init__(self, token_type: str, value: str) -> None:
         self.token_type: str = token_type
         self.value: str = value
 
     def __repr__(self) -> str:
-        return f"<{self.token_type}, '{self.value}'>"
\ No newline at end of file
+        return f"<{self.token_type}, '{self.value}'>"
+
+RESERVED_WORDS: List[str] = [
+    "boolean", "class", "extends", "public", "static", "void", "main", "String", "return", "int",
+    "if", "else", "while", "System.out.println", "length", "true", "false", "this", "new", "null",
+]
+OPERATORS: List[str] = ["==", "!=", "<=", ">=", "<", ">", "+", "-", "*", "&&", "!", "="]
+PUNCTUATION: List[str] = ["(", ")", "{", "}", "[", "]", ";", ".", ","]
+
+# Codigo inteiro de cada terminal: 0 e o fim da entrada, identificadores e numeros tem codigo proprio
+TERMINALS: List[str] = ["$", "identifier", "number"] + RESERVED_WORDS + OPERATORS + PUNCTUATION
+KINDS: Dict[str, int] = {terminal: code for code, terminal in enumerate(TERMINALS)}
+TOKEN_TYPES: List[str] = ["eof", "identifier", "number"] + ["reserved"] * len(RESERVED_WORDS) + ["operator"] * len(OPERATORS) + ["punctuation"] * len(PUNCTUATION)
+
+EOF, IDENTIFIER, NUMBER = 0, 1, 2
+
+class TokenBuffer():
+    """Tokens em arrays paralelos (tipo, inicio, fim); o texto so e fatiado quando pedido"""
+    __slots__ = ("source", "kinds", "starts", "ends")
+
+    def __init__(self, source: str) -> None:
+        self.source: str = source
+        self.kinds: array = array('B')
+        self.starts: array = array('I')
+        self.ends: array = array('I')
+
+    @classmethod
+    def from_tokens(cls, tokens: Iterable[Token]) -> 'TokenBuffer':
+        values = []
+        kinds = []
+        for token in tokens:
+            if token.token_type == "whitespace" or token.token_type == "comment":
+                continue
+            values.append(token.value)
+            kinds.append(KINDS[token.token_type] if token.token_type == "identifier" or token.token_type == "number" else KINDS[token.value])
+
+        buffer = cls(" ".join(values))
+        position = 0
+        for kind, value in zip(kinds, values):
+            buffer.append(kind, position, position + len(value))
+            position += len(value) + 1
+        return buffer
+
+    def append(self, kind: int, start: int, end: int) -> None:
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def kind(self, index: int) -> int:
+        return self.kinds[index] if index < len(self.kinds) else EOF
+
+    def value(self, index: int) -> str:
+        return self.source[self.starts[index]:self.ends[index]]
+
+    def token_type(self, index: int) -> str:
+        return TOKEN_TYPES[self.kinds[index]]
+
+    def nbytes(self) -> int:
+        return sum(len(column) * column.itemsize for column in (self.kinds, self.starts, self.ends))
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, index: int) -> Token:
+        if index < 0:
+            index += len(self.kinds)
+        return Token(TOKEN_TYPES[self.kinds[index]], self.value(index))
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self.kinds)):
+            yield self[index]
+
+    def __repr__(self) -> str:
+        return f"TokenBuffer({len(self)} tokens)"
@@ -1,12 +1,27 @@
-from typing import List
-import uuid
+from array import array
+from itertools import count
+from typing import Dict, Iterator, List
+
+# Ids crescentes no lugar de uuid4: unicos no processo e baratos de gerar
+_ids: Iterator[int] = count()
 
 class Node():
+    __slots__ = ("id", "label", "children", "type", "dtype", "constant", "uses_variables")
+
     def __init__(self, label: str, children: List['Node'], type: str = "") -> None:
-        self.value = str(uuid.uuid4())
+        self.id: int = next(_ids)
         self.label = label
         self.children = children
         self.type = type
+        # Atributos sintetizados pelo TypeChecker nos nodes de expressao
+        self.dtype: str = None
+        self.constant: bool = False
+        self.uses_variables: bool = False
+
+    @property
+    def value(self) -> str:
+        """Identidade do node em texto, usada por replace_node e pelo graphviz"""
+        return str(self.id)
 
     def add_child(self, child: 'Node') -> None:
         self.children.append(child)
@@ -16,7 +31,7 @@ class Node():
         if self.label == "METODO":
             for i in range(0, len(self.children[2].children), 2):
                 params.append({"name": self.children[2].children[i+1].children[0], "dtype": self.children[2].children[i].children[0].children[0], "aas_type": "PARAM", "method": self.children[1].children[0], "pos": i//2})
-        dtype = self.children[0].children[0].children[0] if type(self.children[0]) == Node and self.children[0].label == "TIPO" else None
+        dtype = self.children[0].children[0].children[0] if self.children and type(self.children[0]) == Node and self.children[0].label == "TIPO" else None
         dtype = "String[]" if dtype == None and self.label == "MAIN" else dtype
         return [{"name": child.children[0], "dtype": dtype, "aas_type": self.label} for child in self.children if isinstance(child, Node) and child.label == 'identifier'] + params
 
@@ -45,30 +60,123 @@ class Node():
         return False
     
     def get_direct_val(self, node: 'Node') -> int | bool:
-        if node.children[0].label == "reserved":
-            return True if node.children[0].children[0] == "true" else False
-        return int(node.children[0].children[0])
+        literal = node.children[0]
+        if literal.label == "reserved" or literal.label == "boolean":
+            return literal.children[0].lower() == "true"
+        return int(literal.children[0])
     
     def evaluate_bottom_expression(self) -> int | bool:
-        if self.label == "AEXP" or self.label == "MEXP":
-            print(self)
-            op = self.children[1].children[0]
-            if op == "+":
-                return self.get_direct_val(self.children[0]) + self.get_direct_val(self.children[2])
-            elif op == "-":
-                return self.get_direct_val(self.children[0]) - self.get_direct_val(self.children[2])
-            elif op == "*":
-                return self.get_direct_val(self.children[0]) * self.get_direct_val(self.children[2])
-        elif self.label == "REXP" or self.label == "EXP":
-            op = self.children[1].children[0]
-            if op == "<":
-                return self.get_direct_val(self.children[0]) < self.get_direct_val(self.children[2])
-            elif op == "==":
-                return self.get_direct_val(self.children[0]) == self.get_direct_val(self.children[2])
-            elif op == "!=":
-                return self.get_direct_val(self.children[0]) != self.get_direct_val(self.children[2])
-            elif op == "&&":
-                return self.get_direct_val(self.children[0]) and self.get_direct_val(self.children[2])
+        if self.type == "unary":
+            value = self.get_direct_val(self.children[1])
+            return -value if self.children[0].children[0] == "-" else not value
+        op = self.children[1].children[0]
+        left = self.get_direct_val(self.children[0])
+        right = self.get_direct_val(self.children[2])
+        if op == "+":
+            return left + right
+        elif op == "-":
+            return left - right
+        elif op == "*":
+            return left * right
+        elif op == "<":
+            return left < right
+        elif op == "==":
+            return left == right
+        elif op == "!=":
+            return left != right
+        elif op == "&&":
+            return left and right
 
     def __repr__(self) -> str:
-        return f"{self.label}({', '.join(repr(child) for child in self.children)})"
\ No newline at end of file
+        return f"{self.label}({', '.join(repr(child) for child in self.children)})"
+
+class NodeArena():
+    """Arvore congelada em arrays planos: label, tipo e faixa de filhos por handle inteiro.
+
+    Filhos que nao sao Node (os lexemas das folhas) ficam em leaves e entram na faixa com handle negativo.
+    """
+    __slots__ = ("labels", "types", "starts", "ends", "edges", "leaves", "names", "codes", "root")
+
+    def __init__(self) -> None:
+        self.labels: array = array('H')
+        self.types: array = array('H')
+        self.starts: array = array('I')
+        self.ends: array = array('I')
+        self.edges: array = array('i')
+        self.leaves: List[str] = []
+        self.names: List[str] = []
+        self.codes: Dict[str, int] = {}
+        self.root: int = -1
+
+    def intern(self, name: str) -> int:
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def add(self, label: str, children: List[int], type: str = "") -> int:
+        """Registra um node cujos filhos ja sao handles (>= 0) ou folhas (< 0)"""
+        handle = len(self.labels)
+        self.labels.append(self.intern(label))
+        self.types.append(self.intern(type))
+        self.starts.append(len(self.edges))
+        self.edges.extend(children)
+        self.ends.append(len(self.edges))
+        return handle
+
+    def leaf(self, value: str) -> int:
+        self.leaves.append(value)
+        return -len(self.leaves)
+
+    @classmethod
+    def from_tree(cls, root: Node) -> 'NodeArena':
+        arena = cls()
+        arena.freeze(root)
+        return arena
+
+    def freeze(self, root: Node) -> int:
+        """Copia a arvore em pos-ordem com pilha explicita e devolve o handle da raiz"""
+        handles: List[int] = []
+        stack = [(root, False)]
+        while stack:
+            node, done = stack.pop()
+            if not done:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children) if isinstance(child, Node))
+                continue
+            children = [handles.pop() if isinstance(child, Node) else self.leaf(child) for child in reversed(node.children)]
+            children.reverse()
+            handles.append(self.add(node.label, children, node.type))
+        self.root = handles[0]
+        return self.root
+
+    def label(self, handle: int) -> str:
+        return self.names[self.labels[handle]]
+
+    def type(self, handle: int) -> str:
+        return self.names[self.types[handle]]
+
+    def children(self, handle: int) -> List[int]:
+        return self.edges[self.starts[handle]:self.ends[handle]].tolist()
+
+    def to_node(self, handle: int) -> Node:
+        """Materializa um Node comum a partir do handle (ids novos)"""
+        root = Node(self.label(handle), [], self.type(handle))
+        stack = [(root, handle)]
+        while stack:
+            node, current = stack.pop()
+            for child in self.children(current):
+                if child < 0:
+                    node.children.append(self.leaves[-child - 1])
+                else:
+                    copy = Node(self.label(child), [], self.type(child))
+                    node.children.append(copy)
+                    stack.append((copy, child))
+        return root
+
+    def nbytes(self) -> int:
+        return sum(len(column) * column.itemsize for column in (self.labels, self.types, self.starts, self.ends, self.edges))
+
+    def __len__(self) -> int:
+        return len(self.labels)